@@ -0,0 +1,44 @@
+from .dijkstra import dijkstra_grid, dijkstra_steps
+from .a_star import astar_grid, astar_steps
+from .bfs import bfs_grid, bfs_steps
+from .dfs import dfs_grid, dfs_steps
+from .greedy_bfs import greedy_bfs_grid, greedy_bfs_steps
+from .bellman_ford import bellman_ford_grid, bellman_ford_steps
+from .bi_swarm import bi_swarm_grid, bi_swarm_steps
+from .jps import jps_grid, jps_steps
+from .hpa import hpa_grid, hpa_steps
+from .alt import alt_grid, alt_steps
+
+# Every solver, keyed by its endpoint name
+SOLVERS = {
+    "dijkstra": dijkstra_grid,
+    "astar": astar_grid,
+    "bfs": bfs_grid,
+    "dfs": dfs_grid,
+    "greedy-bfs": greedy_bfs_grid,
+    "bellman-ford": bellman_ford_grid,
+    "bi-swarm": bi_swarm_grid,
+    "jps": jps_grid,
+    "hpa": hpa_grid,
+    "alt": alt_grid,
+}
+
+# Generator form of each solver, keyed the same way
+SOLVER_STEPS = {
+    "dijkstra": dijkstra_steps,
+    "astar": astar_steps,
+    "bfs": bfs_steps,
+    "dfs": dfs_steps,
+    "greedy-bfs": greedy_bfs_steps,
+    "bellman-ford": bellman_ford_steps,
+    "bi-swarm": bi_swarm_steps,
+    "jps": jps_steps,
+    "hpa": hpa_steps,
+    "alt": alt_steps,
+}
+
+# Solvers that take per-cell weights as an extra argument
+WEIGHTED_SOLVERS = {"dijkstra", "astar"}
+
+# Generators that check their search's budget while preprocessing, so take it as a keyword
+BUDGETED_STEPS = {"hpa", "alt"}
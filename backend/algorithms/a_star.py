@@ -1,68 +1,87 @@
 import heapq
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import numpy as np
 
+from .grid import Budget, GridGraph, Steps, collect, next_chunk, FIRST_CHUNK
+from .dijkstra import dial_steps
+
 def heuristic(pos1: Tuple[int, int], pos2: Tuple[int, int]) -> int:
     """Manhattan distance heuristic"""
     return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
-def astar_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Tuple[List[int], List[int]]:
+def astar_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+                weights: Optional[np.ndarray] = None) -> Steps:
     """
-    A* algorithm implementation
-    Returns: (visited_order, path_indexes)
+    A* algorithm implementation. Weighted grids run on a bucket queue, with
+    Manhattan distance scaled by the cheapest cell as the heuristic.
+    Yields: chunks of visited_order
+    Returns: path_indexes
     """
-    start_pos = (start // cols, start % cols)
-    end_pos = (end // cols, end % cols)
+    g = GridGraph(grid, rows, cols, weights)
+    if weights is not None:
+        # Only open cells are ever stepped onto, so the cheapest of those bounds every step
+        open_weights = np.asarray(weights).reshape(rows, cols)[np.asarray(grid).reshape(rows, cols) != 1]
+        scale = int(open_weights.min()) if open_weights.size else 1
+        return (yield from dial_steps(g, g.node(start), g.node(end), scale=scale))
+    passable = g.passable
+    offsets = g.offsets
+    width = g.width
+    source = g.node(start)
+    target = g.node(end)
+    end_r, end_c = g.position(target)
     
-    visited = set()
+    visited = g.new_visited()
     visited_order = []
-    g_scores = {start_pos: 0}
-    f_scores = {start_pos: heuristic(start_pos, end_pos)}
-    parent = {}
+    limit = FIRST_CHUNK
+    g_scores = g.new_distance()
+    g_scores[source] = 0
+    parent = g.new_parent()
     
-    pq = [(f_scores[start_pos], start_pos)]
-    
-    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    pq = [(heuristic(g.position(source), (end_r, end_c)), source)]
     
     while pq:
         _, current = heapq.heappop(pq)
         
-        if current in visited:
+        if visited[current]:
             continue
             
-        visited.add(current)
-        visited_order.append(current[0] * cols + current[1])
+        visited[current] = 1
+        visited_order.append(current)
+        if len(visited_order) >= limit:
+            room = yield g.indexes(visited_order)
+            visited_order, limit = [], next_chunk(limit, room)
         
-        if current == end_pos:
+        if current == target:
             break
             
-        for dy, dx in directions:
-            ny, nx = current[0] + dy, current[1] + dx
+        tentative_g = g_scores[current] + 1
+        for off in offsets:
+            neighbor = current + off
             
-            if 0 <= ny < rows and 0 <= nx < cols:
-                neighbor = (ny, nx)
-                
-                if grid[ny, nx] == 1 or neighbor in visited:
-                    continue
-                    
-                tentative_g = g_scores[current] + 1
+            if not passable[neighbor] or visited[neighbor]:
+                continue
                 
-                if neighbor not in g_scores or tentative_g < g_scores[neighbor]:
-                    g_scores[neighbor] = tentative_g
-                    f_scores[neighbor] = tentative_g + heuristic(neighbor, end_pos)
-                    parent[neighbor] = current
-                    heapq.heappush(pq, (f_scores[neighbor], neighbor))
+            if tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                parent[neighbor] = current
+                r, c = divmod(neighbor, width)
+                f = tentative_g + abs(r - end_r) + abs(c - end_c)
+                heapq.heappush(pq, (f, neighbor))
+    
+    if visited_order:
+        yield g.indexes(visited_order)
     
-    # Reconstruct path
     path = []
-    if end_pos in parent or end_pos == start_pos:
-        current = end_pos
-        while current != start_pos:
-            path.append(current[0] * cols + current[1])
-            if current not in parent:
-                break
-            current = parent[current]
-        path.append(start)
-        path.reverse()
+    if parent[target] != -1 or target == source:
+        path = g.trace(parent, source, target)
     
-    return visited_order, path
\ No newline at end of file
+    return path
+
+def astar_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+               weights: Optional[np.ndarray] = None,
+               budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    A* algorithm implementation
+    Returns: (visited_order, path_indexes)
+    """
+    return collect(astar_steps(grid, start, end, rows, cols, weights), budget)
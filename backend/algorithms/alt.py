@@ -0,0 +1,248 @@
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+from .grid import (
+    Budget, BudgetExhausted, GridGraph, Steps, collect, distance_field, grid_hash, next_chunk, FIRST_CHUNK, INF,
+)
+
+# Landmarks picked per connected region
+LANDMARKS = 8
+
+# Regions smaller than this get no landmarks; Manhattan distance is enough there
+MIN_REGION = 1024
+
+# Landmark sets kept per process
+CACHE_SIZE = 4
+
+# Most bytes of landmark fields one set keeps; regions covered past it get
+# fewer landmarks, or none and plain Manhattan distance
+MAX_FIELD_BYTES = 32 * 2**20
+
+class Region:
+    """
+    One connected region's landmarks: their distance fields cropped to the
+    region's bounding box, in the smallest unsigned type that holds them.
+    """
+
+    def __init__(self, nodes: List[int], fields: List[np.ndarray], top: int, left: int, span: int):
+        self.nodes = nodes
+        self.fields = [memoryview(field.reshape(-1)) for field in fields]
+        self.top = top
+        self.left = left
+        self.span = span
+        self.nbytes = sum(field.nbytes for field in fields)
+
+    def local(self, r: int, c: int) -> int:
+        """Padded (row, col) -> index into the cropped fields"""
+        return (r - self.top) * self.span + c - self.left
+
+class Landmarks:
+    """
+    ALT (A*, Landmarks, Triangle inequality) preprocessing of a grid.
+
+    For a landmark L and any cells n and t, |d(L, n) - d(L, t)| <= d(n, t),
+    so exact distance fields from a few landmarks give a lower bound on the
+    distance to any target. Landmarks are picked by farthest-point
+    selection, which puts them on the periphery where the bounds are
+    tightest. Regions are covered lazily, the first time a query targets
+    them, each under the set's own lock, and a query only ever reads the
+    fields of its target's region.
+    """
+
+    def __init__(self, grid: np.ndarray, rows: int, cols: int, k: int = LANDMARKS):
+        self.g = GridGraph(grid, rows, cols)
+        self.k = k
+        # Region id of every covered cell, -1 until its region is covered
+        self.labels = np.full(self.g.size, -1, dtype=np.int32)
+        self._labels = memoryview(self.labels)
+        self.regions: List[Region] = []
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def _field(self, source: int, budget: Optional[Budget] = None) -> np.ndarray:
+        """
+        Full distance field from source, within budget's clock and cancel;
+        its max_nodes is for the search, not for preprocessing
+        Returns: distance_field's result; raises BudgetExhausted
+        """
+        if budget is None:
+            return distance_field(self.g, source)
+        field = distance_field(self.g, source, Budget(deadline=budget.deadline, cancel=budget.cancel))
+        budget.check()
+        return field
+
+    def _cover(self, seed: int, budget: Optional[Budget] = None):
+        """
+        Pick landmarks for the region around seed, as many as fit in what
+        is left of MAX_FIELD_BYTES. Nothing is kept unless the whole region
+        is covered, so a cover cut short by budget is started over by the
+        next query that needs it. Call with lock held.
+        """
+        nearest = self._field(seed, budget)
+        region = nearest >= 0
+        padded = region.reshape(self.g.rows + 2, self.g.width)
+        rows = np.flatnonzero(padded.any(axis=1))
+        cols = np.flatnonzero(padded.any(axis=0))
+        top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        size = np.count_nonzero(region)
+        # No two cells are further apart than twice the farthest one is from seed
+        dtype = np.uint16 if 2 * int(nearest.max()) < np.iinfo(np.uint16).max else np.uint32
+        room = int((MAX_FIELD_BYTES - self.nbytes) // ((bottom - top) * (right - left) * np.dtype(dtype).itemsize))
+
+        fields, nodes = [], []
+        if size >= MIN_REGION:
+            for _ in range(min(self.k, room)):
+                # Farthest cell from every landmark so far; ties go to the lowest id
+                landmark = int(np.argmax(nearest))
+                if nearest[landmark] <= 0:
+                    break
+                field = self._field(landmark, budget)
+                nodes.append(landmark)
+                nearest = np.minimum(nearest, field, where=region, out=nearest)
+                # Cells outside the region wrap around, but are never read
+                fields.append(field.reshape(self.g.rows + 2, self.g.width)[top:bottom, left:right].astype(dtype))
+        found = Region(nodes, fields, int(top), int(left), int(right - left))
+        self.nbytes += found.nbytes
+        # Labels are read without the lock, so the region they point at goes in first
+        self.regions.append(found)
+        self.labels[region] = len(self.regions) - 1
+
+    def heuristic(self, target: int, budget: Optional[Budget] = None) -> Callable[[int], int]:
+        """
+        Admissible, consistent estimate of the distance from a cell to
+        target: the best bound from the landmarks of target's region, or
+        Manhattan distance where that is larger. Cells outside the region
+        can't reach target and get INF. Estimates are worked out per cell,
+        as the search asks for them.
+        Returns: node id -> estimate; raises BudgetExhausted
+        """
+        if self.labels[target] < 0 and self.g.passable[target]:
+            with self.lock:
+                if self.labels[target] < 0:
+                    self._cover(target, budget)
+        width = self.g.width
+        tr, tc = self.g.position(target)
+        label = int(self.labels[target])
+        if label < 0:
+            # A wall target; nothing reaches it, and the search never gets that far
+            return lambda node: abs(node // width - tr) + abs(node % width - tc)
+
+        labels = self._labels
+        region = self.regions[label]
+        local = region.local(tr, tc)
+        bounds = [(field, field[local]) for field in region.fields]
+
+        def estimate(node: int) -> int:
+            if labels[node] != label:
+                return INF
+            r, c = divmod(node, width)
+            h = abs(r - tr) + abs(c - tc)
+            i = region.local(r, c)
+            for field, dt in bounds:
+                bound = abs(field[i] - dt)
+                if bound > h:
+                    h = bound
+            return h
+
+        return estimate
+
+_cache: "OrderedDict[Tuple[str, int], Landmarks]" = OrderedDict()
+_lock = threading.Lock()
+
+def landmarks_for(grid: np.ndarray, rows: int, cols: int, k: int = LANDMARKS) -> Landmarks:
+    """
+    Cached landmarks of a grid. _lock only guards the cache itself; a new
+    set is built outside it, and its regions are covered under its own lock.
+    """
+    key = (grid_hash(grid, rows, cols), k)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    landmarks = Landmarks(grid, rows, cols, k)
+    with _lock:
+        # Another request may have built the same set meanwhile; keep the first
+        landmarks = _cache.setdefault(key, landmarks)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return landmarks
+
+def alt_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int, k: int = LANDMARKS,
+              budget: Optional[Budget] = None) -> Steps:
+    """
+    A* with ALT landmark heuristics implementation. Picking landmarks
+    checks budget as it goes, before any cell is expanded.
+    Yields: chunks of visited_order
+    Returns: path_indexes, or [] if budget ran out while picking landmarks
+    """
+    landmarks = landmarks_for(grid, rows, cols, k)
+    g = landmarks.g
+    source = g.node(start)
+    target = g.node(end)
+    try:
+        h = landmarks.heuristic(target, budget)
+    except BudgetExhausted:
+        return []
+    passable = g.passable
+    offsets = g.offsets
+
+    visited = g.new_visited()
+    visited_order = []
+    limit = FIRST_CHUNK
+    g_scores = g.new_distance()
+    g_scores[source] = 0
+    parent = g.new_parent()
+
+    # Ties go to the deeper node: landmark bounds are often exact, and
+    # breaking ties toward the start would expand every equally good cell
+    pq = [(h(source), 0, source)]
+
+    while pq:
+        f, _, current = heapq.heappop(pq)
+
+        if visited[current]:
+            continue
+        if f >= INF:
+            break
+
+        visited[current] = 1
+        visited_order.append(current)
+        if len(visited_order) >= limit:
+            room = yield g.indexes(visited_order)
+            visited_order, limit = [], next_chunk(limit, room)
+
+        if current == target:
+            break
+
+        tentative_g = g_scores[current] + 1
+        for off in offsets:
+            neighbor = current + off
+
+            if not passable[neighbor] or visited[neighbor]:
+                continue
+
+            if tentative_g < g_scores[neighbor]:
+                g_scores[neighbor] = tentative_g
+                parent[neighbor] = current
+                heapq.heappush(pq, (tentative_g + h(neighbor), -tentative_g, neighbor))
+
+    if visited_order:
+        yield g.indexes(visited_order)
+
+    path = []
+    if visited[target] and (parent[target] != -1 or target == source):
+        path = g.trace(parent, source, target)
+
+    return path
+
+def alt_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+             budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    A* with ALT landmark heuristics implementation
+    Returns: (visited_order, path_indexes)
+    """
+    return collect(alt_steps(grid, start, end, rows, cols, budget=budget), budget)
@@ -1,78 +1,94 @@
-from typing import List, Tuple, Dict, Optional
+from typing import List, Optional, Tuple
 import numpy as np
 
-def bellman_ford_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Tuple[List[int], List[int]]:
+from .grid import Budget, GridGraph, Steps, collect, next_chunk, FIRST_CHUNK, INF
+
+def build_edges(g: GridGraph) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Bellman-Ford algorithm implementation
-    Returns: (visited_order, path_indexes)
+    Build the directed edge list of the open cells in one vectorized pass
+    Returns: (source ids, target ids, CSR row pointer indexed by node id)
+    """
+    nodes = np.flatnonzero(g.passable_np)
+    src = np.repeat(nodes, len(g.offsets))
+    dst = src + np.tile(g.offsets_np, len(nodes))
+    keep = g.passable_np[dst]
+    src, dst = src[keep], dst[keep]
+
+    # Edges are sorted by source, so out-edges of node n are src[indptr[n]:indptr[n + 1]]
+    indptr = np.zeros(g.size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=g.size), out=indptr[1:])
+    return src, dst, indptr
+
+def bellman_ford_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Steps:
+    """
+    Bellman-Ford algorithm implementation with vectorized edge relaxation
+    Yields: chunks of visited_order
+    Returns: path_indexes
     """
-    start_pos = (start // cols, start % cols)
-    end_pos = (end // cols, end % cols)
-    
-    # Build adjacency list
-    graph = {}
-    for r in range(rows):
-        for c in range(cols):
-            if grid[r, c] == 1:
-                continue
-            pos = (r, c)
-            graph[pos] = []
-            for dy, dx in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                ny, nx = r + dy, c + dx
-                if 0 <= ny < rows and 0 <= nx < cols and grid[ny, nx] != 1:
-                    graph[pos].append((ny, nx))
-    
-    # Initialize
-    distances = {start_pos: 0}
-    parent = {}
-    visited_order = [start]
-    visited = {start_pos}
-    
-    # Add neighbors of start
-    for neighbor in graph.get(start_pos, []):
-        distances[neighbor] = 1
-        parent[neighbor] = start_pos
-        visited.add(neighbor)
-        visited_order.append(neighbor[0] * cols + neighbor[1])
-        if neighbor == end_pos:
+    g = GridGraph(grid, rows, cols)
+    source = g.node(start)
+    target = g.node(end)
+
+    src, dst, indptr = build_edges(g)
+
+    distances = np.full(g.size, INF, dtype=np.int64)
+    distances[source] = 0
+    parent = g.new_parent()
+    parent_np = np.frombuffer(parent, dtype=np.int32)
+
+    visited_order = [np.array([source])]
+    pending = 1
+    limit = FIRST_CHUNK
+    changed = np.array([source])
+
+    # Relax edges at most V-1 times. A round only needs the out-edges of
+    # nodes whose distance changed in the previous round
+    for _ in range(max(int(np.count_nonzero(g.passable_np)) - 1, 1)):
+        if source == target or distances[target] != INF:
+            break
+
+        starts = indptr[changed]
+        counts = indptr[changed + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
             break
-    
-    # Relax edges V-1 times
-    for _ in range(len(graph) - 1):
-        updated = False
-        for node in graph:
-            if node not in distances:
-                continue
-            dist_node = distances[node]
-            
-            for neighbor in graph[node]:
-                new_dist = dist_node + 1
-                
-                if neighbor not in distances or new_dist < distances[neighbor]:
-                    distances[neighbor] = new_dist
-                    parent[neighbor] = node
-                    updated = True
-                    
-                    if neighbor not in visited:
-                        visited.add(neighbor)
-                        visited_order.append(neighbor[0] * cols + neighbor[1])
-                    
-                    if neighbor == end_pos:
-                        break
-        
-        if not updated or end_pos in distances:
+        sel = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        s, d = src[sel], dst[sel]
+
+        candidate = distances[s] + 1
+        old = distances[d]
+        np.minimum.at(distances, d, candidate)
+
+        # The first edge (in source order) achieving each new minimum becomes the parent
+        hit = np.flatnonzero((candidate < old) & (candidate == distances[d]))
+        if len(hit) == 0:
             break
-    
-    # Reconstruct path
+        _, first = np.unique(d[hit], return_index=True)
+        hit = hit[np.sort(first)]
+
+        updated = d[hit]
+        parent_np[updated] = s[hit]
+        reached = updated[old[hit] == INF]
+        visited_order.append(reached)
+        pending += len(reached)
+        if pending >= limit:
+            room = yield g.indexes(np.concatenate(visited_order))
+            visited_order, pending, limit = [], 0, next_chunk(limit, room)
+        changed = np.sort(updated)
+
+    if pending:
+        yield g.indexes(np.concatenate(visited_order))
+
     path = []
-    if end_pos in parent or end_pos == start_pos:
-        current = end_pos
-        while current != start_pos:
-            path.append(current[0] * cols + current[1])
-            if current not in parent:
-                break
-            current = parent[current]
-        path.append(start)
-        path.reverse()
-    
-    return visited_order, path
\ No newline at end of file
+    if parent[target] != -1 or target == source:
+        path = g.trace(parent, source, target)
+
+    return path
+
+def bellman_ford_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+                      budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    Bellman-Ford algorithm implementation with vectorized edge relaxation
+    Returns: (visited_order, path_indexes)
+    """
+    return collect(bellman_ford_steps(grid, start, end, rows, cols), budget)
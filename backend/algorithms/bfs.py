@@ -1,52 +1,49 @@
-from collections import deque
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import numpy as np
 
-def bfs_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Tuple[List[int], List[int]]:
+from .grid import Budget, GridGraph, Steps, Wavefront, collect, next_chunk, FIRST_CHUNK
+
+def bfs_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Steps:
     """
-    BFS algorithm implementation
-    Returns: (visited_order, path_indexes)
+    BFS algorithm implementation, expanded one whole level at a time
+    Yields: chunks of visited_order
+    Returns: path_indexes
     """
-    start_pos = (start // cols, start % cols)
-    end_pos = (end // cols, end % cols)
+    g = GridGraph(grid, rows, cols)
+    source = g.node(start)
+    target = g.node(end)
     
-    visited = set([start_pos])
-    visited_order = [start]
-    parent = {}
+    stop = g.new_visited()
+    stop[target] = 1
     
-    queue = deque([start_pos])
-    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    wave = Wavefront(g, source)
+    levels = [[source]]
+    pending = 1
+    limit = FIRST_CHUNK
     
     found = False
     
-    while queue and not found:
-        current = queue.popleft()
+    while len(wave.frontier):
+        discovered, meeting = wave.step(stop)
+        levels.append(discovered)
+        pending += len(discovered)
+        if pending >= limit:
+            room = yield g.indexes(np.concatenate(levels))
+            levels, pending, limit = [], 0, next_chunk(limit, room)
         
-        if current == end_pos:
+        if meeting != -1:
             found = True
             break
-            
-        for dy, dx in directions:
-            ny, nx = current[0] + dy, current[1] + dx
-            
-            if 0 <= ny < rows and 0 <= nx < cols:
-                neighbor = (ny, nx)
-                neighbor_idx = ny * cols + nx
-                
-                if grid[ny, nx] != 1 and neighbor not in visited:
-                    visited.add(neighbor)
-                    visited_order.append(neighbor_idx)
-                    parent[neighbor] = current
-                    queue.append(neighbor)
     
-    # Reconstruct path
-    path = []
-    if found:
-        current = end_pos
-        while current != start_pos:
-            path.append(current[0] * cols + current[1])
-            current = parent[current]
-        path.append(start)
-        path.reverse()
+    if pending:
+        yield g.indexes(np.concatenate(levels))
     
-    return visited_order, path
\ No newline at end of file
+    return g.trace(wave.parent, source, target) if found else []
+
+def bfs_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+             budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    BFS algorithm implementation, expanded one whole level at a time
+    Returns: (visited_order, path_indexes)
+    """
+    return collect(bfs_steps(grid, start, end, rows, cols), budget)
@@ -0,0 +1,212 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+
+from .grid import grid_hash
+
+# Indexes kept per process; a miss updates the newest one of the same size
+CACHE_SIZE = 8
+
+# Past this fraction of changed cells, labeling from scratch beats patching
+REBUILD_FRACTION = 1 / 16
+
+# The eight cells around a cell, in order, so consecutive ones are 4-adjacent
+RING = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+
+def union_roots(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Vectorized union-find: join a[i] with b[i] for every i. Each round
+    hooks every root onto the smallest root it is joined to, then
+    compresses paths by pointer jumping until every id points at a root.
+    Returns: root of every id in 0..n-1, the smallest id in its set
+    """
+    parent = np.arange(n, dtype=np.int64)
+    while True:
+        ra, rb = parent[a], parent[b]
+        differ = ra != rb
+        if not differ.any():
+            return parent
+        ra, rb = ra[differ], rb[differ]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+def label_components(open_cells: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Scanline labeling of 4-connected open cells: number the horizontal runs
+    of open cells, then union runs that touch vertically
+    Returns: (int32 labels shaped like open_cells, 0 on walls; label count)
+    """
+    open_cells = np.asarray(open_cells, dtype=np.bool_)
+    if open_cells.size == 0:
+        return np.zeros(open_cells.shape, dtype=np.int32), 0
+    starts = open_cells.copy()
+    starts[:, 1:] &= ~open_cells[:, :-1]
+    runs = np.cumsum(starts.reshape(-1), dtype=np.int64).reshape(open_cells.shape)
+    runs[~open_cells] = 0
+
+    touching = open_cells[1:] & open_cells[:-1]
+    roots = union_roots(int(runs.max()) + 1, runs[:-1][touching], runs[1:][touching])
+    # Run 0 stands for walls and is never joined, so it keeps label 0
+    unique, compact = np.unique(roots, return_inverse=True)
+    return compact.reshape(-1)[runs].astype(np.int32), len(unique) - 1
+
+class ComponentIndex:
+    """
+    Connected-component labels of a grid's open cells. Two cells are
+    connected exactly when they share a nonzero label, so a query between
+    different labels has no path and needs no search.
+
+    Wall edits are patched in rather than relabeling the whole grid: a
+    new wall can only split its own component, so just that component is
+    relabeled, and an opened cell merges the components around it.
+    """
+
+    def __init__(self, grid: np.ndarray, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self._build(np.asarray(grid).reshape(rows, cols) == 1)
+
+    def _build(self, walls: np.ndarray):
+        self.walls = walls.copy()
+        self.labels, self.count = label_components(~walls)
+        self.next_label = self.count + 1
+
+    def connected(self, a: int, b: int) -> bool:
+        """
+        Whether a path from a to b may exist. Ends on a wall never are;
+        starts on a wall are left for the solver, some of which step off them.
+        """
+        labels = self.labels.reshape(-1)
+        la, lb = labels[a], labels[b]
+        return bool(lb != 0 and (la == 0 or la == lb))
+
+    def copy(self) -> "ComponentIndex":
+        """A copy to update for another grid while this one stays as it is"""
+        clone = copy.copy(self)
+        clone.labels = self.labels.copy()
+        return clone
+
+    def update(self, grid: np.ndarray):
+        """Bring the labels up to date with a new wall layout of the same size"""
+        walls = np.asarray(grid).reshape(self.rows, self.cols) == 1
+        changed = np.flatnonzero(walls != self.walls)
+        if len(changed) == 0:
+            return
+        if len(changed) > walls.size * REBUILD_FRACTION or self.next_label > 2**30:
+            self._build(walls)
+            return
+
+        flat_walls = walls.reshape(-1)
+        closed = changed[flat_walls[changed]]
+        opened = changed[~flat_walls[changed]]
+        labels = self.labels.reshape(-1)
+        self.walls = walls.copy()
+
+        if len(closed):
+            # The detour argument only holds for a path crossing one new wall at a time
+            lone = ~np.isin(closed + 1, closed) & ~np.isin(closed - 1, closed) \
+                & ~np.isin(closed + self.cols, closed) & ~np.isin(closed - self.cols, closed)
+            split = np.unique([labels[i] for i, alone in zip(closed, lone) if not (alone and self._bypassed(i))])
+            labels[closed] = 0
+            if len(split):
+                self._relabel(np.isin(self.labels, split[split != 0]))
+        if len(opened):
+            self._merge(opened)
+
+    def _bypassed(self, idx: int) -> bool:
+        """
+        Whether the open neighbors of a new wall are still joined by a path
+        around it through the eight surrounding cells. If so, any path that
+        went through the cell can detour, and its component can't have split.
+        """
+        r, c = divmod(int(idx), self.cols)
+        ring = [
+            0 <= r + dr < self.rows and 0 <= c + dc < self.cols and not self.walls[r + dr, c + dc]
+            for dr, dc in RING
+        ]
+        # Count the open arcs of the ring that hold an orthogonal neighbor
+        arcs = 0
+        for i in range(0, 8, 2):
+            if ring[i] and not (ring[i - 1] and ring[i - 2]):
+                arcs += 1
+        return arcs <= 1
+
+    def _relabel(self, region: np.ndarray):
+        """Label the open cells of region afresh, within its bounding box"""
+        if not region.any():
+            return
+        rows = np.flatnonzero(region.any(axis=1))
+        cols = np.flatnonzero(region.any(axis=0))
+        box = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+        inside = region[box] & ~self.walls[box]
+        fresh, count = label_components(inside)
+        self.labels[box][inside] = fresh[inside] + (self.next_label - 1)
+        self.next_label += count
+
+    def _merge(self, opened: np.ndarray):
+        """Give each opened cell a new label, then join it with its open neighbors"""
+        labels = self.labels.reshape(-1)
+        labels[opened] = np.arange(self.next_label, self.next_label + len(opened), dtype=np.int32)
+        self.next_label += len(opened)
+
+        r, c = np.divmod(opened, self.cols)
+        a, b = [], []
+        for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+            rr, cc = r + dr, c + dc
+            inside = (rr >= 0) & (rr < self.rows) & (cc >= 0) & (cc < self.cols)
+            neighbor = rr[inside] * self.cols + cc[inside]
+            joined = labels[neighbor] != 0
+            a.append(labels[opened[inside][joined]])
+            b.append(labels[neighbor[joined]])
+        a, b = np.concatenate(a), np.concatenate(b)
+        if len(a) == 0:
+            return
+        # Union-find over just the labels involved, then one lookup pass to apply it
+        involved, pairs = np.unique(np.concatenate([a, b]), return_inverse=True)
+        roots = union_roots(len(involved), pairs[:len(a)], pairs[len(a):])
+        lut = np.arange(self.next_label, dtype=np.int32)
+        lut[involved] = involved[roots]
+        self.labels = lut[self.labels]
+
+_cache: "OrderedDict[str, ComponentIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+def index_for(grid: np.ndarray, rows: int, cols: int) -> ComponentIndex:
+    """
+    Cached component index of a grid. On a miss, a copy of the newest
+    cached index of the same size is patched with the cells that differ,
+    so the grid it came from stays cached too. Call with _lock held.
+    """
+    key = grid_hash(grid, rows, cols)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    previous: Optional[str] = next(
+        (k for k in reversed(_cache) if (_cache[k].rows, _cache[k].cols) == (rows, cols)), None
+    )
+    if previous is not None:
+        index = _cache[previous].copy()
+        index.update(grid)
+    else:
+        index = ComponentIndex(grid, rows, cols)
+    _cache[key] = index
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return index
+
+def connected(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> bool:
+    """
+    Whether a search from start could reach end; False means no solver
+    will find a path, so the search can be skipped
+    """
+    if start == end:
+        return True
+    with _lock:
+        return index_for(grid, rows, cols).connected(start, end)
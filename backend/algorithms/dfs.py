@@ -1,56 +1,61 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import numpy as np
 
-def dfs_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Tuple[List[int], List[int]]:
+from .grid import Budget, GridGraph, Steps, collect, next_chunk, FIRST_CHUNK
+
+def dfs_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Steps:
     """
     DFS algorithm implementation
-    Returns: (visited_order, path_indexes)
+    Yields: chunks of visited_order
+    Returns: path_indexes
     """
-    start_pos = (start // cols, start % cols)
-    end_pos = (end // cols, end % cols)
+    g = GridGraph(grid, rows, cols)
+    passable = g.passable
+    offsets = tuple(reversed(g.offsets))
+    source = g.node(start)
+    target = g.node(end)
     
-    visited = set()
+    visited = g.new_visited()
     visited_order = []
-    parent = {}
+    limit = FIRST_CHUNK
+    parent = g.new_parent()
     
-    stack = [start_pos]
-    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    stack = [source]
     
     found = False
     
-    while stack and not found:
+    while stack:
         current = stack.pop()
         
-        if current in visited:
+        if visited[current]:
             continue
             
-        visited.add(current)
-        visited_order.append(current[0] * cols + current[1])
+        visited[current] = 1
+        visited_order.append(current)
+        if len(visited_order) >= limit:
+            room = yield g.indexes(visited_order)
+            visited_order, limit = [], next_chunk(limit, room)
         
-        if current == end_pos:
+        if current == target:
             found = True
             break
             
-        for dy, dx in reversed(directions):
-            ny, nx = current[0] + dy, current[1] + dx
+        for off in offsets:
+            neighbor = current + off
             
-            if 0 <= ny < rows and 0 <= nx < cols:
-                neighbor = (ny, nx)
-                
-                if grid[ny, nx] != 1 and neighbor not in visited:
-                    parent[neighbor] = current
-                    stack.append(neighbor)
+            if passable[neighbor] and not visited[neighbor]:
+                parent[neighbor] = current
+                stack.append(neighbor)
     
-    # Reconstruct path
-    path = []
-    if found:
-        current = end_pos
-        while current != start_pos:
-            path.append(current[0] * cols + current[1])
-            if current not in parent:
-                break
-            current = parent[current]
-        path.append(start)
-        path.reverse()
+    if visited_order:
+        yield g.indexes(visited_order)
     
-    return visited_order, path
\ No newline at end of file
+    return g.trace(parent, source, target) if found else []
+
+def dfs_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+             budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    DFS algorithm implementation
+    Returns: (visited_order, path_indexes)
+    """
+    return collect(dfs_steps(grid, start, end, rows, cols), budget)
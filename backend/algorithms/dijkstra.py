@@ -1,63 +1,104 @@
-import heapq
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import numpy as np
 
-def dijkstra_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Tuple[List[int], List[int]]:
+from .grid import Budget, GridGraph, Steps, collect, next_chunk, FIRST_CHUNK
+
+def dial_steps(g: GridGraph, source: int, target: int, scale: int = 0) -> Steps:
     """
-    Dijkstra's algorithm implementation
-    Returns: (visited_order, path_indexes)
+    Dial's algorithm: Dijkstra with a ring of buckets, one per priority,
+    in place of a heap. Costs are small integers, so every push and pop is
+    O(1), and with unit costs it visits cells level by level like BFS.
+    A nonzero scale turns it into A* on Manhattan distance times scale,
+    which stays admissible as long as scale is at most the cheapest cell.
+    Yields: chunks of visited_order
+    Returns: path_indexes
     """
-    start_pos = (start // cols, start % cols)
-    end_pos = (end // cols, end % cols)
-    
-    visited = set()
+    # Walls cost 0 in both, so one lookup covers passability and price
+    cost = g.cost if g.cost is not None else g.passable
+    offsets = g.offsets
+    width = g.width
+    end_r, end_c = g.position(target)
+
+    visited = g.new_visited()
     visited_order = []
-    distances = {start_pos: 0}
-    parent = {}
-    
-    pq = [(0, start_pos)]
-    
-    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-    
-    while pq:
-        current_dist, current = heapq.heappop(pq)
-        
-        if current in visited:
-            continue
-            
-        visited.add(current)
-        visited_order.append(current[0] * cols + current[1])
-        
-        if current == end_pos:
-            break
-            
-        for dy, dx in directions:
-            ny, nx = current[0] + dy, current[1] + dx
-            
-            if 0 <= ny < rows and 0 <= nx < cols:
-                neighbor = (ny, nx)
-                neighbor_idx = ny * cols + nx
-                
-                if grid[ny, nx] == 1 or neighbor in visited:
+    limit = FIRST_CHUNK
+    distances = g.new_distance()
+    distances[source] = 0
+    parent = g.new_parent()
+
+    # A step raises the priority by at most its cost plus scale, so that many buckets never wrap onto a live one
+    size = max(cost) + scale + 1
+    buckets = [[] for _ in range(size)]
+    r, c = divmod(source, width)
+    priority = scale * (abs(r - end_r) + abs(c - end_c))
+    buckets[priority % size].append(source)
+    pending = 1
+    found = False
+
+    while pending and not found:
+        slot = priority % size
+        # Cells can land back in the bucket being drained when the heuristic drops by exactly their cost
+        while buckets[slot] and not found:
+            bucket, buckets[slot] = buckets[slot], []
+            pending -= len(bucket)
+            for current in bucket:
+                if visited[current]:
                     continue
-                    
-                new_dist = current_dist + 1
-                
-                if neighbor not in distances or new_dist < distances[neighbor]:
-                    distances[neighbor] = new_dist
-                    parent[neighbor] = current
-                    heapq.heappush(pq, (new_dist, neighbor))
-    
-    # Reconstruct path
+
+                visited[current] = 1
+                visited_order.append(current)
+                if len(visited_order) >= limit:
+                    room = yield g.indexes(visited_order)
+                    visited_order, limit = [], next_chunk(limit, room)
+
+                if current == target:
+                    found = True
+                    break
+
+                dist = distances[current]
+                for off in offsets:
+                    neighbor = current + off
+                    step = cost[neighbor]
+
+                    if not step or visited[neighbor]:
+                        continue
+
+                    new_dist = dist + step
+                    if new_dist < distances[neighbor]:
+                        distances[neighbor] = new_dist
+                        parent[neighbor] = current
+                        if scale:
+                            r, c = divmod(neighbor, width)
+                            buckets[(new_dist + scale * (abs(r - end_r) + abs(c - end_c))) % size].append(neighbor)
+                        else:
+                            buckets[new_dist % size].append(neighbor)
+                        pending += 1
+        priority += 1
+
+    if visited_order:
+        yield g.indexes(visited_order)
+
     path = []
-    if end_pos in parent or end_pos == start_pos:
-        current = end_pos
-        while current != start_pos:
-            path.append(current[0] * cols + current[1])
-            if current not in parent:
-                break
-            current = parent[current]
-        path.append(start)
-        path.reverse()
-    
-    return visited_order, path
\ No newline at end of file
+    if parent[target] != -1 or target == source:
+        path = g.trace(parent, source, target)
+
+    return path
+
+def dijkstra_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+                   weights: Optional[np.ndarray] = None) -> Steps:
+    """
+    Dijkstra's algorithm implementation, on a bucket queue
+    Yields: chunks of visited_order
+    Returns: path_indexes
+    """
+    g = GridGraph(grid, rows, cols, weights)
+    return (yield from dial_steps(g, g.node(start), g.node(end)))
+
+def dijkstra_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+                  weights: Optional[np.ndarray] = None,
+                  budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    Dijkstra's algorithm implementation
+    Returns: (visited_order, path_indexes)
+    """
+    return collect(dijkstra_steps(grid, start, end, rows, cols, weights), budget)
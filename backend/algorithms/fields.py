@@ -0,0 +1,92 @@
+from typing import Optional, Sequence
+import numpy as np
+
+from .grid import DIRECTIONS, Budget, GridGraph, distance_field
+
+# Flow field entry for cells with nowhere to go: walls, sources and unreachable cells
+NO_FLOW = 255
+
+def weighted_distance_field(g: GridGraph, sources: Sequence[int], budget: Optional[Budget] = None) -> np.ndarray:
+    """
+    Cheapest cost from the nearest source to every cell, by Dial's
+    algorithm over g.cost, where a path pays for every cell it steps onto.
+    budget is checked between buckets, and stops the field like
+    distance_field's.
+    Returns: int32 array over node ids, -1 where unreachable or not reached
+    """
+    cost = g.cost
+    offsets = g.offsets
+    distances = g.new_distance()
+    visited = g.new_visited()
+
+    size = max(cost) + 1
+    buckets = [[] for _ in range(size)]
+    for n in sources:
+        if g.passable[n]:
+            distances[n] = 0
+            buckets[0].append(n)
+    pending = len(buckets[0])
+
+    dist = 0
+    reached = 0
+    while pending:
+        if budget is not None and budget.exhausted(reached):
+            break
+        bucket, buckets[dist % size] = buckets[dist % size], []
+        pending -= len(bucket)
+        for current in bucket:
+            if visited[current]:
+                continue
+            visited[current] = 1
+            reached += 1
+            for off in offsets:
+                neighbor = current + off
+                step = cost[neighbor]
+                if not step or visited[neighbor]:
+                    continue
+                new_dist = dist + step
+                if new_dist < distances[neighbor]:
+                    distances[neighbor] = new_dist
+                    buckets[new_dist % size].append(neighbor)
+                    pending += 1
+        dist += 1
+
+    field = np.frombuffer(distances, dtype=np.int32).copy()
+    field[~np.frombuffer(visited, dtype=np.bool_)] = -1
+    return field
+
+def distance_transform(grid: np.ndarray, rows: int, cols: int, sources: Sequence[int],
+                       weights: Optional[np.ndarray] = None, budget: Optional[Budget] = None) -> np.ndarray:
+    """
+    Distance from every cell to the nearest source: BFS steps on unit
+    grids, path cost on weighted ones. Wall sources are ignored. If budget
+    runs out, the cells not yet reached are left at -1.
+    Returns: rows x cols int32 array, -1 where no source is reachable
+    """
+    g = GridGraph(grid, rows, cols, weights)
+    nodes = [g.node(s) for s in sources]
+    if weights is None:
+        field = distance_field(g, nodes, budget)
+    else:
+        field = weighted_distance_field(g, nodes, budget)
+    return field.reshape(rows + 2, cols + 2)[1:-1, 1:-1].copy()
+
+def flow_field(distances: np.ndarray) -> np.ndarray:
+    """
+    Direction each cell should step in to head for the nearest source: the
+    neighbor with the smallest distance, which is the cell's parent in a
+    shortest path tree. Following it from any cell walks a shortest path.
+    Returns: rows x cols uint8 array of indexes into DIRECTIONS, NO_FLOW
+             where there is no move to make
+    """
+    rows, cols = distances.shape
+    unreachable = np.iinfo(np.int32).max
+    padded = np.full((rows + 2, cols + 2), unreachable, dtype=np.int32)
+    padded[1:-1, 1:-1] = np.where(distances >= 0, distances, unreachable)
+
+    neighbors = np.stack([padded[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc] for dr, dc in DIRECTIONS])
+    # Ties go to the first direction in DIRECTIONS order
+    flow = np.argmin(neighbors, axis=0).astype(np.uint8)
+    stuck = (distances <= 0) | (np.min(neighbors, axis=0) == unreachable)
+    flow[stuck] = NO_FLOW
+    return flow
@@ -1,61 +1,72 @@
 import heapq
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import numpy as np
 
+from .grid import Budget, GridGraph, Steps, collect, next_chunk, FIRST_CHUNK
+
 def heuristic(pos1: Tuple[int, int], pos2: Tuple[int, int]) -> int:
     """Manhattan distance heuristic"""
     return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
-def greedy_bfs_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Tuple[List[int], List[int]]:
+def greedy_bfs_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int) -> Steps:
     """
     Greedy Best-First Search implementation
-    Returns: (visited_order, path_indexes)
+    Yields: chunks of visited_order
+    Returns: path_indexes
     """
-    start_pos = (start // cols, start % cols)
-    end_pos = (end // cols, end % cols)
+    g = GridGraph(grid, rows, cols)
+    passable = g.passable
+    offsets = g.offsets
+    width = g.width
+    source = g.node(start)
+    target = g.node(end)
+    end_r, end_c = g.position(target)
     
-    visited = set()
+    visited = g.new_visited()
     visited_order = []
-    parent = {}
+    limit = FIRST_CHUNK
+    parent = g.new_parent()
     
-    pq = [(heuristic(start_pos, end_pos), start_pos)]
-    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    pq = [(heuristic(g.position(source), (end_r, end_c)), source)]
     
     while pq:
         _, current = heapq.heappop(pq)
         
-        if current in visited:
+        if visited[current]:
             continue
             
-        visited.add(current)
-        visited_order.append(current[0] * cols + current[1])
+        visited[current] = 1
+        visited_order.append(current)
+        if len(visited_order) >= limit:
+            room = yield g.indexes(visited_order)
+            visited_order, limit = [], next_chunk(limit, room)
         
-        if current == end_pos:
+        if current == target:
             break
             
-        for dy, dx in directions:
-            ny, nx = current[0] + dy, current[1] + dx
+        for off in offsets:
+            neighbor = current + off
             
-            if 0 <= ny < rows and 0 <= nx < cols:
-                neighbor = (ny, nx)
+            if not passable[neighbor] or visited[neighbor]:
+                continue
                 
-                if grid[ny, nx] == 1 or neighbor in visited:
-                    continue
-                    
-                parent[neighbor] = current
-                h = heuristic(neighbor, end_pos)
-                heapq.heappush(pq, (h, neighbor))
+            parent[neighbor] = current
+            r, c = divmod(neighbor, width)
+            heapq.heappush(pq, (abs(r - end_r) + abs(c - end_c), neighbor))
+    
+    if visited_order:
+        yield g.indexes(visited_order)
     
-    # Reconstruct path
     path = []
-    if end_pos in parent or end_pos == start_pos:
-        current = end_pos
-        while current != start_pos:
-            path.append(current[0] * cols + current[1])
-            if current not in parent:
-                break
-            current = parent[current]
-        path.append(start)
-        path.reverse()
+    if parent[target] != -1 or target == source:
+        path = g.trace(parent, source, target)
     
-    return visited_order, path
\ No newline at end of file
+    return path
+
+def greedy_bfs_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+                    budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    Greedy Best-First Search implementation
+    Returns: (visited_order, path_indexes)
+    """
+    return collect(greedy_bfs_steps(grid, start, end, rows, cols), budget)
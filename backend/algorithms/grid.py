@@ -0,0 +1,359 @@
+import hashlib
+import time
+from array import array
+from typing import Generator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+# Same neighbor order every solver has always used: right, down, left, up
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+INF = 2**31 - 1
+
+# Cell weights are the cost of stepping onto a cell
+MAX_WEIGHT = 255
+
+# Frontiers smaller than this are expanded with a plain Python loop; numpy
+# call overhead only pays off once a level has a few hundred cells in it
+VECTOR_THRESHOLD = 256
+
+# Solvers hand out visited cells in chunks that start small, so the first
+# cells reach a streaming client quickly, and double up to a cap so long
+# searches don't pay per-chunk overhead
+FIRST_CHUNK = 64
+MAX_CHUNK = 8192
+
+# Iterations between budget checks in loops that don't hand out chunks
+CHECK_EVERY = 64
+
+# What every *_steps solver returns: yields visited_order chunks, returns path_indexes.
+# A consumer may send back the most cells it wants in the next chunk.
+Steps = Generator[List[int], Optional[int], List[int]]
+
+
+class GridGraph:
+    """
+    Flat view of a grid shared by all solvers.
+
+    Cells are addressed by integer node ids into a copy of the grid padded
+    with a one-cell wall border, so neighbors are plain offsets and never
+    need a bounds check. Node ids keep the row-major order of (row, col),
+    which keeps heap tie-breaking identical to tuple-keyed searches.
+
+    With weights, cost holds the price of stepping onto each cell; without,
+    it is None and every step costs 1.
+    """
+
+    def __init__(self, grid: np.ndarray, rows: int, cols: int, weights: Optional[np.ndarray] = None):
+        self.rows = rows
+        self.cols = cols
+        self.width = cols + 2
+        self.size = (rows + 2) * self.width
+
+        padded = np.zeros((rows + 2, self.width), dtype=np.uint8)
+        padded[1:-1, 1:-1] = np.asarray(grid).reshape(rows, cols) != 1
+        self.passable = bytearray(padded.tobytes())
+        self.passable_np = np.frombuffer(self.passable, dtype=np.bool_)
+
+        self.cost: Optional[bytearray] = None
+        if weights is not None:
+            costs = np.zeros((rows + 2, self.width), dtype=np.uint8)
+            costs[1:-1, 1:-1] = np.asarray(weights).reshape(rows, cols)
+            costs *= padded
+            self.cost = bytearray(costs.tobytes())
+
+        w = self.width
+        self.offsets = tuple(dy * w + dx for dy, dx in DIRECTIONS)
+        self.offsets_np = np.array(self.offsets, dtype=np.int64)
+
+    def node(self, idx: int) -> int:
+        """Grid index -> node id"""
+        r, c = divmod(idx, self.cols)
+        return (r + 1) * self.width + c + 1
+
+    def index(self, node: int) -> int:
+        """Node id -> grid index"""
+        r, c = divmod(node, self.width)
+        return (r - 1) * self.cols + c - 1
+
+    def indexes(self, nodes: Sequence[int]) -> List[int]:
+        """Convert a sequence of node ids to grid indexes in one pass"""
+        if len(nodes) == 0:
+            return []
+        a = np.asarray(nodes, dtype=np.int64)
+        r = a // self.width
+        return ((r - 1) * self.cols + (a - r * self.width) - 1).tolist()
+
+    def position(self, node: int):
+        """Node id -> (row, col) in padded coordinates"""
+        return divmod(node, self.width)
+
+    def new_visited(self) -> bytearray:
+        return bytearray(self.size)
+
+    def new_parent(self) -> array:
+        return array('i', [-1]) * self.size
+
+    def new_distance(self) -> array:
+        return array('i', [INF]) * self.size
+
+    def trace(self, parent: array, source: int, target: int) -> List[int]:
+        """
+        Follow parent pointers from target back to source
+        Returns: grid indexes from source to target
+        """
+        nodes = []
+        current = target
+        while current != source and current != -1:
+            nodes.append(current)
+            current = parent[current]
+        nodes.append(source)
+        nodes.reverse()
+        return self.indexes(nodes)
+
+
+def check_weights(weights: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """
+    Validate per-cell weights against a grid's shape
+    Returns: weights as a rows x cols uint8 array; raises ValueError if invalid
+    """
+    weights = np.asarray(weights)
+    if weights.size != rows * cols:
+        raise ValueError(f"expected {rows * cols} weights, got {weights.size}")
+    if weights.size and (weights.min() < 1 or weights.max() > MAX_WEIGHT):
+        raise ValueError(f"weights must be between 1 and {MAX_WEIGHT}")
+    return weights.astype(np.uint8).reshape(rows, cols)
+
+
+def grid_hash(grid: np.ndarray, rows: int, cols: int) -> str:
+    """Key for per-grid caches: the shape and the wall layout"""
+    h = hashlib.blake2b(f"{rows}x{cols}:".encode(), digest_size=16)
+    h.update(np.packbits(np.asarray(grid).reshape(-1) == 1).tobytes())
+    return h.hexdigest()
+
+
+def next_chunk(limit: int, room: Optional[int] = None) -> int:
+    """
+    Size of a solver's next chunk: twice the last, up to MAX_CHUNK, and
+    no more than room, what its consumer sent back when it has a budget
+    Returns: the new limit
+    """
+    limit = min(limit * 2, MAX_CHUNK)
+    return limit if room is None else min(limit, room)
+
+
+class BudgetExhausted(Exception):
+    """Raised by preprocessing that ran out of its search's budget, whose reason says why"""
+
+class Budget:
+    """
+    Limits on one search: at most max_nodes expansions, nothing past
+    deadline (a time.monotonic() value, which every process on the host
+    shares), and nothing once cancel, anything with an is_set(), is set.
+    Solvers are checked each time they hand out a chunk of visited cells,
+    and bounded() keeps their chunks no larger than the nodes left, so a
+    search stops within a chunk (or a BFS level) of max_nodes; preprocessing
+    that expands no cells checks just the clock and cancel.
+    reason records the first limit that stopped the search, if any did.
+    """
+
+    def __init__(self, max_nodes: Optional[int] = None, deadline: Optional[float] = None, cancel=None):
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.cancel = cancel
+        self.reason: Optional[str] = None
+
+    def expired(self) -> bool:
+        """Whether the search was cancelled or is past its deadline"""
+        if self.reason is None:
+            if self.cancel is not None and self.cancel.is_set():
+                self.reason = "cancelled"
+            elif self.deadline is not None and time.monotonic() >= self.deadline:
+                self.reason = "deadline"
+        return self.reason is not None
+
+    def exhausted(self, expanded: int) -> bool:
+        # A search that overran the clock too reports the clock, which stopped it first
+        if not self.expired() and self.max_nodes is not None and expanded > self.max_nodes:
+            self.reason = "nodes"
+        return self.reason is not None
+
+    def check(self):
+        """Raise BudgetExhausted if expired"""
+        if self.expired():
+            raise BudgetExhausted(self.reason)
+
+    @property
+    def truncated(self) -> bool:
+        return self.reason is not None
+
+def bounded(steps: Steps, budget: Budget) -> Steps:
+    """
+    Run a *_steps solver within budget. Each chunk is asked for no more
+    cells than max_nodes leaves room for, by sending the room back into
+    the solver. Once the budget runs out, the search is closed and returns
+    no path, having yielded at most max_nodes cells; a search that
+    finishes within the budget is passed through unchanged.
+    Yields: chunks of visited_order
+    Returns: path_indexes, or [] if the budget ran out
+    """
+    expanded = 0
+    try:
+        if budget.exhausted(expanded):
+            return []
+        room = None
+        while True:
+            try:
+                chunk = steps.send(room)
+            except StopIteration as done:
+                return done.value
+            expanded += len(chunk)
+            if budget.exhausted(expanded):
+                if budget.max_nodes is not None and expanded > budget.max_nodes:
+                    chunk = chunk[:len(chunk) - (expanded - budget.max_nodes)]
+                if len(chunk):
+                    yield chunk
+                return []
+            yield chunk
+            if budget.max_nodes is not None:
+                # One cell past max_nodes is enough to tell the budget is spent
+                room = budget.max_nodes - expanded + 1
+    finally:
+        steps.close()
+
+def collect(steps: Steps, budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    Run a *_steps solver to completion, or until budget runs out
+    Returns: (visited_order, path_indexes)
+    """
+    if budget is not None:
+        steps = bounded(steps, budget)
+    visited_order = []
+    while True:
+        try:
+            visited_order.extend(next(steps))
+        except StopIteration as done:
+            return visited_order, done.value
+
+
+class Wavefront:
+    """
+    One level-synchronous BFS over a GridGraph.
+
+    Each call to step() expands the whole frontier at once. Large frontiers
+    are expanded with array operations: shift every frontier cell by every
+    offset, mask by walls and by visited, then keep the first occurrence of
+    each cell so the next frontier comes out in exactly the order a
+    queue-based BFS would discover it. Parents follow from the shift.
+    """
+
+    def __init__(self, g: GridGraph, source: int):
+        self.g = g
+        self.visited = g.new_visited()
+        self.parent = g.new_parent()
+        self.visited_np = np.frombuffer(self.visited, dtype=np.bool_)
+        self.parent_np = np.frombuffer(self.parent, dtype=np.int32)
+        self.visited[source] = 1
+        self.frontier = [source]
+
+    def step(self, stop: bytearray, stop_on_discovery: bool = False):
+        """
+        Expand the current frontier by one level, halting at the first cell
+        marked in stop (checked when a cell is dequeued, and optionally when
+        it is discovered)
+        Returns: (newly discovered nodes, stopping node or -1)
+        """
+        if len(self.frontier) < VECTOR_THRESHOLD:
+            return self._step_scalar(stop, stop_on_discovery)
+        return self._step_vector(stop, stop_on_discovery)
+
+    def _step_scalar(self, stop, stop_on_discovery):
+        passable = self.g.passable
+        offsets = self.g.offsets
+        visited = self.visited
+        parent = self.parent
+        
+        discovered = []
+        meeting = -1
+        for current in self.frontier:
+            if stop[current]:
+                meeting = current
+                break
+            for off in offsets:
+                neighbor = current + off
+                if passable[neighbor] and not visited[neighbor]:
+                    visited[neighbor] = 1
+                    parent[neighbor] = current
+                    discovered.append(neighbor)
+                    if stop_on_discovery and stop[neighbor]:
+                        meeting = neighbor
+                        break
+            if meeting != -1:
+                break
+        
+        self.frontier = discovered
+        return discovered, meeting
+
+    def _step_vector(self, stop, stop_on_discovery):
+        g = self.g
+        frontier = np.asarray(self.frontier, dtype=np.int64)
+        stop_np = np.frombuffer(stop, dtype=np.bool_)
+        
+        # Row i holds the four shifted copies of frontier[i], in direction order
+        candidates = (frontier[:, None] + g.offsets_np[None, :]).ravel()
+        slots = np.flatnonzero(g.passable_np[candidates] & ~self.visited_np[candidates])
+        _, first = np.unique(candidates[slots], return_index=True)
+        slots = slots[np.sort(first)]
+        discovered = candidates[slots]
+        owner = slots // len(g.offsets)
+        
+        # Find the first stopping event in queue order
+        keep = len(discovered)
+        meeting = -1
+        popped = np.flatnonzero(stop_np[frontier])
+        found = np.flatnonzero(stop_np[discovered]) if stop_on_discovery else popped[:0]
+        if len(popped) and (not len(found) or popped[0] <= owner[found[0]]):
+            meeting = int(frontier[popped[0]])
+            keep = int(np.searchsorted(owner, popped[0]))
+        elif len(found):
+            meeting = int(discovered[found[0]])
+            keep = int(found[0]) + 1
+        
+        discovered = discovered[:keep]
+        self.visited_np[discovered] = True
+        self.parent_np[discovered] = frontier[owner[:keep]]
+        
+        self.frontier = discovered
+        return discovered, meeting
+
+
+def distance_field(g: GridGraph, sources: Union[int, Sequence[int]], budget: Optional[Budget] = None) -> np.ndarray:
+    """
+    Exact BFS distance from the nearest source to every cell, one
+    Wavefront level at a time, checking budget between levels. Once it
+    runs out, by the clock, cancel or more than max_nodes cells reached,
+    the field stops at the last level finished and budget.reason says why.
+    Returns: int32 array over node ids, -1 where unreachable or not reached
+    """
+    distance = np.full(g.size, -1, dtype=np.int32)
+    if isinstance(sources, int):
+        sources = [sources]
+    nodes = list(dict.fromkeys(n for n in sources if g.passable[n]))
+    if not nodes:
+        return distance
+    distance[nodes] = 0
+    wave = Wavefront(g, nodes[0])
+    for n in nodes[1:]:
+        wave.visited[n] = 1
+    wave.frontier = nodes
+    never = bytearray(g.size)
+    depth = 0
+    reached = len(nodes)
+    while len(wave.frontier):
+        if budget is not None and budget.exhausted(reached):
+            break
+        discovered, _ = wave.step(never)
+        depth += 1
+        reached += len(discovered)
+        if len(discovered):
+            distance[np.asarray(discovered, dtype=np.int64)] = depth
+    return distance
@@ -0,0 +1,400 @@
+import copy
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .grid import Budget, BudgetExhausted, Steps, collect, grid_hash, CHECK_EVERY
+
+# Cells per cluster side
+CLUSTER = 16
+
+# Border runs at least this long get an entrance at each end instead of one in the middle
+LONG_ENTRANCE = 6
+
+# Entrances whose in-cluster distances are computed in one batched BFS
+BFS_BATCH = 4096
+
+# Entrance pairs linked between budget checks
+LINK_BATCH = 4096
+
+# Abstractions kept per process; a miss reuses the newest one of the same size
+CACHE_SIZE = 8
+
+class Abstraction:
+    """
+    HPA* abstract graph of a grid.
+
+    The grid is cut into CLUSTER x CLUSTER clusters. Wherever two clusters
+    share a run of open cells along their border, the run gets one or two
+    entrances: a cell on each side, joined by an edge of cost 1. Inside
+    each cluster every pair of entrances is joined by its exact in-cluster
+    distance. A query searches this small graph and then refines only the
+    clusters on the chosen route, so paths are near-optimal rather than
+    guaranteed shortest.
+
+    Abstract nodes are ids into the grid padded with walls to a whole
+    number of clusters: row * width + col.
+
+    Building and updating check a budget between BFS levels and raise
+    BudgetExhausted when it runs out.
+    """
+
+    def __init__(self, grid: np.ndarray, rows: int, cols: int, cluster: int = CLUSTER,
+                 budget: Optional[Budget] = None):
+        if not 1 <= cluster <= 63:
+            raise ValueError("cluster size must be between 1 and 63")
+        self.rows = rows
+        self.cols = cols
+        self.cluster = cluster
+        self.crows = -(-rows // cluster)
+        self.ccols = -(-cols // cluster)
+        self.height = self.crows * cluster
+        self.width = self.ccols * cluster
+
+        self.passable = np.zeros((self.height, self.width), dtype=bool)
+        self.passable[:rows, :cols] = np.asarray(grid).reshape(rows, cols) != 1
+
+        self.entrances: List[Tuple[int, ...]] = []
+        self.inter: Dict[int, List[int]] = {}
+        self.intra: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in range(self.crows * self.ccols)]
+        self._link(budget)
+        self._connect(range(len(self.intra)), budget)
+
+    def cluster_of(self, node: int) -> int:
+        r, c = divmod(node, self.width)
+        return (r // self.cluster) * self.ccols + c // self.cluster
+
+    def clusters_of(self, nodes: np.ndarray) -> np.ndarray:
+        r, c = np.divmod(nodes, self.width)
+        return (r // self.cluster) * self.ccols + c // self.cluster
+
+    def _runs(self, segments: np.ndarray) -> np.ndarray:
+        """
+        Entrance offsets in every border segment (one per row of segments)
+        Returns: flat positions into segments
+        """
+        n = segments.shape[-1]
+        flat = segments.reshape(-1, n)
+        before = np.zeros_like(flat)
+        before[:, 1:] = flat[:, :-1]
+        after = np.zeros_like(flat)
+        after[:, :-1] = flat[:, 1:]
+        starts = np.flatnonzero(flat & ~before)
+        ends = np.flatnonzero(flat & ~after)
+        long_run = ends - starts + 1 >= LONG_ENTRANCE
+        return np.concatenate([np.where(long_run, starts, (starts + ends) // 2), ends[long_run]])
+
+    def _link(self, budget: Optional[Budget] = None):
+        """Find every entrance pair and rebuild entrances and inter edges"""
+        p, k, w = self.passable, self.cluster, self.width
+        pairs = []
+
+        # Borders between horizontally adjacent clusters, cut into one segment per cluster row
+        if self.ccols > 1:
+            across = p[:, k - 1:w - 1:k] & p[:, k:w:k]
+            borders = across.shape[1]
+            pos = self._runs(across.reshape(self.crows, k, borders).transpose(0, 2, 1))
+            segment, offset = np.divmod(pos, k)
+            cr, b = np.divmod(segment, borders)
+            left = (cr * k + offset) * w + b * k + k - 1
+            pairs.append((left, left + 1))
+
+        # Borders between vertically adjacent clusters, one segment per cluster column
+        if self.crows > 1:
+            across = p[k - 1:self.height - 1:k, :] & p[k:self.height:k, :]
+            pos = self._runs(across.reshape(-1, self.ccols, k))
+            segment, offset = np.divmod(pos, k)
+            b, cc = np.divmod(segment, self.ccols)
+            top = (b * k + k - 1) * w + cc * k + offset
+            pairs.append((top, top + w))
+
+        inter: Dict[int, List[int]] = {}
+        members: List[set] = [set() for _ in range(self.crows * self.ccols)]
+        for a_nodes, b_nodes in pairs:
+            for i, (a, b, ca, cb) in enumerate(zip(a_nodes.tolist(), b_nodes.tolist(),
+                                                   self.clusters_of(a_nodes).tolist(),
+                                                   self.clusters_of(b_nodes).tolist())):
+                if budget is not None and i % LINK_BATCH == 0:
+                    budget.check()
+                inter.setdefault(a, []).append(b)
+                inter.setdefault(b, []).append(a)
+                members[ca].add(a)
+                members[cb].add(b)
+        self.inter = inter
+        self.entrances = [tuple(sorted(m)) for m in members]
+
+    def _connect(self, clusters: Sequence[int], budget: Optional[Budget] = None):
+        """Recompute in-cluster distances between the entrances of some clusters"""
+        k, w = self.cluster, self.width
+        clusters = np.asarray(clusters, dtype=np.int64)
+        for cid in clusters.tolist():
+            self.intra[cid] = {}
+
+        # Each cluster row as a bitmask, so one integer op moves a whole row of the wavefront
+        blocks = self.passable.reshape(self.crows, k, self.ccols, k).transpose(0, 2, 1, 3)
+        weights = np.left_shift(np.uint64(1), np.arange(k, dtype=np.uint64))
+        open_bits = (blocks.reshape(-1, k, k)[clusters] * weights).sum(axis=2, dtype=np.uint64)
+
+        # Entrances of the selected clusters, grouped by cluster
+        counts = np.array([len(self.entrances[cid]) for cid in clusters.tolist()], dtype=np.int64)
+        nodes = np.array([n for cid in clusters.tolist() for n in self.entrances[cid]], dtype=np.int64)
+        owner = np.repeat(np.arange(len(clusters)), counts)
+        first_of = np.cumsum(counts) - counts
+
+        for first in range(0, len(nodes), BFS_BATCH):
+            src = np.arange(first, min(first + BFS_BATCH, len(nodes)))
+            # Pair every source with every entrance of its own cluster
+            pair_counts = counts[owner[src]]
+            pair_src = np.repeat(np.arange(len(src)), pair_counts)
+            pair_tgt = np.repeat(first_of[owner[src]], pair_counts) + (
+                np.arange(pair_counts.sum()) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+            )
+            tgt_row = (nodes[pair_tgt] // w) % k
+            tgt_bit = ((nodes[pair_tgt] % w) % k).astype(np.uint64)
+            pair_dist = np.full(len(pair_src), -1, dtype=np.int64)
+
+            # One level-synchronous BFS per entrance, all advanced together
+            open_ = open_bits[owner[src]]
+            frontier = np.zeros_like(open_)
+            frontier[np.arange(len(src)), (nodes[src] // w) % k] = \
+                np.left_shift(np.uint64(1), ((nodes[src] % w) % k).astype(np.uint64))
+            reached = frontier.copy()
+            # Pairs still waiting for a distance, by row of the (shrinking) wavefront arrays
+            pending = np.arange(len(pair_src))
+            pending_row = pair_src
+            level = 0
+            while len(pending):
+                if budget is not None:
+                    budget.check()
+                level += 1
+                grown = (frontier << np.uint64(1)) | (frontier >> np.uint64(1))
+                grown[:, 1:] |= frontier[:, :-1]
+                grown[:, :-1] |= frontier[:, 1:]
+                grown &= open_ & ~reached
+                reached |= grown
+                hit = ((grown[pending_row, tgt_row[pending]] >> tgt_bit[pending]) & np.uint64(1)).astype(bool)
+                pair_dist[pending[hit]] = level
+                frontier = grown
+
+                # Every few levels, drop finished pairs and wavefronts with nothing left to find
+                if level % 8 == 0 or not hit.any():
+                    alive = frontier.any(axis=1)
+                    keep = ~hit & alive[pending_row]
+                    row = np.cumsum(alive) - 1
+                    pending, pending_row = pending[keep], row[pending_row[keep]]
+                    frontier, open_, reached = frontier[alive], open_[alive], reached[alive]
+
+            # Keep reachable pairs only, then hand each source its slice
+            keep = pair_dist > 0
+            bounds = np.cumsum(np.bincount(pair_src[keep], minlength=len(src))).tolist()
+            targets = nodes[pair_tgt[keep]].tolist()
+            dists = pair_dist[keep].tolist()
+            cids = clusters[owner[src]].tolist()
+            lo = 0
+            for cid, node, hi in zip(cids, nodes[src].tolist(), bounds):
+                self.intra[cid][node] = list(zip(targets[lo:hi], dists[lo:hi]))
+                lo = hi
+
+    def copy(self) -> "Abstraction":
+        """
+        A copy to update for another grid while this one stays as it is.
+        Updates replace what they change rather than editing it, so the
+        copy shares everything but the list of per-cluster edges.
+        """
+        clone = copy.copy(self)
+        clone.intra = list(self.intra)
+        return clone
+
+    def update(self, grid: np.ndarray, budget: Optional[Budget] = None) -> int:
+        """
+        Bring the abstraction up to date with an edited grid of the same size,
+        rebuilding only clusters that contain a changed cell or whose
+        entrances moved. An update cut short by budget leaves it half
+        updated, so it must not be used again.
+        Returns: number of clusters rebuilt; raises BudgetExhausted
+        """
+        passable = np.zeros_like(self.passable)
+        passable[:self.rows, :self.cols] = np.asarray(grid).reshape(self.rows, self.cols) != 1
+        r, c = np.nonzero(passable != self.passable)
+        if not len(r):
+            return 0
+        self.passable = passable
+
+        dirty = set(((r // self.cluster) * self.ccols + c // self.cluster).tolist())
+        old = self.entrances
+        self._link(budget)
+        dirty.update(cid for cid, (a, b) in enumerate(zip(old, self.entrances)) if a != b)
+        self._connect(sorted(dirty), budget)
+        return len(dirty)
+
+    def _local(self, source: int, target: int = -1) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        BFS confined to the source's cluster, stopping early at target if given
+        Returns: (distance per reached node, parent per reached node)
+        """
+        k, w = self.cluster, self.width
+        r0 = (source // w) // k * k
+        c0 = (source % w) // k * k
+        p = self.passable.reshape(-1)
+        dist = {source: 0}
+        parent = {source: -1}
+        queue = [source]
+        for current in queue:
+            if current == target:
+                break
+            r, c = divmod(current, w)
+            for neighbor, inside in (
+                (current + 1, c + 1 < c0 + k), (current + w, r + 1 < r0 + k),
+                (current - 1, c > c0), (current - w, r > r0),
+            ):
+                if inside and p[neighbor] and neighbor not in dist:
+                    dist[neighbor] = dist[current] + 1
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+        return dist, parent
+
+    def _refine(self, a: int, b: int) -> List[int]:
+        """Cells after a up to and including b, for two nodes in one cluster"""
+        _, parent = self._local(a, b)
+        cells = []
+        while b != a:
+            cells.append(b)
+            b = parent[b]
+        cells.reverse()
+        return cells
+
+    def index(self, node: int) -> int:
+        r, c = divmod(node, self.width)
+        return r * self.cols + c
+
+    def query(self, start: int, end: int, budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+        """
+        Route through the abstract graph, then refine it into cells,
+        checking budget every CHECK_EVERY expansions and between refined
+        clusters
+        Returns: (abstract nodes expanded, path_indexes, or [] if budget ran out)
+        """
+        w = self.width
+        s = (start // self.cols) * w + start % self.cols
+        t = (end // self.cols) * w + end % self.cols
+        p = self.passable.reshape(-1)
+        if not p[s] or not p[t]:
+            return [], []
+
+        from_start, _ = self._local(s)
+        to_end, _ = self._local(t)
+        start_edges = [(e, from_start[e]) for e in self.entrances[self.cluster_of(s)] if e in from_start]
+        end_edges = {e: to_end[e] for e in self.entrances[self.cluster_of(t)] if e in to_end}
+        direct = from_start.get(t)
+
+        t_r, t_c = divmod(t, w)
+        best = {s: 0}
+        parent = {s: -1}
+        expanded = []
+        closed = set()
+        # Ties go to the deeper node, which keeps open areas from expanding every equal-cost route
+        pq = [(0, 0, s)]
+        while pq:
+            _, _, current = heapq.heappop(pq)
+            if current in closed:
+                continue
+            if budget is not None and len(expanded) % CHECK_EVERY == 0 and budget.exhausted(len(expanded)):
+                return [self.index(n) for n in expanded], []
+            closed.add(current)
+            expanded.append(current)
+            if current == t:
+                break
+
+            edges = start_edges if current == s else self.intra[self.cluster_of(current)].get(current, [])
+            edges = edges + [(n, 1) for n in self.inter.get(current, ())]
+            if current in end_edges:
+                edges.append((t, end_edges[current]))
+            for neighbor, cost in edges:
+                tentative = best[current] + cost
+                if tentative < best.get(neighbor, tentative + 1):
+                    best[neighbor] = tentative
+                    parent[neighbor] = current
+                    r, c = divmod(neighbor, w)
+                    heapq.heappush(pq, (tentative + abs(r - t_r) + abs(c - t_c), -tentative, neighbor))
+
+        visited = [self.index(n) for n in expanded]
+        if budget is not None and budget.expired():
+            return visited, []
+        if direct is not None and direct <= best.get(t, direct):
+            return visited, [self.index(n) for n in [s] + self._refine(s, t)]
+        if t not in closed:
+            return visited, []
+
+        route = []
+        current = t
+        while current != -1:
+            route.append(current)
+            current = parent[current]
+        route.reverse()
+
+        cells = [s]
+        for a, b in zip(route, route[1:]):
+            if b in self.inter.get(a, ()):
+                cells.append(b)
+            else:
+                if budget is not None and budget.expired():
+                    return visited, []
+                cells.extend(self._refine(a, b))
+        return visited, [self.index(n) for n in cells]
+
+_cache: "OrderedDict[str, Abstraction]" = OrderedDict()
+# Queries read the same cached abstraction another thread may be updating
+_lock = threading.Lock()
+
+def abstraction_for(grid: np.ndarray, rows: int, cols: int, budget: Optional[Budget] = None) -> Abstraction:
+    """
+    Cached abstraction of a grid. On a miss, a copy of the newest cached
+    abstraction of the same size is updated, so rerunning after a few wall
+    edits rebuilds only the affected clusters, and the grid it came from
+    stays cached too. If budget runs out first, BudgetExhausted is raised
+    and the half-updated copy is thrown away. Call with _lock held.
+    """
+    key = grid_hash(grid, rows, cols)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    previous: Optional[str] = next(
+        (k for k in reversed(_cache) if (_cache[k].rows, _cache[k].cols) == (rows, cols)), None
+    )
+    if previous is not None:
+        abstraction = _cache[previous].copy()
+        abstraction.update(grid, budget)
+    else:
+        abstraction = Abstraction(grid, rows, cols, budget=budget)
+    _cache[key] = abstraction
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return abstraction
+
+def hpa_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+              budget: Optional[Budget] = None) -> Steps:
+    """
+    HPA* implementation. Building the abstraction and the query itself
+    check budget as they go.
+    Yields: abstract nodes expanded
+    Returns: path_indexes, or [] if budget ran out
+    """
+    try:
+        with _lock:
+            visited_order, path = abstraction_for(grid, rows, cols, budget).query(start, end, budget)
+    except BudgetExhausted:
+        return []
+    if visited_order:
+        yield visited_order
+    return path
+
+def hpa_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+             budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    HPA* implementation
+    Returns: (abstract nodes expanded, path_indexes)
+    """
+    return collect(hpa_steps(grid, start, end, rows, cols, budget=budget), budget)
@@ -0,0 +1,175 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from .grid import Budget, GridGraph, Steps, collect, next_chunk, FIRST_CHUNK
+
+def nearest_stop(stop: np.ndarray, forward: bool, axis: int) -> np.ndarray:
+    """
+    For every cell, the flat index of the first stop cell at or after it
+    (or at or before it, going backwards) along rows (axis 1) or columns (axis 0)
+    Returns: array of node ids shaped like stop
+    """
+    ids = np.arange(stop.size, dtype=np.int64).reshape(stop.shape)
+    if forward:
+        marked = np.where(stop, ids, np.iinfo(np.int64).max)
+        flipped = np.flip(marked, axis)
+        return np.flip(np.minimum.accumulate(flipped, axis=axis), axis)
+    marked = np.where(stop, ids, -1)
+    return np.maximum.accumulate(marked, axis=axis)
+
+def jump_tables(g: GridGraph, target: int) -> Dict[int, memoryview]:
+    """
+    Precompute where a jump from any cell in each direction ends.
+
+    A jump moving one way stops at a wall, at the target, or at a cell
+    with a forced neighbor: an open cell beside it whose counterpart one
+    step back is a wall. A vertical jump also stops wherever a horizontal
+    jump would find a jump point, which is what keeps 4-connected JPS
+    optimal. The scans are cumulative min/max over the padded grid, whose
+    wall border ends every run.
+    Returns: {offset: flat table, entry n = node the jump entering n stops at}
+    """
+    w = g.width
+    p = g.passable_np.reshape(-1, w)
+    is_target = np.zeros_like(p)
+    is_target.flat[target] = True
+
+    def shifted(dr: int, dc: int) -> np.ndarray:
+        """p[r + dr, c + dc] for every cell, walls off the edge"""
+        out = np.zeros_like(p)
+        rows, cols = p.shape
+        out[max(-dr, 0):rows - max(dr, 0), max(-dc, 0):cols - max(dc, 0)] = \
+            p[max(dr, 0):rows - max(-dr, 0), max(dc, 0):cols - max(-dc, 0)]
+        return out
+
+    up, down, left, right = shifted(-1, 0), shifted(1, 0), shifted(0, -1), shifted(0, 1)
+    base = ~p | is_target
+
+    right_stop = base | (up & ~shifted(-1, -1)) | (down & ~shifted(1, -1))
+    left_stop = base | (up & ~shifted(-1, 1)) | (down & ~shifted(1, 1))
+    next_right = nearest_stop(right_stop, True, 1).reshape(-1)
+    next_left = nearest_stop(left_stop, False, 1).reshape(-1)
+
+    # Jumping right from n starts at n + 1; a horizontal jump succeeds if it ends on an open cell
+    flat_p = p.reshape(-1)
+    ids = np.arange(p.size)
+    side_jump = np.zeros(p.size, dtype=bool)
+    side_jump[:-1] |= flat_p[next_right[ids[1:]]]
+    side_jump[1:] |= flat_p[next_left[ids[:-1]]]
+    side_jump = side_jump.reshape(p.shape)
+
+    down_stop = base | side_jump | (left & ~shifted(-1, -1)) | (right & ~shifted(-1, 1))
+    up_stop = base | side_jump | (left & ~shifted(1, -1)) | (right & ~shifted(1, 1))
+    next_down = nearest_stop(down_stop, True, 0).reshape(-1)
+    next_up = nearest_stop(up_stop, False, 0).reshape(-1)
+
+    # Memoryviews index to plain ints much faster than numpy scalars
+    return {d: memoryview(t) for d, t in ((1, next_right), (w, next_down), (-1, next_left), (-w, next_up))}
+
+def jps_steps(grid: np.ndarray, start: int, end: int, rows: int, cols: int, scanned: bool = False) -> Steps:
+    """
+    Jump Point Search implementation for 4-connected uniform-cost grids
+    Yields: chunks of visited_order (jump points expanded, or every cell
+            jumped over when scanned is set)
+    Returns: path_indexes
+    """
+    g = GridGraph(grid, rows, cols)
+    passable = g.passable
+    offsets = g.offsets
+    width = g.width
+    source = g.node(start)
+    target = g.node(end)
+    end_r, end_c = g.position(target)
+    if not passable[source] or not passable[target]:
+        return []
+    tables = jump_tables(g, target)
+
+    closed = g.new_visited()
+    visited_order = []
+    limit = FIRST_CHUNK
+    g_scores = g.new_distance()
+    g_scores[source] = 0
+    parent = g.new_parent()
+
+    pq = [(abs(source // width - end_r) + abs(source % width - end_c), source)]
+
+    while pq:
+        _, current = heapq.heappop(pq)
+
+        if closed[current]:
+            continue
+
+        closed[current] = 1
+        if not scanned:
+            visited_order.append(current)
+        if len(visited_order) >= limit:
+            room = yield g.indexes(visited_order)
+            visited_order, limit = [], next_chunk(limit, room)
+
+        if current == target:
+            break
+
+        # Pruned directions: straight on plus both turns, or all four from the start
+        came = parent[current]
+        if current == source:
+            directions = offsets
+        else:
+            step = 1 if abs(current - came) < width else width
+            d = step if current > came else -step
+            turn = width if step == 1 else 1
+            directions = (d, turn, -turn)
+
+        for d in directions:
+            if not passable[current + d]:
+                continue
+            jump = tables[d][current + d]
+            if not passable[jump] or closed[jump]:
+                continue
+            step = 1 if abs(d) == 1 else width
+            tentative_g = g_scores[current] + abs(jump - current) // step
+            if tentative_g < g_scores[jump]:
+                g_scores[jump] = tentative_g
+                parent[jump] = current
+                if scanned:
+                    visited_order.extend(range(current + d, jump + d, d))
+                r, c = divmod(jump, width)
+                f = tentative_g + abs(r - end_r) + abs(c - end_c)
+                heapq.heappush(pq, (f, jump))
+
+    if visited_order:
+        yield g.indexes(visited_order)
+
+    if not closed[target]:
+        return []
+
+    # Fill in the straight runs between consecutive jump points
+    points = []
+    current = target
+    while current != source:
+        points.append(current)
+        current = parent[current]
+    points.append(source)
+    points.reverse()
+    nodes = [source]
+    for a, b in zip(points, points[1:]):
+        d = 1 if abs(b - a) < width else width
+        d = d if b > a else -d
+        nodes.extend(range(a + d, b + d, d))
+    return g.indexes(nodes)
+
+def jps_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+             budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    Jump Point Search implementation
+    Returns: (jump points expanded, path_indexes)
+    """
+    return collect(jps_steps(grid, start, end, rows, cols), budget)
+
+def jps_scanned_grid(grid: np.ndarray, start: int, end: int, rows: int, cols: int,
+                     budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+    """
+    Jump Point Search implementation
+    Returns: (every cell jumped over, path_indexes)
+    """
+    return collect(jps_steps(grid, start, end, rows, cols, scanned=True), budget)
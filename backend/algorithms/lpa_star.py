@@ -0,0 +1,185 @@
+import heapq
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+from .grid import Budget, GridGraph, Wavefront, CHECK_EVERY, INF
+
+class LPAStar:
+    """
+    Lifelong Planning A* between a fixed start and end.
+
+    Keeps every cell's distance estimate (dist) and one-step lookahead
+    (rhs) between calls, so after some cells change only the cells whose
+    distance actually changed are expanded again, instead of searching the
+    whole grid from scratch.
+
+    The first plan is a full vectorized BFS flood rather than an LPA*
+    search: it leaves every reachable cell consistent with its exact
+    distance, at a fraction of the cost of expanding them one by one.
+
+    A plan cut short by its budget leaves the search consistent, so the
+    next plan() carries on where it stopped.
+    """
+
+    def __init__(self, grid: np.ndarray, start: int, end: int, rows: int, cols: int):
+        self.g = GridGraph(grid, rows, cols)
+        self.source = self.g.node(start)
+        self.target = self.g.node(end)
+        self.end_r, self.end_c = self.g.position(self.target)
+
+        self.dist = self.g.new_distance()
+        self.rhs = self.g.new_distance()
+        self.queue = []
+        self.flooded = False
+
+    def walls(self) -> np.ndarray:
+        """The grid as it stands after every edit, 1 on walls"""
+        padded = self.g.passable_np.reshape(self.g.rows + 2, self.g.width)
+        return (~padded[1:-1, 1:-1]).astype(np.int32)
+
+    def flood(self, budget: Optional[Budget] = None) -> List[int]:
+        """
+        Set dist and rhs to the exact BFS distance of every cell reachable
+        from the start. If budget runs out first, the cells just past the
+        last level reached are queued instead, for plan() to carry on from.
+        Returns: nodes in the order they were reached
+        """
+        dist = np.frombuffer(self.dist, dtype=np.int32)
+        dist[self.source] = 0
+        wave = Wavefront(self.g, self.source)
+        never = self.g.new_visited()
+        levels = [np.array([self.source])]
+        reached = 1
+        while len(wave.frontier):
+            if budget is not None and budget.exhausted(reached):
+                break
+            discovered, _ = wave.step(never)
+            dist[discovered] = len(levels)
+            levels.append(np.asarray(discovered))
+            reached += len(discovered)
+        self.rhs[:] = self.dist
+        self.flooded = True
+
+        passable = self.g.passable
+        for node in map(int, wave.frontier):
+            for off in self.g.offsets:
+                if passable[node + off] and self.dist[node + off] == INF:
+                    self.update(node + off)
+        return np.concatenate(levels).tolist()
+
+    def key(self, node: int) -> Tuple[int, int]:
+        m = min(self.dist[node], self.rhs[node])
+        r, c = divmod(node, self.g.width)
+        return m + abs(r - self.end_r) + abs(c - self.end_c), m
+
+    def update(self, node: int):
+        """Recompute a cell's rhs from its neighbors and queue it if inconsistent"""
+        dist = self.dist
+        passable = self.g.passable
+        if node != self.source:
+            best = INF
+            if passable[node]:
+                for off in self.g.offsets:
+                    neighbor = node + off
+                    if passable[neighbor] and dist[neighbor] < best:
+                        best = dist[neighbor]
+                if best < INF:
+                    best += 1
+            self.rhs[node] = best
+        if dist[node] != self.rhs[node]:
+            heapq.heappush(self.queue, self.key(node) + (node,))
+
+    def set_cells(self, walls: Iterable[int], cleared: Iterable[int]):
+        """
+        Add walls at some grid indexes and clear others. Only marks the
+        affected cells for repair; plan() does the work. Every edit is
+        checked before any is applied, so a rejected batch changes nothing.
+        """
+        g = self.g
+        edits = [(0, idx) for idx in walls] + [(1, idx) for idx in cleared]
+        for value, idx in edits:
+            if not 0 <= idx < g.rows * g.cols:
+                raise ValueError(f"Cell {idx} is outside the grid")
+            if value == 0 and g.node(idx) in (self.source, self.target):
+                raise ValueError("Start and end cannot be walls")
+
+        changed = []
+        for value, idx in edits:
+            node = g.node(idx)
+            if g.passable[node] != value:
+                g.passable[node] = value
+                changed.append(node)
+
+        # Before the first plan there is nothing to repair; the flood will see the edits
+        if not self.flooded:
+            return
+        for node in changed:
+            self.update(node)
+            for off in g.offsets:
+                if g.passable[node + off]:
+                    self.update(node + off)
+
+    def plan(self, budget: Optional[Budget] = None) -> Tuple[List[int], List[int]]:
+        """
+        Bring the search up to date with the current grid, or as far as
+        budget allows, checked every CHECK_EVERY expansions
+        Returns: (cells expanded by this call, path_indexes, or [] if the budget ran out)
+        """
+        dist = self.dist
+        rhs = self.rhs
+        passable = self.g.passable
+        offsets = self.g.offsets
+        target = self.target
+        queue = self.queue
+        expanded = [] if self.flooded else self.flood(budget)
+        if budget is not None and budget.truncated:
+            return self.g.indexes(expanded), []
+
+        while queue:
+            k1, k2, node = queue[0]
+            if (k1, k2) >= self.key(target) and rhs[target] == dist[target]:
+                break
+            if budget is not None and len(expanded) % CHECK_EVERY == 0 and budget.exhausted(len(expanded)):
+                return self.g.indexes(expanded), []
+            heapq.heappop(queue)
+            # Entries are never removed when a key changes, so skip outdated ones
+            if dist[node] == rhs[node] or (k1, k2) != self.key(node):
+                continue
+
+            expanded.append(node)
+            if dist[node] > rhs[node]:
+                dist[node] = rhs[node]
+            else:
+                dist[node] = INF
+                self.update(node)
+            for off in offsets:
+                if passable[node + off]:
+                    self.update(node + off)
+
+        return self.g.indexes(expanded), self.path(budget)
+
+    def path(self, budget: Optional[Budget] = None) -> List[int]:
+        """
+        Walk from the end back to the start along decreasing distances,
+        checking budget every CHECK_EVERY steps
+        Returns: path_indexes, or [] when the end is unreachable or the budget ran out
+        """
+        dist = self.dist
+        if dist[self.target] >= INF:
+            return []
+        nodes = [self.target]
+        current = self.target
+        while current != self.source:
+            if budget is not None and len(nodes) % CHECK_EVERY == 0 and budget.expired():
+                return []
+            following = min(
+                (current + off for off in self.g.offsets if self.g.passable[current + off]),
+                key=dist.__getitem__, default=current,
+            )
+            # Distances fall by one per step, so a walk that stalls or outgrows the grid means a bug, not a path
+            if dist[following] >= dist[current] or len(nodes) > self.g.size:
+                raise RuntimeError("Planner distances are inconsistent")
+            current = following
+            nodes.append(current)
+        nodes.reverse()
+        return self.g.indexes(nodes)
@@ -0,0 +1,131 @@
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from algorithms.grid import Budget, GridGraph, Wavefront
+from compare import attach_grid, shared_grid
+from workers import CancelToken, SolverPool
+
+def group_queries(queries: List[Tuple[int, int]]) -> Dict[int, List[int]]:
+    """
+    Root every query at whichever of its endpoints is shared by more
+    queries, so one search tree answers as many of them as possible.
+    Moves are symmetric, so a tree grown from the end works as well as
+    one grown from the start.
+    Returns: {root index: [query numbers]}
+    """
+    counts = Counter(idx for query in queries for idx in query)
+    groups: Dict[int, List[int]] = {}
+    for i, (start, end) in enumerate(queries):
+        # Ties go to the smaller index, so (a, b) and (b, a) share a tree
+        root = start if (counts[start], -start) >= (counts[end], -end) else end
+        groups.setdefault(root, []).append(i)
+    return groups
+
+def flood(g: GridGraph, root: int, targets: List[int], want_paths: bool,
+          budget: Optional[Budget] = None) -> Tuple[List[int], Optional[List[List[int]]]]:
+    """
+    BFS outward from root until every target has been reached, the
+    reachable region runs out, or budget does, checked between levels
+    against the cells reached so far
+    Returns: (path length in cells per target, 0 if unreachable, -1 if the
+              budget ran out first; path from root to each target if want_paths)
+    """
+    source = g.node(root)
+    nodes = np.array([g.node(t) for t in targets], dtype=np.int64)
+    if not g.passable[source]:
+        return [0] * len(targets), [[] for _ in targets] if want_paths else None
+
+    wanted = np.zeros(g.size, dtype=np.bool_)
+    wanted[nodes] = True
+    remaining = int(np.count_nonzero(wanted & g.passable_np)) - int(wanted[source])
+    level = np.full(g.size, -1, dtype=np.int32)
+    level[source] = 0
+
+    wave = Wavefront(g, source)
+    never = bytearray(g.size)
+    depth = 0
+    reached = 1
+    while remaining > 0 and len(wave.frontier):
+        if budget is not None and budget.exhausted(reached):
+            break
+        discovered, _ = wave.step(never)
+        depth += 1
+        reached += len(discovered)
+        if len(discovered):
+            found = np.asarray(discovered, dtype=np.int64)
+            level[found] = depth
+            remaining -= int(np.count_nonzero(wanted[found]))
+
+    lengths = level[nodes] + 1
+    if budget is not None and budget.truncated:
+        lengths[(lengths == 0) & g.passable_np[nodes]] = -1
+    lengths = lengths.tolist()
+    if not want_paths:
+        return lengths, None
+    return lengths, [g.trace(wave.parent, source, n) if length > 0 else [] for n, length in zip(nodes.tolist(), lengths)]
+
+def solve_roots(shm_name: str, shape: Tuple[int, int], dtype: str, groups: List[Tuple[int, List[int]]],
+                want_paths: bool, max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+                cancel: Optional[CancelToken] = None) -> Tuple[List[Tuple[List[int], Optional[List[List[int]]]]], Optional[str]]:
+    """
+    Answer a share of a batch in a worker, one search tree per root,
+    against a grid held in shared memory. Each tree gets its own budget
+    of max_nodes cells; all of them share deadline and cancel.
+    Returns: (flood's result for each (root, targets) group, in order;
+              the first reason a tree was truncated, or None)
+    """
+    with attach_grid(shm_name, shape, dtype) as grid:
+        g = GridGraph(grid, *shape)
+        del grid
+    results = []
+    truncated = None
+    for root, targets in groups:
+        budget = Budget(max_nodes, deadline, cancel)
+        results.append(flood(g, root, targets, want_paths, budget))
+        truncated = truncated or budget.reason
+    return results, truncated
+
+async def batch_solve(pool: SolverPool, grid: np.ndarray, queries: List[Tuple[int, int]],
+                      want_paths: bool = False, max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+                      until: Optional[asyncio.Event] = None) -> Tuple[List[int], Optional[List[List[int]]], int, Optional[str]]:
+    """
+    Answer many (start, end) queries against one grid, sharing a search
+    tree between queries with a common endpoint and spreading the trees
+    across the solver pool. The jobs are admitted as one group, like a
+    compare's, and all called off once until is set or one of them fails.
+    Each tree stops early past max_nodes cells or deadline.
+    Returns: (path length in cells per query, 0 if unreachable, -1 if cut
+              short; paths per query if want_paths; number of trees grown;
+              the reason any tree was truncated, or None)
+    """
+    groups = group_queries(queries)
+    jobs = [[] for _ in range(min(pool.workers, len(groups)))]
+    # Biggest groups first, each to the least loaded job
+    loads = [0] * len(jobs)
+    for root, members in sorted(groups.items(), key=lambda item: -len(item[1])):
+        j = loads.index(min(loads))
+        targets = [end if start == root else start for start, end in (queries[i] for i in members)]
+        jobs[j].append((root, members, targets))
+        loads[j] += len(members)
+
+    with shared_grid(grid) as shm_name:
+        results = await pool.run_all(solve_roots, [
+            (shm_name, grid.shape, grid.dtype.str, [(root, targets) for root, _, targets in job], want_paths,
+             max_nodes, deadline)
+            for job in jobs
+        ], until=until)
+
+    lengths = [0] * len(queries)
+    paths: Optional[List[List[int]]] = [[] for _ in queries] if want_paths else None
+    truncated = next((reason for _, reason in results if reason is not None), None)
+    for job, (job_results, _) in zip(jobs, results):
+        for (root, members, _), (group_lengths, group_paths) in zip(job, job_results):
+            for k, i in enumerate(members):
+                lengths[i] = group_lengths[k]
+                if paths is not None:
+                    path = group_paths[k]
+                    # Trees grown from the end give the path backwards
+                    paths[i] = path if queries[i][0] == root else path[::-1]
+    return lengths, paths, len(groups), truncated
@@ -0,0 +1,7 @@
+"""
+Reproducible benchmarks for the solvers and the maze generator.
+
+Run from the backend directory:
+    python -m benchmarks --out baseline.json
+    python -m benchmarks --baseline baseline.json --threshold 0.15
+"""
@@ -0,0 +1,41 @@
+import argparse
+import json
+import sys
+
+from algorithms import SOLVERS
+from .grids import GENERATORS
+from .runner import SIZES, compare, expansions, replay, run, save
+
+parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the grid solvers")
+parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="square grid sizes")
+parser.add_argument("--algorithms", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+parser.add_argument("--generators", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best is kept")
+parser.add_argument("--replay", nargs="+", metavar="FILE",
+                    help="time saved binary requests, e.g. a profile capture's, instead of the generated grids")
+parser.add_argument("--out", help="write results to this JSON file")
+parser.add_argument("--baseline", help="compare against a previous results file")
+parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging, e.g. 0.1 = 10%%")
+parser.add_argument("--min-seconds", type=float, default=0.001, help="ignore timing changes on cases faster than this")
+args = parser.parse_args()
+
+if args.replay:
+    results = replay(args.replay, args.algorithms, args.repeat)
+else:
+    results = run(args.sizes, args.algorithms, args.generators, args.repeat)
+
+for line in expansions(results, "alt"):
+    print(f"EXPANDED {line}")
+
+if args.out:
+    save(results, args.out)
+
+if args.baseline:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(baseline, results, args.threshold, args.min_seconds)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
@@ -0,0 +1,58 @@
+from typing import Callable, Dict, Tuple
+import numpy as np
+
+from algorithms.components import label_components
+from maze import generate_maze
+
+def empty_grid(rows: int, cols: int, seed: int) -> np.ndarray:
+    return np.zeros((rows, cols), dtype=np.int32)
+
+def random_walls(density: float) -> Callable[[int, int, int], np.ndarray]:
+    def generate(rows: int, cols: int, seed: int) -> np.ndarray:
+        rng = np.random.RandomState(seed)
+        return (rng.random_sample((rows, cols)) < density).astype(np.int32)
+    return generate
+
+def sidewinder_maze(rows: int, cols: int, seed: int) -> np.ndarray:
+    origin = cols + 1
+    return generate_maze(rows, cols, origin, origin, seed=seed).astype(np.int32)
+
+def rooms_and_corridors(rows: int, cols: int, seed: int, room: int = 16) -> np.ndarray:
+    """Square rooms separated by one-cell walls, with one door in every wall segment"""
+    rng = np.random.RandomState(seed)
+    grid = np.zeros((rows, cols), dtype=np.int32)
+    grid[::room, :] = 1
+    grid[:, ::room] = 1
+
+    for r in range(0, rows, room):
+        for c in range(0, cols, room):
+            # Door in the wall below this row of rooms, and in the wall right of this column
+            if r > 0 and c + 1 < cols:
+                grid[r, rng.randint(c + 1, min(c + room, cols))] = 0
+            if c > 0 and r + 1 < rows:
+                grid[rng.randint(r + 1, min(r + room, rows)), c] = 0
+    return grid
+
+GENERATORS: Dict[str, Callable[[int, int, int], np.ndarray]] = {
+    "empty": empty_grid,
+    "random10": random_walls(0.10),
+    "random25": random_walls(0.25),
+    "random40": random_walls(0.40),
+    "maze": sidewinder_maze,
+    "rooms": rooms_and_corridors,
+}
+
+def endpoints(grid: np.ndarray) -> Tuple[int, int]:
+    """
+    Deterministic query for a grid: the first and last open cells, in
+    row-major order, of its largest connected region, so every case
+    times a search that finds a path rather than one that gives up
+    Returns: (start, end)
+    """
+    labels, count = label_components(grid != 1)
+    if count == 0:
+        raise ValueError("Grid has no open cells")
+    sizes = np.bincount(labels.reshape(-1), minlength=count + 1)
+    sizes[0] = 0
+    region = np.flatnonzero(labels.reshape(-1) == np.argmax(sizes))
+    return int(region[0]), int(region[-1])
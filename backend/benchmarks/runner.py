@@ -0,0 +1,160 @@
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List
+import numpy as np
+
+from algorithms import SOLVERS, WEIGHTED_SOLVERS
+from codec import decode_grid, decode_weights
+from .grids import GENERATORS, sidewinder_maze, endpoints
+
+SIZES = [50, 256, 1024, 2048]
+SEED = 1067
+
+def measure(fn: Callable, repeat: int) -> Dict:
+    """
+    Best wall time over repeat runs, then one extra run under tracemalloc
+    Returns: {"seconds", "peak_bytes", "result"}
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - began)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak, "result": result}
+
+def run(sizes: Iterable[int], algorithms: Iterable[str], generators: Iterable[str], repeat: int = 3, log=print) -> List[Dict]:
+    results = []
+
+    for size in sizes:
+        m = measure(lambda: sidewinder_maze(size, size, SEED), repeat)
+        results.append({
+            "case": f"generate_maze/{size}",
+            "seconds": m["seconds"],
+            "peak_bytes": m["peak_bytes"],
+        })
+        log(f"{results[-1]['case']:32s} {m['seconds'] * 1000:10.2f} ms")
+
+    for generator in generators:
+        for size in sizes:
+            grid = GENERATORS[generator](size, size, SEED)
+            start, end = endpoints(grid)
+            for algorithm in algorithms:
+                solver = SOLVERS[algorithm]
+                m = measure(lambda: solver(grid, start, end, size, size), repeat)
+                visited_order, path_indexes = m["result"]
+                assert path_indexes, f"{algorithm} found no path on {generator}/{size} between connected cells"
+                results.append({
+                    "case": f"{algorithm}/{generator}/{size}",
+                    "seconds": m["seconds"],
+                    "peak_bytes": m["peak_bytes"],
+                    "visited": len(visited_order),
+                    "path_length": len(path_indexes),
+                    "expanded_per_second": len(visited_order) / m["seconds"] if m["seconds"] > 0 else 0.0,
+                })
+                log(f"{results[-1]['case']:32s} {m['seconds'] * 1000:10.2f} ms "
+                    f"{results[-1]['expanded_per_second']:14,.0f} nodes/s "
+                    f"{m['peak_bytes'] / 2**20:8.1f} MiB")
+
+    return results
+
+def replay(paths: Iterable[str], algorithms: Iterable[str], repeat: int = 3, log=print) -> List[Dict]:
+    """
+    Time solvers on saved binary requests, such as the request of a
+    profile capture, as cases named after each file
+    Returns: results in the same shape as run's
+    """
+    results = []
+    for path in paths:
+        with open(path, "rb") as f:
+            body = f.read()
+        grid, start, end, rows, cols = decode_grid(body)
+        weights = decode_weights(body)
+        name = os.path.splitext(os.path.basename(path))[0]
+        for algorithm in algorithms:
+            if weights is not None and algorithm not in WEIGHTED_SOLVERS:
+                log(f"{algorithm}/{name}: skipped, the request is weighted")
+                continue
+            solver = SOLVERS[algorithm]
+            args = (grid, start, end, rows, cols) + ((weights,) if weights is not None else ())
+            m = measure(lambda: solver(*args), repeat)
+            visited_order, path_indexes = m["result"]
+            results.append({
+                "case": f"{algorithm}/replay-{name}/{rows}x{cols}",
+                "seconds": m["seconds"],
+                "peak_bytes": m["peak_bytes"],
+                "visited": len(visited_order),
+                "path_length": len(path_indexes),
+                "expanded_per_second": len(visited_order) / m["seconds"] if m["seconds"] > 0 else 0.0,
+            })
+            log(f"{results[-1]['case']:32s} {m['seconds'] * 1000:10.2f} ms "
+                f"{results[-1]['expanded_per_second']:14,.0f} nodes/s "
+                f"{m['peak_bytes'] / 2**20:8.1f} MiB")
+    return results
+
+def expansions(results: List[Dict], algorithm: str, baseline: str = "astar") -> List[str]:
+    """
+    Nodes algorithm expanded next to baseline's, per grid type and size,
+    e.g. to see what landmark heuristics save over Manhattan distance
+    Returns: one line per case both were run on
+    """
+    visited = {r["case"]: r["visited"] for r in results if "visited" in r}
+    lines = []
+    for case, count in visited.items():
+        name, rest = case.split("/", 1)
+        other = visited.get(f"{baseline}/{rest}")
+        if name != algorithm or other is None:
+            continue
+        ratio = f"{count / other:6.1%}" if other else "     -"
+        lines.append(f"{rest:24s} {algorithm} {count:10,d}  {baseline} {other:10,d}  {ratio}")
+    return lines
+
+def save(results: List[Dict], path: str):
+    with open(path, "w") as f:
+        json.dump({
+            "meta": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "seed": SEED,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }, f, indent=2)
+
+def compare(baseline: List[Dict], current: List[Dict], threshold: float, min_seconds: float = 0.001) -> List[str]:
+    """
+    Cases that got slower or hungrier than the baseline by more than threshold
+    (a fraction, 0.1 = 10%), or whose search result changed. Timings below
+    min_seconds in both runs are treated as noise.
+    Returns: one message per regression
+    """
+    old = {r["case"]: r for r in baseline}
+    regressions = []
+    for new in current:
+        before = old.get(new["case"])
+        if before is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if metric == "seconds" and max(before[metric], new[metric]) < min_seconds:
+                continue
+            if before[metric] > 0 and new[metric] > before[metric] * (1 + threshold):
+                regressions.append(
+                    f"{new['case']}: {metric} {before[metric]:.6g} -> {new[metric]:.6g} "
+                    f"(+{(new[metric] / before[metric] - 1) * 100:.1f}%)"
+                )
+        if "path_length" in new and new["path_length"] != before.get("path_length"):
+            regressions.append(
+                f"{new['case']}: path_length {before.get('path_length')} -> {new['path_length']}"
+            )
+    return regressions
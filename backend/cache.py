@@ -0,0 +1,85 @@
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+
+# Bump whenever a solver's output changes, so clients holding an old ETag
+# don't get a 304 for a result the server would now compute differently
+RESULT_VERSION = 3
+
+def result_key(algorithm: str, grid: np.ndarray, start: int, end: int, media_type: str,
+               weights: Optional[np.ndarray] = None) -> str:
+    """
+    Content hash of everything that determines a solve response
+    Returns: hex digest
+    """
+    rows, cols = grid.shape
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{RESULT_VERSION}:{algorithm}:{media_type}:{grid.dtype.str}:".encode())
+    h.update(struct.pack("<4q", rows, cols, start, end))
+    h.update(np.ascontiguousarray(grid).tobytes())
+    if weights is not None:
+        h.update(b"weights:" + np.ascontiguousarray(weights, dtype=np.uint8).tobytes())
+    return h.hexdigest()
+
+class ResultCache:
+    """
+    LRU cache of encoded response bodies, bounded by their total size
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def peek(self, key: str) -> Optional[bytes]:
+        """
+        Like get, but counted as neither a hit nor a miss, for variants of
+        an entry whose lookup was already counted, such as compressed bodies
+        """
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[key] = body
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,160 @@
+import json
+import struct
+from typing import Any, Optional, Sequence, Tuple
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+def _plain(value: Any) -> Any:
+    """json.dumps fallback for the numpy values orjson would write natively"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    """
+    Compact JSON bytes, written by orjson when it is installed. numpy
+    arrays and scalars are accepted either way, so results never have to
+    go through Python lists just to be encoded.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, separators=(",", ":"), default=_plain).encode()
+
+# Request: rows, cols, start, end as little-endian int32, followed by the
+# walls bitmap (one bit per cell, row-major, least significant bit first),
+# optionally followed by one uint8 weight per cell
+GRID_HEADER = struct.Struct("<4i")
+
+# Response: visited_order length and path_indexes length as little-endian
+# uint32, followed by both arrays as little-endian int32
+PATH_HEADER = struct.Struct("<2I")
+
+# Distance field response: rows, cols as little-endian uint32, the distance
+# width in bytes (2 or 4) and whether a flow field follows, then the
+# distances row-major (uint16 with 65535, or int32 with -1, for unreachable),
+# then one uint8 direction per cell if flagged
+FIELD_HEADER = struct.Struct("<2I2B2x")
+
+UINT16_UNREACHABLE = 0xFFFF
+
+def encode_grid(grid: np.ndarray, start: int, end: int, weights: Optional[np.ndarray] = None) -> bytes:
+    """
+    Pack a grid into the binary request format
+    Returns: request body bytes
+    """
+    rows, cols = grid.shape
+    bits = np.packbits(grid.reshape(-1) == 1, bitorder="little")
+    body = GRID_HEADER.pack(rows, cols, start, end) + bits.tobytes()
+    if weights is not None:
+        body += np.asarray(weights, dtype=np.uint8).tobytes()
+    return body
+
+def decode_grid(body: bytes) -> Tuple[np.ndarray, int, int, int, int]:
+    """
+    Unpack a binary grid request
+    Returns: (grid, start, end, rows, cols)
+    """
+    if len(body) < GRID_HEADER.size:
+        raise ValueError("binary grid request is shorter than its header")
+    rows, cols, start, end = GRID_HEADER.unpack_from(body)
+    if rows <= 0 or cols <= 0:
+        raise ValueError("rows and cols must be positive")
+    cells = rows * cols
+    if len(body) - GRID_HEADER.size < (cells + 7) // 8:
+        raise ValueError(f"walls bitmap too short for a {rows}x{cols} grid")
+    if not (0 <= start < cells and 0 <= end < cells):
+        raise ValueError("start and end must be inside the grid")
+
+    bits = np.frombuffer(body, dtype=np.uint8, offset=GRID_HEADER.size)
+    grid = np.unpackbits(bits, count=cells, bitorder="little").reshape(rows, cols)
+    return grid, start, end, rows, cols
+
+def decode_weights(body: bytes) -> Optional[np.ndarray]:
+    """
+    Read the weights that may follow the walls bitmap of a binary grid
+    request, which decode_grid has already validated
+    Returns: rows x cols uint8 array, or None for an unweighted grid
+    """
+    rows, cols, _, _ = GRID_HEADER.unpack_from(body)
+    offset = GRID_HEADER.size + (rows * cols + 7) // 8
+    if len(body) == offset:
+        return None
+    if len(body) - offset != rows * cols:
+        raise ValueError(f"expected {rows * cols} weight bytes after the walls bitmap, got {len(body) - offset}")
+    return np.frombuffer(body, dtype=np.uint8, offset=offset).reshape(rows, cols)
+
+def encode_path(visited_order: Sequence[int], path_indexes: Sequence[int]) -> bytes:
+    """
+    Pack a solver result into the binary response format
+    Returns: response body bytes
+    """
+    visited = np.asarray(visited_order, dtype="<i4")
+    path = np.asarray(path_indexes, dtype="<i4")
+    return PATH_HEADER.pack(len(visited), len(path)) + visited.tobytes() + path.tobytes()
+
+def decode_path(body: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unpack a binary solver response without copying
+    Returns: (visited_order, path_indexes)
+    """
+    n_visited, n_path = PATH_HEADER.unpack_from(body)
+    visited = np.frombuffer(body, dtype="<i4", count=n_visited, offset=PATH_HEADER.size)
+    path = np.frombuffer(body, dtype="<i4", count=n_path, offset=PATH_HEADER.size + 4 * n_visited)
+    return visited, path
+
+def encode_path_json(visited_order: Sequence[int], path_indexes: Sequence[int],
+                     grid: Optional[np.ndarray] = None, truncated: bool = False) -> bytes:
+    """
+    Encode a solver result in the JSON PathResponse shape. The solvers
+    never change the grid, so it is only echoed back when passed in, and
+    truncated is only written for searches cut short.
+    Returns: response body bytes
+    """
+    result = {"visited_order": visited_order, "path_indexes": path_indexes}
+    if grid is not None:
+        result["grid"] = np.ascontiguousarray(grid).reshape(-1)
+    if truncated:
+        result["truncated"] = True
+    return dumps(result)
+
+def encode_field(distances: np.ndarray, flow: Optional[np.ndarray] = None) -> bytes:
+    """
+    Pack a distance field, and optionally its flow field, into the binary
+    response format, using uint16 distances whenever they fit
+    Returns: response body bytes
+    """
+    rows, cols = distances.shape
+    if distances.size == 0 or distances.max() < UINT16_UNREACHABLE:
+        data = np.where(distances >= 0, distances, UINT16_UNREACHABLE).astype("<u2")
+    else:
+        data = distances.astype("<i4")
+    body = FIELD_HEADER.pack(rows, cols, data.itemsize, flow is not None) + data.tobytes()
+    if flow is not None:
+        body += np.asarray(flow, dtype=np.uint8).tobytes()
+    return body
+
+def decode_field(body: bytes) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Unpack a binary distance field response
+    Returns: (rows x cols int32 distances with -1 for unreachable, flow or None)
+    """
+    rows, cols, itemsize, has_flow = FIELD_HEADER.unpack_from(body)
+    cells = rows * cols
+    dtype = "<u2" if itemsize == 2 else "<i4"
+    data = np.frombuffer(body, dtype=dtype, count=cells, offset=FIELD_HEADER.size)
+    distances = data.astype(np.int32)
+    if itemsize == 2:
+        distances[data == UINT16_UNREACHABLE] = -1
+    flow = None
+    if has_flow:
+        flow = np.frombuffer(body, dtype=np.uint8, count=cells, offset=FIELD_HEADER.size + itemsize * cells)
+        flow = flow.reshape(rows, cols)
+    return distances.reshape(rows, cols), flow
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from contextlib import contextmanager, nullcontext
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+from algorithms import SOLVERS
+from algorithms.grid import Budget
+from workers import CancelToken, SolverPool
+
+@contextmanager
+def shared_grid(grid: np.ndarray) -> Iterator[str]:
+    """
+    Copy a grid into shared memory for workers to attach to, and free it afterwards
+    Yields: the shared memory block's name
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(grid.nbytes, 1))
+    try:
+        shared = np.ndarray(grid.shape, dtype=grid.dtype, buffer=shm.buf)
+        shared[...] = grid
+        del shared
+        yield shm.name
+    finally:
+        shm.close()
+        shm.unlink()
+
+@contextmanager
+def attach_grid(shm_name: str, shape: Tuple[int, int], dtype: str) -> Iterator[np.ndarray]:
+    """
+    View a grid placed in shared memory by shared_grid, without copying it.
+    The block can't be closed while a view of it exists, so callers must
+    drop their reference before the with block ends.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    grid = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        yield grid
+    finally:
+        del grid
+        shm.close()
+
+def run_shared(shm_name: str, shape: Tuple[int, int], dtype: str, algorithm: str, start: int, end: int,
+               max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+               weights_name: Optional[str] = None, cancel: Optional[CancelToken] = None) -> dict:
+    """
+    Run one solver in a worker against a grid held in shared memory, and
+    its uint8 weights too if weights_name is given, within the same
+    limits as solve_job
+    Returns: summary of the run
+    """
+    budget = Budget(max_nodes, deadline, cancel)
+    shared_weights = attach_grid(weights_name, shape, "|u1") if weights_name is not None else nullcontext()
+    with attach_grid(shm_name, shape, dtype) as grid, shared_weights as weights:
+        rows, cols = shape
+        extra = (weights,) if weights is not None else ()
+        began = time.perf_counter()
+        visited_order, path_indexes = SOLVERS[algorithm](grid, start, end, rows, cols, *extra, budget=budget)
+        elapsed = time.perf_counter() - began
+        del grid, weights, extra
+
+    return {
+        "algorithm": algorithm,
+        "visited_count": len(visited_order),
+        "path_length": len(path_indexes),
+        "found": len(path_indexes) > 0,
+        "elapsed_ms": elapsed * 1000,
+        "expanded_per_second": len(visited_order) / elapsed if elapsed > 0 else 0.0,
+        "truncated": budget.truncated,
+    }
+
+async def compare(pool: SolverPool, grid: np.ndarray, start: int, end: int, algorithms: List[str],
+                  max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+                  until: Optional[asyncio.Event] = None, weights: Optional[np.ndarray] = None) -> List[dict]:
+    """
+    Copy the grid, and weights if any, into shared memory once and run
+    every requested solver on it concurrently on the solver pool, as one
+    group of jobs that is admitted or rejected as a whole. They are all
+    called off once until is set or any of them fails, before the shared
+    memory is freed. With weights, every algorithm must be one of the
+    weighted solvers.
+    Returns: one summary per algorithm, in request order
+    """
+    shared_weights = shared_grid(weights) if weights is not None else nullcontext()
+    with shared_grid(grid) as shm_name, shared_weights as weights_name:
+        return await pool.run_all(run_shared, [
+            (shm_name, grid.shape, grid.dtype.str, name, start, end, max_nodes, deadline, weights_name)
+            for name in algorithms
+        ], until=until)
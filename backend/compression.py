@@ -0,0 +1,49 @@
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this go out as they are; compressing them saves too little
+MIN_SIZE = 1024
+
+# Fast settings: these run on every cache miss, and most of the saving on
+# JSON index lists comes from the first few levels anyway
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+def supported() -> tuple:
+    """Content codings this server can produce, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header, honouring q=0
+    Returns: "br", "gzip" or None for identity
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+
+    for coding in supported():
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if coding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content coding: {coding}")
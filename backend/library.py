@@ -0,0 +1,122 @@
+import os
+import re
+import tempfile
+from typing import List, Tuple
+import numpy as np
+
+from benchmarks.grids import GENERATORS, endpoints
+from codec import GRID_HEADER, encode_grid
+
+GRID_SUFFIX = ".grid"
+
+# Ids are "<generator>-<rows>x<cols>-<seed>", which also keeps them safe as file names
+GRID_ID = re.compile(r"^([a-z0-9]+)-(\d+)x(\d+)-(\d+)$")
+
+def grid_id(generator: str, rows: int, cols: int, seed: int) -> str:
+    return f"{generator}-{rows}x{cols}-{seed}"
+
+def parse_spec(spec: str) -> Tuple[str, int, int, int]:
+    """
+    Parse a "generator:ROWSxCOLS:seed" preload entry
+    Returns: (generator, rows, cols, seed)
+    """
+    try:
+        generator, size, seed = spec.strip().split(":")
+        rows, cols = size.lower().split("x")
+        return generator, int(rows), int(cols), int(seed)
+    except ValueError:
+        raise ValueError(f"Bad grid spec {spec!r}, expected generator:ROWSxCOLS:seed")
+
+class GridLibrary:
+    """
+    Directory of generated grids, one file per (generator, rows, cols, seed).
+
+    Each file is a binary solve request body as defined in codec.py: the
+    header carries a default start and end (the first and last open cells),
+    followed by the bit-packed walls. Files are opened with np.memmap, so
+    reading one costs a page-cache hit rather than a regeneration or an
+    upload, and every worker process shares the same cached pages.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, gid: str) -> str:
+        if not GRID_ID.match(gid):
+            raise KeyError(gid)
+        return os.path.join(self.root, gid + GRID_SUFFIX)
+
+    def describe(self, gid: str) -> dict:
+        """
+        Metadata of a stored grid, read from its id and file header
+        Returns: {"id", "generator", "rows", "cols", "seed", "start", "end", "bytes"}
+        """
+        path = self.path(gid)
+        try:
+            with open(path, "rb") as f:
+                rows, cols, start, end = GRID_HEADER.unpack(f.read(GRID_HEADER.size))
+        except FileNotFoundError:
+            raise KeyError(gid)
+        generator, _, _, seed = GRID_ID.match(gid).groups()
+        return {
+            "id": gid,
+            "generator": generator,
+            "rows": rows,
+            "cols": cols,
+            "seed": int(seed),
+            "start": start,
+            "end": end,
+            "bytes": os.path.getsize(path),
+        }
+
+    def list(self) -> List[dict]:
+        if not os.path.isdir(self.root):
+            return []
+        names = sorted(n[:-len(GRID_SUFFIX)] for n in os.listdir(self.root) if n.endswith(GRID_SUFFIX))
+        return [self.describe(gid) for gid in names if GRID_ID.match(gid)]
+
+    def generate(self, generator: str, rows: int, cols: int, seed: int) -> dict:
+        """
+        Generate and store a grid unless it is already stored
+        Returns: its metadata
+        """
+        if generator not in GENERATORS:
+            raise ValueError(f"Unknown generator: {generator}")
+        if rows <= 0 or cols <= 0 or seed < 0:
+            raise ValueError("rows and cols must be positive and seed non-negative")
+
+        gid = grid_id(generator, rows, cols, seed)
+        path = self.path(gid)
+        if not os.path.exists(path):
+            grid = GENERATORS[generator](rows, cols, seed)
+            start, end = endpoints(grid)
+            os.makedirs(self.root, exist_ok=True)
+            # Write then rename, so concurrent generators and readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(encode_grid(grid, start, end))
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return self.describe(gid)
+
+    def bits(self, gid: str) -> Tuple[np.memmap, dict]:
+        """
+        Map a stored grid's packed walls without reading them
+        Returns: (read-only packed bitmap, metadata)
+        """
+        meta = self.describe(gid)
+        bits = np.memmap(self.path(gid), dtype=np.uint8, mode="r", offset=GRID_HEADER.size)
+        return bits, meta
+
+    def load(self, gid: str) -> Tuple[np.ndarray, dict]:
+        """
+        Unpack a stored grid straight from its mapping
+        Returns: (grid of 0/1 cells, metadata)
+        """
+        bits, meta = self.bits(gid)
+        rows, cols = meta["rows"], meta["cols"]
+        grid = np.unpackbits(bits, count=rows * cols, bitorder="little").reshape(rows, cols)
+        return grid, meta
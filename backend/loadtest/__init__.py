@@ -0,0 +1,7 @@
+"""
+HTTP load generator for the API, with latency percentiles and event-loop lag.
+
+Run from the backend directory:
+    python -m loadtest --rate 50 --duration 30 --out load.json
+    python -m loadtest --url http://localhost:8000 --mix astar=3,batch=1
+"""
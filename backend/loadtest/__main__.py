@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import os
+
+from .harness import DEFAULT_MIX, DENSITIES, ENDPOINTS, SIZES, VARIANTS, parse_mix, report, run, save
+
+parser = argparse.ArgumentParser(prog="python -m loadtest", description="Load-test the API")
+parser.add_argument("--url", help="server to test, e.g. http://localhost:8000; by default the app is served in-process")
+parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                    help=f"weighted endpoints, e.g. astar=3,bfs=1; from {', '.join(ENDPOINTS)}")
+parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="square grid sizes")
+parser.add_argument("--densities", type=float, nargs="+", default=DENSITIES, help="fractions of cells that are walls")
+parser.add_argument("--variants", type=int, default=VARIANTS, help="distinct grids per size and density")
+parser.add_argument("--rate", type=float, default=20.0, help="requests sent per second")
+parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load")
+parser.add_argument("--warmup", type=float, default=1.0, help="seconds of load sent first and left out of the results")
+parser.add_argument("--connections", type=int, default=32, help="keep-alive connections; requests queue for a free one")
+parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request counts as failed")
+parser.add_argument("--encoding", default="gzip, br", help="Accept-Encoding to send")
+parser.add_argument("--workers", type=int, help="SOLVER_WORKERS for the in-process server")
+parser.add_argument("--queue", type=int, help="SOLVER_QUEUE for the in-process server")
+parser.add_argument("--executor", choices=["process", "thread"], help="SOLVER_EXECUTOR for the in-process server")
+parser.add_argument("--out", help="write results to this JSON file")
+args = parser.parse_args()
+
+try:
+    mix = parse_mix(args.mix)
+except ValueError as e:
+    parser.error(str(e))
+if args.rate <= 0 or args.duration <= 0:
+    parser.error("--rate and --duration must be positive")
+for name, value in (("SOLVER_WORKERS", args.workers), ("SOLVER_QUEUE", args.queue), ("SOLVER_EXECUTOR", args.executor)):
+    if value is not None:
+        if args.url:
+            parser.error(f"{name} only applies to the in-process server; set it where {args.url} runs")
+        os.environ[name] = str(value)
+
+results = asyncio.run(run(
+    args.url, mix, args.sizes, args.densities, args.rate, args.duration, args.warmup,
+    args.connections, args.timeout, args.encoding, args.variants,
+))
+
+for line in report(results):
+    print(line)
+
+if args.out:
+    save(results, args.out)
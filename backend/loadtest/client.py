@@ -0,0 +1,104 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+class HTTPError(Exception):
+    pass
+
+class Connection:
+    """
+    One keep-alive HTTP/1.1 connection. Just enough of the protocol for
+    the API's responses, so the generator spends its time waiting on the
+    server rather than in a client library.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        """
+        Send a request, reconnecting first if the last one left the connection closed
+        Returns: (status, body)
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await self.writer.drain()
+            return await self._response()
+        except BaseException:
+            # A half-read response leaves the stream out of step, so never reuse it
+            self.close()
+            raise
+
+    async def _response(self) -> Tuple[int, bytes]:
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        try:
+            status = int(status_line.split(" ", 2)[1])
+        except (IndexError, ValueError):
+            raise HTTPError(f"Bad status line: {status_line!r}")
+        fields = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name:
+                fields[name.strip().lower()] = value.strip()
+
+        if "content-length" in fields:
+            body = await self.reader.readexactly(int(fields["content-length"]))
+        elif fields.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._chunked()
+        else:
+            body = await self.reader.read()
+            fields["connection"] = "close"
+        if fields.get("connection", "").lower() == "close":
+            self.close()
+        return status, body
+
+    async def _chunked(self) -> bytes:
+        chunks = []
+        while True:
+            size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                # Skip trailers up to the blank line that ends the body
+                while await self.reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+class ConnectionPool:
+    """A fixed number of connections; requests wait for a free one"""
+
+    def __init__(self, url: str, size: int):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"Only plain http:// URLs are supported: {url}")
+        self.prefix = parts.path.rstrip("/")
+        self.idle: "asyncio.Queue[Connection]" = asyncio.Queue()
+        self.connections: List[Connection] = [Connection(parts.hostname, parts.port or 80) for _ in range(size)]
+        for connection in self.connections:
+            self.idle.put_nowait(connection)
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        connection = await self.idle.get()
+        try:
+            return await connection.request(method, self.prefix + path, body, headers)
+        finally:
+            self.idle.put_nowait(connection)
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import os
+import platform
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from algorithms import SOLVERS
+from benchmarks.grids import random_walls
+from .client import ConnectionPool, HTTPError
+
+# Routes the generator knows how to build bodies for, besides /api/<solver>
+EXTRA_ENDPOINTS = ("compare", "batch", "distance-field", "maze")
+ENDPOINTS = tuple(SOLVERS) + EXTRA_ENDPOINTS
+
+DEFAULT_MIX = {"astar": 4, "bfs": 2, "jps": 1, "batch": 1, "distance-field": 1, "maze": 1}
+SIZES = [64, 256]
+DENSITIES = [0.1, 0.3]
+SEED = 1067
+
+# Distinct grids per size and density; queries pick fresh endpoints on them
+VARIANTS = 4
+BATCH_QUERIES = 32
+COMPARE_ALGORITHMS = ["bfs", "astar", "jps"]
+
+# How often the event loop is checked for lag
+LAG_INTERVAL = 0.01
+
+# Settings main.py reads at startup, recorded with every run
+SERVER_SETTINGS = ("SOLVER_WORKERS", "SOLVER_QUEUE", "SOLVER_TIMEOUT", "SOLVER_EXECUTOR", "RESULT_CACHE_BYTES")
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """
+    Parse an endpoint mix like "astar=4,bfs=2,batch"; a bare name weighs 1
+    Returns: {endpoint: weight}
+    """
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = int(weight) if weight else 1
+        if mix[name] < 0:
+            raise ValueError(f"Negative weight for {name}")
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one endpoint with a positive weight")
+    return mix
+
+class Workload:
+    """
+    Request bodies drawn from a weighted mix of endpoints over random-wall
+    grids. Grids are generated and JSON-encoded once up front, so building
+    a request only costs splicing in new endpoints.
+    """
+
+    def __init__(self, mix: Dict[str, int], sizes: Iterable[int], densities: Iterable[float],
+                 variants: int = VARIANTS, seed: int = SEED):
+        self.rng = random.Random(seed)
+        self.endpoints = [name for name in mix if mix[name] > 0]
+        self.weights = [mix[name] for name in self.endpoints]
+        self.cases = [(size, density) for size in sizes for density in densities]
+        self.grids: Dict[Tuple[int, float], List[Tuple[bytes, np.ndarray]]] = {}
+        for size, density in self.cases:
+            self.grids[size, density] = []
+            for variant in range(variants):
+                grid = random_walls(density)(size, size, seed + variant).reshape(-1)
+                open_cells = np.flatnonzero(grid != 1)
+                if len(open_cells) == 0:
+                    open_cells = np.arange(grid.size)
+                self.grids[size, density].append((json.dumps(grid.tolist()).encode(), open_cells))
+
+    def next(self) -> Tuple[str, str, bytes]:
+        """
+        Draw the next request
+        Returns: (scenario name, path, JSON body)
+        """
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        size, density = self.rng.choice(self.cases)
+        if endpoint == "maze":
+            origin = size + 1
+            body = {"rows": size, "cols": size, "start": origin, "end": origin, "seed": self.rng.randrange(2**31)}
+            return f"maze/{size}", "/api/maze", json.dumps(body).encode()
+
+        cells, open_cells = self.rng.choice(self.grids[size, density])
+        pick = lambda: int(open_cells[self.rng.randrange(len(open_cells))])
+        fields = {"rows": size, "cols": size}
+        if endpoint == "batch":
+            fields["queries"] = [[pick(), pick()] for _ in range(BATCH_QUERIES)]
+        elif endpoint == "distance-field":
+            fields["sources"] = [pick()]
+        else:
+            fields["start"], fields["end"] = pick(), pick()
+            if endpoint == "compare":
+                fields["algorithms"] = COMPARE_ALGORITHMS
+        body = b'{"grid":' + cells + b"," + json.dumps(fields).encode()[1:]
+        return f"{endpoint}/{size}/{density:g}", f"/api/{endpoint}", body
+
+class LagMonitor:
+    """
+    Event-loop lag: how late a sleep of LAG_INTERVAL wakes up. When the
+    server runs in-process it shares this loop, so this is the server's lag.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: List[float] = []
+        self.task: Optional[asyncio.Task] = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - expected, 0.0))
+
+    def start(self):
+        self.task = asyncio.create_task(self._sample())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+async def send_one(pool: ConnectionPool, scenario: str, path: str, body: bytes, due: float,
+                   timeout: float, encoding: str) -> Dict:
+    """
+    One request, timed from when it was due rather than when it was sent,
+    so time spent waiting for a connection counts against the server
+    Returns: {"scenario", "status", "seconds", "bytes", "finished"}
+    """
+    loop = asyncio.get_running_loop()
+    headers = {"Content-Type": "application/json", "Accept-Encoding": encoding}
+    received = b""
+    try:
+        status, received = await asyncio.wait_for(pool.request("POST", path, body, headers), timeout)
+    except asyncio.TimeoutError:
+        status = "timeout"
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, HTTPError):
+        status = "connection"
+    finished = loop.time()
+    return {"scenario": scenario, "status": status, "seconds": finished - due,
+            "bytes": len(received), "finished": finished}
+
+async def generate(pool: ConnectionPool, workload: Workload, rate: float, duration: float,
+                   warmup: float, timeout: float, encoding: str) -> Tuple[List[Dict], float]:
+    """
+    Open-loop load: request i is due at i / rate seconds whatever happened
+    to earlier ones, so a slow server builds a queue instead of slowing the
+    generator down and hiding its own latency
+    Returns: (records of requests sent after the warmup, when the warmup ended)
+    """
+    loop = asyncio.get_running_loop()
+    began = loop.time()
+    tasks = []
+    measured = int(warmup * rate)
+    for i in range(int((warmup + duration) * rate)):
+        due = began + i / rate
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        scenario, path, body = workload.next()
+        tasks.append(asyncio.create_task(send_one(pool, scenario, path, body, due, timeout, encoding)))
+    records = await asyncio.gather(*tasks)
+    return records[measured:], began + warmup
+
+def percentiles(seconds: List[float]) -> Dict:
+    """Returns: {"p50", "p95", "p99", "max", "mean"} in milliseconds"""
+    if not seconds:
+        return {}
+    ms = np.asarray(seconds) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "max": float(ms.max()), "mean": float(ms.mean())}
+
+def summarize(records: List[Dict], window: float) -> Dict:
+    """
+    Throughput and latency of the successful (2xx) requests in records,
+    and a count of everything else by status
+    """
+    ok, errors = [], {}
+    for r in records:
+        if isinstance(r["status"], int) and 200 <= r["status"] < 300:
+            ok.append(r)
+        else:
+            errors[str(r["status"])] = errors.get(str(r["status"]), 0) + 1
+    return {
+        "requests": len(records),
+        "ok": len(ok),
+        "errors": errors,
+        "error_rate": (len(records) - len(ok)) / len(records) if records else 0.0,
+        "throughput_rps": len(ok) / window if window > 0 else 0.0,
+        "bytes_per_response": sum(r["bytes"] for r in ok) / len(ok) if ok else 0.0,
+        "latency_ms": percentiles([r["seconds"] for r in ok]),
+    }
+
+async def server_stats(pool: ConnectionPool) -> Dict:
+    """Pool and cache stats the server reports after the run, where it answers"""
+    stats = {}
+    for name in ("pool", "cache"):
+        try:
+            status, body = await pool.request("GET", f"/api/{name}")
+            if status == 200:
+                stats[name] = json.loads(body)
+        except (OSError, asyncio.IncompleteReadError, HTTPError, ValueError):
+            pass
+    return stats
+
+@asynccontextmanager
+async def local_server():
+    """
+    Serve main.app with uvicorn on a free localhost port, on this event loop.
+    The solver pool reads SOLVER_* from the environment as the app starts.
+    Yields: the server's base URL
+    """
+    import uvicorn
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+            raise RuntimeError("Server exited before it started")
+        await asyncio.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+@asynccontextmanager
+async def _given(url: str):
+    yield url.rstrip("/")
+
+async def run(url: Optional[str], mix: Dict[str, int], sizes: Iterable[int], densities: Iterable[float],
+              rate: float, duration: float, warmup: float = 1.0, connections: int = 32,
+              timeout: float = 30.0, encoding: str = "gzip, br", variants: int = VARIANTS,
+              seed: int = SEED, log=print) -> Dict:
+    """
+    Drive the API at rate requests per second for duration seconds, against
+    url or, without one, against the app served in-process
+    Returns: the report that save writes out
+    """
+    sizes, densities = list(sizes), list(densities)
+    workload = Workload(mix, sizes, densities, variants, seed)
+    async with (local_server() if url is None else _given(url)) as base:
+        log(f"Sending {rate:g} req/s for {duration:g}s (+{warmup:g}s warmup) to {base}")
+        pool = ConnectionPool(base, connections)
+        lag = LagMonitor()
+        lag.start()
+        try:
+            records, measured_from = await generate(pool, workload, rate, duration, warmup, timeout, encoding)
+            await lag.stop()
+            server = await server_stats(pool)
+        finally:
+            pool.close()
+
+    window = max((r["finished"] for r in records), default=measured_from) - measured_from
+    scenarios = {}
+    for name in sorted({r["scenario"] for r in records}):
+        scenarios[name] = summarize([r for r in records if r["scenario"] == name], window)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "config": {
+            "url": url or "in-process",
+            "mix": mix,
+            "sizes": sizes,
+            "densities": densities,
+            "rate": rate,
+            "duration": duration,
+            "warmup": warmup,
+            "connections": connections,
+            "timeout": timeout,
+            "encoding": encoding,
+            "seed": seed,
+            "settings": {name: os.environ[name] for name in SERVER_SETTINGS if name in os.environ},
+        },
+        "summary": summarize(records, window),
+        "scenarios": scenarios,
+        "loop_lag_ms": percentiles(lag.samples),
+        "server": server,
+    }
+
+def report(results: Dict) -> List[str]:
+    """Returns: one line for the whole run, then one per scenario"""
+    def line(name: str, s: Dict) -> str:
+        latency = s["latency_ms"] or {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        return (f"{name:28s} {s['requests']:7d} req {s['throughput_rps']:9.1f} ok/s "
+                f"p50 {latency['p50']:8.1f} p95 {latency['p95']:8.1f} p99 {latency['p99']:8.1f} ms "
+                f"errors {s['error_rate']:6.1%}")
+    lines = [line("all", results["summary"])]
+    lines += [line(name, s) for name, s in results["scenarios"].items()]
+    lag = results["loop_lag_ms"]
+    if lag:
+        lines.append(f"{'event loop lag':28s} p50 {lag['p50']:8.2f} p99 {lag['p99']:8.2f} max {lag['max']:8.2f} ms")
+    return lines
+
+def save(results: Dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
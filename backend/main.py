@@ -1,7 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Tuple
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
 import numpy as np
 
 from algorithms.dijkstra import dijkstra_grid
@@ -11,9 +21,37 @@ from algorithms.dfs import dfs_grid
 from algorithms.greedy_bfs import greedy_bfs_grid
 from algorithms.bellman_ford import bellman_ford_grid
 from algorithms.bi_swarm import bi_swarm_grid
-from maze import generate_maze
+from algorithms.jps import jps_grid, jps_scanned_grid
+from algorithms.hpa import hpa_grid
+from algorithms.alt import alt_grid
+from algorithms.grid import Budget, Steps, bounded, check_weights
+from algorithms.components import connected
+from algorithms.lpa_star import LPAStar
+from algorithms import BUDGETED_STEPS, SOLVERS, SOLVER_STEPS, WEIGHTED_SOLVERS
+from maze import generate_maze, generate_maze_with_order
+from codec import BINARY_MEDIA_TYPE, decode_grid, decode_weights, dumps, encode_grid
+from compression import MIN_SIZE, compress, negotiate, supported
+from cache import ResultCache, result_key
+from compare import compare
+from batch import batch_solve
+from library import GridLibrary, parse_spec
+from profiling import ProfileStore
+from sessions import GridSession, SessionStore, VersionConflict
+from workers import CancelToken, JobCancelled, PoolSaturated, PoolTimeout, SolverPool, field_job, solve_job
+from metrics import (
+    PROMETHEUS_MEDIA_TYPE, StageTimer, registry, stage_seconds, request_seconds,
+    grid_cells, nodes_expanded, requests_total, in_flight, searches_truncated,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # e.g. GRID_LIBRARY_PRELOAD="maze:2048x2048:1,random25:1024x1024:7"
+    for spec in filter(None, os.environ.get("GRID_LIBRARY_PRELOAD", "").split(",")):
+        await solver_pool.run(grid_library.generate, *parse_spec(spec))
+    yield
+    solver_pool.shutdown()
 
-app = FastAPI(title="Path Visualizer API")
+app = FastAPI(title="Path Visualizer API", lifespan=lifespan)
 
 # CORS configuration - Updated to allow your Vercel domain
 app.add_middleware(
@@ -27,6 +65,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache", "Server-Timing", "X-Search-Truncated", "X-Profile-Id"],
+)
+
+# Encoded solve responses, LRU-evicted once they exceed this many bytes
+result_cache = ResultCache(int(os.environ.get("RESULT_CACHE_BYTES", 64 * 1024 * 1024)))
+
+# Metric label for each solver
+SOLVER_NAMES = {solver: name for name, solver in SOLVERS.items()}
+SOLVER_NAMES[jps_scanned_grid] = "jps"
+
+# Pre-generated grids that solve requests can reference by id
+grid_library = GridLibrary(os.environ.get("GRID_LIBRARY_DIR", "grid_library"))
+
+# Grids clients edit by sending diffs, then solve by session id
+grid_sessions = SessionStore(
+    int(os.environ.get("GRID_SESSIONS", 64)),
+    float(os.environ.get("SESSION_TTL", 600)),
+)
+
+# Incremental planners kept between wall edits, as (LPAStar, lock)
+replan_sessions = SessionStore(
+    int(os.environ.get("REPLAN_SESSIONS", 32)),
+    float(os.environ.get("SESSION_TTL", 600)),
+)
+
+# Every search and maze generation runs here, never on the event loop
+solver_pool = SolverPool.from_env()
+
+def pool_samples():
+    stats = solver_pool.stats()
+    return [
+        ("pathviz_pool_pending", "Jobs admitted to the solver pool and not yet finished", "gauge", stats["pending"]),
+        ("pathviz_pool_rejected_total", "Jobs turned away because the solver pool was full", "counter", stats["rejected"]),
+        ("pathviz_pool_timeouts_total", "Jobs that ran past the solver timeout", "counter", stats["timeouts"]),
+        ("pathviz_pool_cancelled_total", "Jobs called off because their client disconnected", "counter", stats["cancelled"]),
+    ]
+
+def cache_samples():
+    stats = result_cache.stats()
+    return [
+        ("pathviz_cache_hits_total", "Result cache hits", "counter", stats["hits"]),
+        ("pathviz_cache_misses_total", "Result cache misses", "counter", stats["misses"]),
+        ("pathviz_cache_bytes", "Bytes held by the result cache", "gauge", stats["bytes"]),
+    ]
+
+registry.collectors += [pool_samples, cache_samples]
+
+# Seconds a client is asked to wait after a 503 from a saturated pool
+RETRY_AFTER = os.environ.get("SOLVER_RETRY_AFTER", "1")
+
+# Responses at least this large are compressed for clients that accept it
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", MIN_SIZE))
+
+# Bodies larger than this are compressed on a thread instead of the event loop
+COMPRESS_INLINE_BYTES = 64 * 1024
+
+# Caps on every search; 0 means none. Requests can ask for less with
+# ?max_nodes= and ?deadline_ms=, and get back what was visited so far,
+# marked as truncated, when a search runs out
+SEARCH_MAX_NODES = int(os.environ.get("SEARCH_MAX_NODES", 0)) or None
+SEARCH_DEADLINE_MS = float(os.environ.get("SEARCH_DEADLINE_MS", 0)) or None
+
+# Profiling is off unless a token is configured. A solve sent with it in
+# X-Profile-Token (or ?profile_token=) runs under cProfile and tracemalloc,
+# and the capture is kept with its request for the admin endpoints, which
+# want the same token
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN") or None
+profile_store = ProfileStore(
+    int(os.environ.get("PROFILE_CAPTURES", 16)),
+    int(os.environ.get("PROFILE_BYTES", 64 * 1024 * 1024)),
 )
 
 class GridRequest(BaseModel):
@@ -35,20 +143,112 @@ class GridRequest(BaseModel):
     end: int
     rows: int
     cols: int
+    # Cost of stepping onto each cell, 1..255; omitted means every step costs 1
+    weights: Optional[List[int]] = None
+
+class StoredGridRequest(BaseModel):
+    grid_id: str
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+class SessionGridRequest(BaseModel):
+    session_id: str
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+class SessionUpdate(BaseModel):
+    toggle: List[int] = []
+    start: Optional[int] = None
+    end: Optional[int] = None
+    version: Optional[int] = None
+
+class SessionResponse(BaseModel):
+    session_id: str
+    rows: int
+    cols: int
+    start: int
+    end: int
+    version: int
+
+class GridSpec(BaseModel):
+    generator: str
+    rows: int
+    cols: int
+    seed: int
 
 class MazeRequest(BaseModel):
     start: int
     end: int
     rows: int
     cols: int
+    seed: Optional[int] = None
+    include_order: bool = False
+    create_session: bool = False
 
 class PathResponse(BaseModel):
     visited_order: List[int]
     path_indexes: List[int]
-    grid: List[int]
+    # Only sent back with ?echo_grid=true
+    grid: Optional[List[int]] = None
+    # Set when a node budget, deadline or disconnect stopped the search early
+    truncated: bool = False
 
 class MazeResponse(BaseModel):
     grid: List[int]
+    seed: int
+    carve_order: Optional[List[int]] = None
+    session_id: Optional[str] = None
+
+class ReplanRequest(BaseModel):
+    add_walls: List[int] = []
+    remove_walls: List[int] = []
+
+class ReplanResponse(BaseModel):
+    session_id: str
+    visited_order: List[int]
+    path_indexes: List[int]
+    truncated: bool = False
+
+class CompareRequest(GridRequest):
+    algorithms: List[str]
+
+class GridReference(BaseModel):
+    """A grid sent inline, or named by library id or grid session"""
+    grid: Optional[List[int]] = None
+    rows: Optional[int] = None
+    cols: Optional[int] = None
+    grid_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+class BatchRequest(GridReference):
+    queries: List[Tuple[int, int]]
+    paths: bool = False
+
+class DistanceFieldRequest(GridReference):
+    sources: List[int]
+    flow: bool = False
+    weights: Optional[List[int]] = None
+
+class BatchResponse(BaseModel):
+    path_lengths: List[int]
+    paths: Optional[List[List[int]]] = None
+    trees: int
+    elapsed_ms: float
+    # Set when a node budget or deadline stopped a search tree early
+    truncated: bool = False
+
+class AlgorithmResult(BaseModel):
+    algorithm: str
+    visited_count: int
+    path_length: int
+    found: bool
+    elapsed_ms: float
+    expanded_per_second: float
+    truncated: bool = False
+
+class CompareResponse(BaseModel):
+    results: List[AlgorithmResult]
+    elapsed_ms: float
 
 @app.get("/")
 async def root():
@@ -58,118 +258,845 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
-@app.post("/api/dijkstra", response_model=PathResponse)
-async def run_dijkstra(request: GridRequest):
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+@app.get("/api/pool")
+async def pool_stats():
+    return solver_pool.stats()
+
+@app.get("/api/cache")
+async def cache_stats():
+    return result_cache.stats()
+
+# Solve endpoints accept a JSON GridRequest, a StoredGridRequest naming a grid in
+# the library, a SessionGridRequest naming a grid session, or the packed binary
+# format from codec.py, and answer in binary when the client sends
+# Accept: application/octet-stream
+SOLVE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"anyOf": [
+                GridRequest.model_json_schema(),
+                StoredGridRequest.model_json_schema(),
+                SessionGridRequest.model_json_schema(),
+            ]}},
+            BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+async def read_grid(request: Request, timer: Optional[StageTimer] = None) -> Tuple[np.ndarray, int, int, int, int]:
+    """
+    Parse a solve request body for an endpoint that only handles unit costs
+    Returns: (grid, start, end, rows, cols)
+    """
+    grid, start, end, rows, cols, weights = await read_weighted_grid(request, timer)
+    if weights is not None:
+        raise HTTPException(status_code=400, detail="This endpoint does not support weighted grids")
+    return grid, start, end, rows, cols
+
+async def read_weighted_grid(request: Request, timer: Optional[StageTimer] = None) -> Tuple[np.ndarray, int, int, int, int, Optional[np.ndarray]]:
+    """
+    Parse a solve request body in either supported format
+    Returns: (grid, start, end, rows, cols, weights or None)
+    """
+    timer = timer or StageTimer()
+    with timer.stage("receive"):
+        body = await request.body()
+
+    if request.headers.get("content-type", "").startswith(BINARY_MEDIA_TYPE):
+        try:
+            with timer.stage("parse"):
+                grid, start, end, rows, cols = decode_grid(body)
+                weights = decode_weights(body)
+                if weights is not None:
+                    weights = check_weights(weights, rows, cols)
+            return grid, start, end, rows, cols, weights
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        grid = np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
-        visited_order, path_indexes = dijkstra_grid(
-            grid, request.start, request.end, request.rows, request.cols
-        )
-        return PathResponse(
-            visited_order=visited_order,
-            path_indexes=path_indexes,
-            grid=grid.flatten().tolist()
-        )
+        with timer.stage("parse"):
+            data = GridRequest.model_validate_json(body)
+    except ValidationError as e:
+        # Not a full grid, so it may name one held on the server instead
+        for model, load in ((StoredGridRequest, load_stored), (SessionGridRequest, load_session)):
+            try:
+                reference = model.model_validate_json(body)
+            except ValidationError:
+                continue
+            return load(reference, timer) + (None,)
+        raise RequestValidationError(e.errors())
+    try:
+        with timer.stage("reshape"):
+            grid = np.array(data.grid, dtype=np.int32).reshape(data.rows, data.cols)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    weights = None
+    if data.weights is not None:
+        try:
+            weights = check_weights(data.weights, data.rows, data.cols)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return grid, data.start, data.end, data.rows, data.cols, weights
 
-@app.post("/api/astar", response_model=PathResponse)
-async def run_astar(request: GridRequest):
+def load_stored(request: StoredGridRequest, timer: StageTimer) -> Tuple[np.ndarray, int, int, int, int]:
+    """
+    Load a library grid, defaulting start and end to the ones stored with it
+    Returns: (grid, start, end, rows, cols)
+    """
     try:
-        grid = np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
-        visited_order, path_indexes = astar_grid(
-            grid, request.start, request.end, request.rows, request.cols
-        )
-        return PathResponse(
-            visited_order=visited_order,
-            path_indexes=path_indexes,
-            grid=grid.flatten().tolist()
+        with timer.stage("load"):
+            grid, meta = grid_library.load(request.grid_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown grid: {request.grid_id}")
+    rows, cols = meta["rows"], meta["cols"]
+    start = meta["start"] if request.start is None else request.start
+    end = meta["end"] if request.end is None else request.end
+    if not (0 <= start < rows * cols and 0 <= end < rows * cols):
+        raise HTTPException(status_code=400, detail="start and end must be inside the grid")
+    return grid, start, end, rows, cols
+
+def load_session(request: "SessionGridRequest", timer: StageTimer) -> Tuple[np.ndarray, int, int, int, int]:
+    """
+    Snapshot a grid session, letting the request override its start and end
+    Returns: (grid, start, end, rows, cols)
+    """
+    session = get_grid_session(request.session_id)
+    with timer.stage("load"):
+        grid, start, end, rows, cols = session.snapshot()
+    start = start if request.start is None else request.start
+    end = end if request.end is None else request.end
+    if not (0 <= start < rows * cols and 0 <= end < rows * cols):
+        raise HTTPException(status_code=400, detail="start and end must be inside the grid")
+    return grid, start, end, rows, cols
+
+def get_grid_session(session_id: str) -> GridSession:
+    try:
+        return grid_sessions.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+
+def pool_error(e: Exception) -> HTTPException:
+    if isinstance(e, PoolSaturated):
+        return HTTPException(
+            status_code=503,
+            detail="Server is busy, try again shortly",
+            headers={"Retry-After": RETRY_AFTER}
         )
+    if isinstance(e, PoolTimeout):
+        return HTTPException(status_code=504, detail="Search exceeded the time limit")
+    if isinstance(e, JobCancelled):
+        # Nobody is listening, but the status shows up in logs and metrics
+        return HTTPException(status_code=499, detail="Client closed the request")
+    return HTTPException(status_code=500, detail=str(e))
+
+async def offload(fn: Callable, *args, until: Optional[asyncio.Event] = None):
+    """
+    Run CPU-bound work on the solver pool, mapping failures to HTTP errors.
+    With until, fn is passed a cancel token and called off once until is set.
+    """
+    try:
+        if until is not None:
+            return await solver_pool.run_cancellable(fn, *args, until=until)
+        return await solver_pool.run(fn, *args)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise pool_error(e)
+
+@asynccontextmanager
+async def watch_disconnect(request: Request) -> AsyncIterator[asyncio.Event]:
+    """
+    An event set once the client goes away. Only for use after the request
+    body has been read, since it consumes whatever the client sends next.
+    """
+    gone = asyncio.Event()
+
+    async def watch():
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        gone.set()
+
+    task = asyncio.create_task(watch())
+    try:
+        yield gone
+    finally:
+        task.cancel()
+
+def search_limits(request: Request) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Budget for one search: the tighter of the server's caps and the
+    request's ?max_nodes= and ?deadline_ms=
+    Returns: (max_nodes or None, time.monotonic() deadline or None)
+    """
+    try:
+        max_nodes = int(request.query_params["max_nodes"]) if "max_nodes" in request.query_params else None
+        deadline_ms = float(request.query_params["deadline_ms"]) if "deadline_ms" in request.query_params else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="max_nodes and deadline_ms must be numbers")
+    if (max_nodes is not None and max_nodes < 1) or (deadline_ms is not None and not deadline_ms > 0):
+        raise HTTPException(status_code=400, detail="max_nodes and deadline_ms must be positive")
+    max_nodes = min((n for n in (max_nodes, SEARCH_MAX_NODES) if n is not None), default=None)
+    deadline_ms = min((ms for ms in (deadline_ms, SEARCH_DEADLINE_MS) if ms is not None), default=None)
+    return max_nodes, time.monotonic() + deadline_ms / 1000 if deadline_ms is not None else None
+
+def query_flag(request: Request, name: str) -> bool:
+    return request.query_params.get(name, "").lower() in ("1", "true", "yes")
+
+def wants_flood(request: Request) -> bool:
+    """
+    ?flood=true runs the search even when start and end are known to be
+    disconnected, for clients that want to animate it exhausting the region
+    """
+    return query_flag(request, "flood")
+
+def profile_token(request: Request) -> Optional[str]:
+    return request.headers.get("x-profile-token") or request.query_params.get("profile_token")
+
+def check_profile_token(token: Optional[str]):
+    if PROFILE_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if token is None or not secrets.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+def wants_profile(request: Request) -> bool:
+    """
+    Whether to profile this solve. With profiling disabled a token is
+    ignored, so a client that always sends one still gets its result;
+    otherwise a token the server doesn't accept is an error.
+    """
+    token = profile_token(request)
+    if token is None or PROFILE_TOKEN is None:
+        return False
+    check_profile_token(token)
+    return True
+
+def store_profile(request: Request, algorithm: str, grid: np.ndarray, start: int, end: int,
+                  weights: Optional[np.ndarray], worker: dict) -> str:
+    """
+    Keep a solve's profile with the request that produced it, in the
+    binary request format so it can be replayed as it is
+    Returns: capture id
+    """
+    rows, cols = grid.shape
+    capture = {
+        "algorithm": algorithm,
+        "path": request.url.path,
+        "query": "&".join(f"{k}={v}" for k, v in request.query_params.multi_items() if k != "profile_token"),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": rows,
+        "cols": cols,
+        "start": start,
+        "end": end,
+        "weighted": weights is not None,
+        "visited": worker["visited"],
+        "truncated": worker["truncated"],
+        **worker["profile"],
+    }
+    return profile_store.add(capture, encode_grid(grid, start, end, weights))
+
+def coded_etag(etag: str, coding: str) -> str:
+    """Compressed bodies differ byte for byte, so each coding gets its own tag"""
+    return f'{etag[:-1]}-{coding}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag in tags or any(coded_etag(etag, coding) in tags for coding in supported())
 
-@app.post("/api/bfs", response_model=PathResponse)
-async def run_bfs(request: GridRequest):
+async def send(request: Request, body: bytes, media_type: str, headers: Optional[dict] = None,
+               cache_key: Optional[str] = None) -> Response:
+    """
+    Respond with encoded bytes, compressed with the best coding the client
+    accepts once they are large enough to be worth it. With cache_key, the
+    compressed body is kept in the result cache next to the plain one.
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    coding = negotiate(request.headers.get("accept-encoding", "")) if len(body) >= COMPRESS_MIN_BYTES else None
+    if coding is None:
+        return Response(body, media_type=media_type, headers=headers)
+
+    packed = result_cache.peek(f"{cache_key}:{coding}") if cache_key else None
+    if packed is None:
+        if len(body) > COMPRESS_INLINE_BYTES:
+            packed = await asyncio.to_thread(compress, body, coding)
+        else:
+            packed = compress(body, coding)
+        if cache_key:
+            result_cache.put(f"{cache_key}:{coding}", packed)
+    headers["Content-Encoding"] = coding
+    if "ETag" in headers:
+        headers["ETag"] = coded_etag(headers["ETag"], coding)
+    return Response(packed, media_type=media_type, headers=headers)
+
+async def send_json(request: Request, value: dict, headers: Optional[dict] = None) -> Response:
+    """
+    Encode straight to JSON bytes, skipping response_model validation;
+    numpy arrays can be passed as they are
+    """
+    return await send(request, dumps(value), "application/json", headers=headers)
+
+async def solve(request: Request, solver: Callable):
+    """
+    Run a grid solver on a request and encode its result.
+    Results are deterministic, so the ETag is a hash of the inputs: a
+    matching If-None-Match gets a 304 without solving anything, and
+    encoded bodies are served from the result cache when present.
+    """
+    algorithm = SOLVER_NAMES.get(solver, solver.__name__)
+    timer = StageTimer()
+    status = "error"
+    with in_flight.track(algorithm=algorithm):
+        try:
+            response = await run_solve(request, solver, timer)
+            status = str(response.status_code)
+            return response
+        except HTTPException as e:
+            status = str(e.status_code)
+            raise
+        except RequestValidationError:
+            status = "422"
+            raise
+        finally:
+            requests_total.inc(algorithm=algorithm, status=status)
+            request_seconds.observe(sum(timer.stages.values()), algorithm=algorithm)
+            timer.record(stage_seconds, algorithm=algorithm)
+
+async def run_solve(request: Request, solver: Callable, timer: StageTimer) -> Response:
+    algorithm = SOLVER_NAMES.get(solver, solver.__name__)
+    grid, start, end, rows, cols, weights = await read_weighted_grid(request, timer)
+    if weights is not None and algorithm not in WEIGHTED_SOLVERS:
+        raise HTTPException(status_code=400, detail=f"{algorithm} does not support weighted grids")
+    grid_cells.observe(grid.size, algorithm=algorithm)
+    binary = BINARY_MEDIA_TYPE in request.headers.get("accept", "")
+    media_type = BINARY_MEDIA_TYPE if binary else "application/json"
+
+    flood = wants_flood(request)
+    echo_grid = not binary and query_flag(request, "echo_grid")
+    max_nodes, deadline = search_limits(request)
+    # Profiled solves always search, so skip both the 304 and the cache
+    profile = wants_profile(request)
+    variant = solver.__name__ + (":flood" if flood else "") + (":grid" if echo_grid else "")
+
+    with timer.stage("hash"):
+        key = result_key(variant, grid, start, end, media_type, weights)
+    etag = f'"{key}"'
+    if not profile and etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Server-Timing": timer.header()})
+
+    # A finished result is the same whatever budget it was found under, so it is served from the cache regardless
+    body = None if profile else result_cache.get(key)
+    cache_status = "HIT" if body is not None else "BYPASS" if profile else "MISS"
+    truncated = None
+    profile_id = None
+    if body is None:
+        began = time.perf_counter()
+        async with watch_disconnect(request) as gone:
+            body, worker = await offload(solve_job, solver, grid, start, end, rows, cols, binary, weights,
+                                         flood, echo_grid, max_nodes, deadline, profile, until=gone)
+        waited = time.perf_counter() - began - worker["search"] - worker["encode"]
+        timer.add("queue", max(waited, 0.0))
+        timer.add("search", worker["search"])
+        timer.add("encode", worker["encode"])
+        nodes_expanded.inc(worker["visited"], algorithm=algorithm)
+        truncated = worker["truncated"]
+        if truncated is None:
+            result_cache.put(key, body)
+        else:
+            searches_truncated.inc(algorithm=algorithm, reason=truncated)
+        if worker["profile"] is not None:
+            profile_id = store_profile(request, algorithm, grid, start, end, weights, worker)
+
+    headers = {"X-Cache": cache_status}
+    if profile_id is not None:
+        headers["X-Profile-Id"] = profile_id
+    # Partial results depend on timing, so they get neither an ETag nor a cache entry
+    if truncated is None:
+        headers["ETag"] = etag
+    else:
+        headers["X-Search-Truncated"] = truncated
+    with timer.stage("compress"):
+        response = await send(request, body, media_type, headers=headers,
+                              cache_key=key if truncated is None else None)
+    # Set last so the header includes the compress stage
+    response.headers["Server-Timing"] = timer.header()
+    return response
+
+@app.post("/api/dijkstra", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_dijkstra(request: Request):
+    return await solve(request, dijkstra_grid)
+
+@app.post("/api/astar", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_astar(request: Request):
+    return await solve(request, astar_grid)
+
+@app.post("/api/bfs", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_bfs(request: Request):
+    return await solve(request, bfs_grid)
+
+@app.post("/api/dfs", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_dfs(request: Request):
+    return await solve(request, dfs_grid)
+
+@app.post("/api/greedy-bfs", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_greedy_bfs(request: Request):
+    return await solve(request, greedy_bfs_grid)
+
+@app.post("/api/bellman-ford", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_bellman_ford(request: Request):
+    return await solve(request, bellman_ford_grid)
+
+@app.post("/api/bi-swarm", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_bi_swarm(request: Request):
+    return await solve(request, bi_swarm_grid)
+
+@app.post("/api/jps", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_jps(request: Request, scanned: bool = False):
+    """visited_order holds the jump points expanded, or with ?scanned=true every cell jumped over"""
+    return await solve(request, jps_scanned_grid if scanned else jps_grid)
+
+@app.post("/api/hpa", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_hpa(request: Request):
+    """Near-optimal hierarchical search; visited_order holds the abstract nodes expanded"""
+    return await solve(request, hpa_grid)
+
+@app.post("/api/alt", response_model=PathResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def run_alt(request: Request):
+    """A* with landmark lower bounds; landmarks are picked once per grid and cached"""
+    return await solve(request, alt_grid)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def advance(steps: Steps) -> Tuple[bool, object]:
+    """
+    Take one step of a generator in a form that can cross an executor,
+    which can't carry StopIteration
+    Returns: (True, its return value) once it is done, else (False, the value it yielded)
+    """
+    try:
+        return False, next(steps)
+    except StopIteration as done:
+        return True, done.value
+
+class SearchStream(StreamingResponse):
+    """
+    A running solver as newline-delimited JSON:
+    {"visited": [...]} for each chunk, then {"path": [...], "visited_count": n},
+    with "truncated": true if the budget ran out first.
+    Chunks are computed one at a time on the solver pool's stepper. The
+    stream holds a pool slot from the start, and gives it back when the
+    response is over, whether or not it ever began sending, and once no
+    chunk is still being computed. stop must be budget's cancel.
+    """
+
+    def __init__(self, steps: Steps, budget: Budget, stop: threading.Event):
+        self.stop = stop
+        self.budget = budget
+        self.steps = bounded(steps, budget)
+        self.step: Optional[Future] = None
+        self.released = False
+        super().__init__(self.events(), media_type=NDJSON_MEDIA_TYPE)
+
+    async def events(self) -> AsyncIterator[str]:
+        visited_count = 0
+        while True:
+            self.step = solver_pool.stepper.submit(advance, self.steps)
+            try:
+                done, value = await asyncio.wrap_future(self.step)
+            except Exception as e:
+                yield json.dumps({"error": str(e)}) + "\n"
+                return
+            if done:
+                event = {"path": value, "visited_count": visited_count}
+                if self.budget.truncated:
+                    event["truncated"] = True
+                    searches_truncated.inc(algorithm="stream", reason=self.budget.reason)
+                yield json.dumps(event) + "\n"
+                return
+            visited_count += len(value)
+            yield json.dumps({"visited": value}) + "\n"
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        self.stop.set()
+        if self.step is None or self.step.done():
+            solver_pool.release()
+        else:
+            self.step.add_done_callback(lambda _: solver_pool.release())
+
+@app.post("/api/{algorithm}/stream", openapi_extra=SOLVE_REQUEST_BODY)
+async def stream_algorithm(algorithm: str, request: Request):
+    steps = SOLVER_STEPS.get(algorithm)
+    if steps is None:
+        raise HTTPException(status_code=404, detail=f"Unknown algorithm: {algorithm}")
+    grid, start, end, rows, cols, weights = await read_weighted_grid(request)
+    if weights is not None and algorithm not in WEIGHTED_SOLVERS:
+        raise HTTPException(status_code=400, detail=f"{algorithm} does not support weighted grids")
+    args = (grid, start, end, rows, cols) + ((weights,) if weights is not None else ())
+    max_nodes, deadline = search_limits(request)
+    # The pool timeout is the longest any stream may hold a slot
+    deadline = min(time.monotonic() + solver_pool.timeout, deadline or float("inf"))
+    if not solver_pool.admit():
+        raise pool_error(PoolSaturated())
+    try:
+        reachable = wants_flood(request) or await asyncio.wrap_future(
+            solver_pool.stepper.submit(connected, grid, start, end, rows, cols))
+    except BaseException:
+        solver_pool.release()
+        raise
+    if not reachable:
+        solver_pool.release()
+        no_path = json.dumps({"path": [], "visited_count": 0}) + "\n"
+        return StreamingResponse(iter([no_path]), media_type=NDJSON_MEDIA_TYPE)
+    stop = threading.Event()
+    budget = Budget(max_nodes, deadline, stop)
+    kwargs = {"budget": budget} if algorithm in BUDGETED_STEPS else {}
+    return SearchStream(steps(*args, **kwargs), budget, stop)
+
+@app.post("/api/compare", response_model=CompareResponse)
+async def compare_algorithms(request: CompareRequest, http_request: Request):
+    unknown = [name for name in request.algorithms if name not in SOLVERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithms: {', '.join(unknown)}")
+    weights = None
+    if request.weights is not None:
+        unweighted = [name for name in request.algorithms if name not in WEIGHTED_SOLVERS]
+        if unweighted:
+            raise HTTPException(status_code=400, detail=f"Not supported on weighted grids: {', '.join(unweighted)}")
+        try:
+            weights = check_weights(request.weights, request.rows, request.cols)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    max_nodes, deadline = search_limits(http_request)
     try:
+        began = time.perf_counter()
         grid = np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
-        visited_order, path_indexes = bfs_grid(
-            grid, request.start, request.end, request.rows, request.cols
-        )
-        return PathResponse(
-            visited_order=visited_order,
-            path_indexes=path_indexes,
-            grid=grid.flatten().tolist()
-        )
+        async with watch_disconnect(http_request) as gone:
+            results = await compare(solver_pool, grid, request.start, request.end, request.algorithms,
+                                    max_nodes, deadline, gone, weights)
+        for result in results:
+            stage_seconds.observe(result["elapsed_ms"] / 1000, algorithm=result["algorithm"], stage="search")
+            nodes_expanded.inc(result["visited_count"], algorithm=result["algorithm"])
+        elapsed_ms = (time.perf_counter() - began) * 1000
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise pool_error(e)
+    return await send_json(http_request, {"results": results, "elapsed_ms": elapsed_ms})
 
-@app.post("/api/dfs", response_model=PathResponse)
-async def run_dfs(request: GridRequest):
+def resolve_grid(request: GridReference) -> np.ndarray:
+    """
+    Resolve a grid sent inline or named by library id or session
+    Returns: the grid as a rows x cols array
+    """
+    timer = StageTimer()
+    if request.grid_id is not None:
+        return load_stored(StoredGridRequest(grid_id=request.grid_id), timer)[0]
+    if request.session_id is not None:
+        return load_session(SessionGridRequest(session_id=request.session_id), timer)[0]
+    if request.grid is None or request.rows is None or request.cols is None:
+        raise HTTPException(status_code=400, detail="Send grid, rows and cols, a grid_id or a session_id")
     try:
-        grid = np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
-        visited_order, path_indexes = dfs_grid(
-            grid, request.start, request.end, request.rows, request.cols
-        )
-        return PathResponse(
-            visited_order=visited_order,
-            path_indexes=path_indexes,
-            grid=grid.flatten().tolist()
-        )
+        return np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/batch", response_model=BatchResponse)
+async def batch_queries(request: BatchRequest, http_request: Request):
+    """
+    Answer many (start, end) pairs against one grid in one call. Path
+    lengths count cells, so 0 means no path. Takes ?max_nodes= and
+    ?deadline_ms= like a solve, for each search tree; queries a tree was
+    cut short before answering get -1, and the batch is marked as
+    truncated. Clients that accept application/octet-stream and don't ask
+    for paths get the lengths as raw little-endian int32s.
+    """
+    grid = resolve_grid(request)
+    size = grid.size
+    bad = [i for i, (start, end) in enumerate(request.queries) if not (0 <= start < size and 0 <= end < size)]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Queries outside the grid: {bad[:10]}")
+    max_nodes, deadline = search_limits(http_request)
+    began = time.perf_counter()
+    try:
+        async with watch_disconnect(http_request) as gone:
+            lengths, paths, trees, truncated = await batch_solve(solver_pool, grid, request.queries, request.paths,
+                                                                 max_nodes, deadline, gone)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise pool_error(e)
+    elapsed_ms = (time.perf_counter() - began) * 1000
+    stage_seconds.observe(elapsed_ms / 1000, algorithm="batch", stage="search")
+    headers = {}
+    if truncated is not None:
+        headers["X-Search-Truncated"] = truncated
+        searches_truncated.inc(algorithm="batch", reason=truncated)
 
-@app.post("/api/greedy-bfs", response_model=PathResponse)
-async def run_greedy_bfs(request: GridRequest):
+    if not request.paths and BINARY_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        headers.update({"X-Trees": str(trees), "X-Elapsed-Ms": f"{elapsed_ms:.3f}"})
+        return Response(np.asarray(lengths, dtype="<i4").tobytes(), media_type=BINARY_MEDIA_TYPE, headers=headers)
+    return await send_json(http_request, {"path_lengths": lengths, "paths": paths, "trees": trees,
+                                          "elapsed_ms": elapsed_ms, "truncated": truncated is not None},
+                           headers=headers)
+
+@app.post("/api/distance-field")
+async def compute_distance_field(request: DistanceFieldRequest, http_request: Request):
+    """
+    Distance from every cell to the nearest of the sources, in BFS steps or,
+    with weights, in path cost; -1 where unreachable. With flow, also the
+    direction (an index into right, down, left, up; 255 for none) each cell
+    should step in to follow a shortest path. Clients that accept
+    application/octet-stream get the compact binary layout from codec.py.
+    Takes ?max_nodes= and ?deadline_ms= like a solve; a field cut short
+    leaves the cells it didn't reach at -1 and is marked as truncated.
+    """
+    grid = resolve_grid(request)
+    rows, cols = grid.shape
+    if not request.sources:
+        raise HTTPException(status_code=400, detail="Send at least one source")
+    bad = [s for s in request.sources if not 0 <= s < grid.size]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Sources outside the grid: {bad[:10]}")
+    weights = None
+    if request.weights is not None:
+        try:
+            weights = check_weights(request.weights, rows, cols)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    max_nodes, deadline = search_limits(http_request)
+    binary = BINARY_MEDIA_TYPE in http_request.headers.get("accept", "")
+    timer = StageTimer()
+    began = time.perf_counter()
+    async with watch_disconnect(http_request) as gone:
+        body, worker = await offload(field_job, grid, rows, cols, request.sources, weights, request.flow, binary,
+                                     max_nodes, deadline, until=gone)
+    timer.add("queue", max(time.perf_counter() - began - worker["search"] - worker["encode"], 0.0))
+    timer.add("search", worker["search"])
+    timer.add("encode", worker["encode"])
+    timer.record(stage_seconds, algorithm="distance-field")
+    headers = {"Server-Timing": timer.header()}
+    if worker["truncated"] is not None:
+        headers["X-Search-Truncated"] = worker["truncated"]
+        searches_truncated.inc(algorithm="distance-field", reason=worker["truncated"])
+    return await send(http_request, body, BINARY_MEDIA_TYPE if binary else "application/json", headers=headers)
+
+@app.post("/api/sessions", response_model=SessionResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def create_session(request: Request):
+    """
+    Upload a grid once, in any solve request format. Solve endpoints then
+    take {"session_id": ...} in place of the grid.
+    """
+    grid, start, end, rows, cols = await read_grid(request)
+    if not (0 <= start < rows * cols and 0 <= end < rows * cols):
+        raise HTTPException(status_code=400, detail="start and end must be inside the grid")
+    session = GridSession(grid, start, end)
+    return SessionResponse(session_id=grid_sessions.create(session), **session.describe())
+
+@app.get("/api/sessions")
+async def session_stats():
+    return grid_sessions.stats()
+
+@app.get("/api/sessions/{session_id}", response_model=SessionResponse)
+async def read_session(session_id: str):
+    return SessionResponse(session_id=session_id, **get_grid_session(session_id).describe())
+
+@app.patch("/api/sessions/{session_id}", response_model=SessionResponse)
+async def update_session(session_id: str, update: SessionUpdate):
+    """Flip the toggled cells between wall and open, and optionally move start and end"""
+    session = get_grid_session(session_id)
     try:
-        grid = np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
-        visited_order, path_indexes = greedy_bfs_grid(
-            grid, request.start, request.end, request.rows, request.cols
-        )
-        return PathResponse(
-            visited_order=visited_order,
-            path_indexes=path_indexes,
-            grid=grid.flatten().tolist()
-        )
+        state = session.update(update.toggle, update.start, update.end, update.version)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SessionResponse(session_id=session_id, **state)
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if not grid_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    return {"deleted": session_id}
+
+# Planners live in this process, so their work runs on the solver pool's
+# threads rather than its worker processes, one request at a time per session
+def plan_replan(planner: LPAStar, max_nodes: Optional[int], deadline: Optional[float],
+                cancel: CancelToken) -> Tuple[List[int], List[int], Optional[str]]:
+    """
+    Bring a planner up to date within the request's limits. An end cut
+    off from the start is answered from the component index without
+    repairing anything; the edits wait for a plan that can use them.
+    Returns: (visited_order, path_indexes, truncated reason or None)
+    """
+    g = planner.g
+    start, end = g.index(planner.source), g.index(planner.target)
+    if not connected(planner.walls(), start, end, g.rows, g.cols):
+        return [], [], None
+    budget = Budget(max_nodes, deadline, cancel)
+    visited_order, path_indexes = planner.plan(budget)
+    return visited_order, path_indexes, budget.reason
+
+def start_replan(grid: np.ndarray, start: int, end: int, rows: int, cols: int, max_nodes: Optional[int],
+                 deadline: Optional[float], cancel: CancelToken):
+    planner = LPAStar(grid, start, end, rows, cols)
+    return planner, plan_replan(planner, max_nodes, deadline, cancel)
+
+def apply_replan(session: Tuple[LPAStar, threading.Lock], add_walls: List[int], remove_walls: List[int],
+                 max_nodes: Optional[int], deadline: Optional[float], cancel: CancelToken):
+    planner, lock = session
+    with lock:
+        planner.set_cells(add_walls, remove_walls)
+        return plan_replan(planner, max_nodes, deadline, cancel)
+
+def replan_result(session_id: str, visited_order: List[int], path_indexes: List[int],
+                  truncated: Optional[str]) -> dict:
+    result = {"session_id": session_id, "visited_order": visited_order, "path_indexes": path_indexes}
+    if truncated is not None:
+        # The session keeps what was done, so the next edit carries on from there
+        result["truncated"] = True
+        searches_truncated.inc(algorithm="replan", reason=truncated)
+    return result
+
+@app.post("/api/replan", response_model=ReplanResponse, openapi_extra=SOLVE_REQUEST_BODY)
+async def create_replan(request: Request):
+    """
+    Plan a path and keep the search around, so later wall edits sent to
+    /api/replan/{session_id} only repair what changed
+    """
+    grid, start, end, rows, cols = await read_grid(request)
+    if not (0 <= start < rows * cols and 0 <= end < rows * cols):
+        raise HTTPException(status_code=400, detail="start and end must be inside the grid")
+    max_nodes, deadline = search_limits(request)
+    try:
+        async with watch_disconnect(request) as gone:
+            planner, result = await solver_pool.run_local(start_replan, grid, start, end, rows, cols,
+                                                          max_nodes, deadline, until=gone)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise pool_error(e)
+    session_id = replan_sessions.create((planner, threading.Lock()))
+    return await send_json(request, replan_result(session_id, *result))
 
-@app.post("/api/bellman-ford", response_model=PathResponse)
-async def run_bellman_ford(request: GridRequest):
+@app.post("/api/replan/{session_id}", response_model=ReplanResponse)
+async def update_replan(session_id: str, request: ReplanRequest, http_request: Request):
+    """Apply wall edits; visited_order holds only the cells re-expanded to repair the path"""
     try:
-        grid = np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
-        visited_order, path_indexes = bellman_ford_grid(
-            grid, request.start, request.end, request.rows, request.cols
-        )
-        return PathResponse(
-            visited_order=visited_order,
-            path_indexes=path_indexes,
-            grid=grid.flatten().tolist()
-        )
+        session = replan_sessions.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    max_nodes, deadline = search_limits(http_request)
+    try:
+        async with watch_disconnect(http_request) as gone:
+            result = await solver_pool.run_local(apply_replan, session, request.add_walls, request.remove_walls,
+                                                 max_nodes, deadline, until=gone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise pool_error(e)
+    return await send_json(http_request, replan_result(session_id, *result))
+
+@app.delete("/api/replan/{session_id}")
+async def delete_replan(session_id: str):
+    if not replan_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    return {"deleted": session_id}
+
+@app.get("/api/replan")
+async def replan_stats():
+    return replan_sessions.stats()
 
-@app.post("/api/bi-swarm", response_model=PathResponse)
-async def run_bi_swarm(request: GridRequest):
+@app.get("/api/grids")
+async def list_grids():
+    return grid_library.list()
+
+@app.post("/api/grids")
+async def create_grid(spec: GridSpec):
     try:
-        grid = np.array(request.grid, dtype=np.int32).reshape(request.rows, request.cols)
-        visited_order, path_indexes = bi_swarm_grid(
-            grid, request.start, request.end, request.rows, request.cols
-        )
-        return PathResponse(
-            visited_order=visited_order,
-            path_indexes=path_indexes,
-            grid=grid.flatten().tolist()
-        )
+        return await solver_pool.run(grid_library.generate, spec.generator, spec.rows, spec.cols, spec.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise pool_error(e)
+
+@app.get("/api/grids/{grid_id}")
+async def download_grid(grid_id: str):
+    """The stored file is itself a binary solve request body"""
+    try:
+        meta = grid_library.describe(grid_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown grid: {grid_id}")
+    return FileResponse(grid_library.path(grid_id), media_type=BINARY_MEDIA_TYPE, headers={
+        "X-Grid-Rows": str(meta["rows"]),
+        "X-Grid-Cols": str(meta["cols"]),
+    })
 
 @app.post("/api/maze", response_model=MazeResponse)
-async def create_maze(request: MazeRequest):
+async def create_maze(request: MazeRequest, http_request: Request):
+    if request.seed is not None and request.seed < 0:
+        raise HTTPException(status_code=400, detail="seed must be non-negative")
+    # Pick the seed here so the client can regenerate the same maze later
+    seed = request.seed if request.seed is not None else secrets.randbits(32)
+    order = None
+    if request.include_order:
+        grid, order = await offload(generate_maze_with_order, request.rows, request.cols, request.start, request.end, seed)
+    else:
+        grid = await offload(generate_maze, request.rows, request.cols, request.start, request.end, seed)
+    # A session lets the client solve the maze without uploading it again
+    session_id = None
+    if request.create_session:
+        session_id = grid_sessions.create(GridSession(grid, request.start, request.end))
+    return await send_json(http_request, {
+        "grid": grid.reshape(-1),
+        "seed": seed,
+        "carve_order": order,
+        "session_id": session_id,
+    })
+
+def get_profile(request: Request, capture_id: str) -> Tuple[dict, bytes]:
+    check_profile_token(profile_token(request))
     try:
-        grid = generate_maze(request.rows, request.cols, request.start, request.end)
-        return MazeResponse(grid=grid.flatten().tolist())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return profile_store.get(capture_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown or dropped profile: {capture_id}")
+
+@app.get("/api/admin/profiles")
+async def list_profiles(request: Request):
+    """Profile captures held, newest first, without their reports"""
+    check_profile_token(profile_token(request))
+    return {**profile_store.stats(), "profiles": profile_store.summaries()}
+
+@app.get("/api/admin/profiles/{capture_id}")
+async def read_profile(capture_id: str, request: Request):
+    """One capture: timings, peak memory, the cumulative-time report and the top allocation sites"""
+    capture, _ = get_profile(request, capture_id)
+    return {"id": capture_id, **{k: v for k, v in capture.items() if k != "pstats"}}
+
+@app.get("/api/admin/profiles/{capture_id}/request")
+async def read_profile_request(capture_id: str, request: Request):
+    """
+    The profiled request in the binary request format, ready to POST again
+    or to replay with python -m benchmarks --replay
+    """
+    _, body = get_profile(request, capture_id)
+    return Response(body, media_type=BINARY_MEDIA_TYPE,
+                    headers={"Content-Disposition": f'attachment; filename="{capture_id}.bin"'})
+
+@app.get("/api/admin/profiles/{capture_id}/pstats")
+async def read_profile_stats(capture_id: str, request: Request):
+    """Raw cProfile stats, for pstats.Stats or snakeviz"""
+    capture, _ = get_profile(request, capture_id)
+    return Response(capture["pstats"], media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{capture_id}.prof"'})
 
 if __name__ == "__main__":
     import uvicorn
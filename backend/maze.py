@@ -1,53 +1,108 @@
 import numpy as np
-import random
-from typing import Tuple
+from typing import Iterator, List, Optional, Tuple
 
-def generate_maze(rows: int, cols: int, start: int, end: int) -> np.ndarray:
+# Maze rows carved per vectorized step; bounds working memory to one band
+BAND_ROWS = 256
+
+def carve_bands(rows: int, cols: int, seed: Optional[int] = None, with_order: bool = True) -> Iterator[Tuple[int, np.ndarray, Optional[np.ndarray]]]:
     """
-    Generate a maze using depth-first search
-    Returns: maze grid as numpy array
+    Sidewinder maze carved one band of rows at a time.
+    Maze cells sit at odd (row, col). Each maze row is split into random
+    runs joined east-west, and every run opens one passage north into the
+    row above (the top row is a single run), which gives a perfect maze
+    without any cross-row bookkeeping.
+    Yields: (first grid row of the band, band of the grid, carve order as grid indexes or None)
+    """
+    rng = np.random.default_rng(seed)
+    maze_rows = rows // 2
+    maze_cols = cols // 2
+
+    for first in range(0, maze_rows, BAND_ROWS):
+        count = min(BAND_ROWS, maze_rows - first)
+        # Grid rows 2 * first .. 2 * (first + count): a north-passage row above every cell row
+        band = np.ones((2 * count, cols), dtype=np.uint8)
+
+        east = rng.integers(0, 2, (count, maze_cols - 1), dtype=np.uint8).view(bool)
+        if first == 0:
+            east[0] = True
+        priority = rng.random((count, maze_cols), dtype=np.float32)
+
+        # Runs are contiguous in row-major order, so one reduceat finds each run's pick
+        run_start = np.ones((count, maze_cols), dtype=bool)
+        run_start[:, 1:] = ~east
+        starts = np.flatnonzero(run_start)
+        run_id = np.cumsum(run_start.reshape(-1)) - 1
+        best = np.maximum.reduceat(priority.reshape(-1), starts)
+        north = (priority.reshape(-1) == best[run_id]).reshape(count, maze_cols)
+        if first == 0:
+            north[0] = False
+
+        band[1::2, 1:2 * maze_cols:2] = 0
+        band[1::2, 2:2 * maze_cols - 1:2][east] = 0
+        band[0::2, 1:2 * maze_cols:2][north] = 0
+
+        carve = None
+        if with_order:
+            # Each cell row left to right, then the passages it opened north
+            order = np.arange(2 * count).reshape(count, 2)[:, ::-1].reshape(-1)
+            r, c = np.nonzero(band[order] == 0)
+            carve = (2 * first + order[r]) * cols + c
+
+        yield 2 * first, band, carve
+
+def open_endpoint(grid: np.ndarray, idx: int, cols: int) -> List[int]:
+    """
+    Open a start/end cell and, if it isn't a maze cell, the one or two cells
+    linking it to the nearest maze cell
+    Returns: grid indexes opened
+    """
+    rows = grid.shape[0]
+    r, c = divmod(idx, cols)
+    opened = [(r, c)]
+    if rows > 2 and cols > 2:
+        mr = r if r % 2 == 1 else (r - 1 if r > 0 else r + 1)
+        mc = c if c % 2 == 1 else (c - 1 if c > 0 else c + 1)
+        mr = min(mr, 2 * (rows // 2) - 1)
+        mc = min(mc, 2 * (cols // 2) - 1)
+        opened += [(mr, c), (mr, mc)]
+    cells = []
+    for cell in opened:
+        if grid[cell] != 0:
+            grid[cell] = 0
+            cells.append(cell[0] * cols + cell[1])
+    return cells
+
+def build_maze(rows: int, cols: int, start: int, end: int, seed: Optional[int], with_order: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Assemble the carved bands into one grid and connect start and end to it
+    Returns: (maze grid, carve order or None)
     """
-    # Initialize all cells as walls
-    grid = np.ones((rows, cols), dtype=np.int32)
-    
-    start_pos = (start // cols, start % cols)
-    end_pos = (end // cols, end % cols)
-    
-    # Make start and end positions open
-    grid[start_pos] = 0
-    grid[end_pos] = 0
-    
-    # Start maze generation from (1, 1)
+    grid = np.ones((rows, cols), dtype=np.uint8)
+    chunks = []
+
     if rows > 2 and cols > 2:
-        start_maze = (1, 1)
-        grid[start_maze] = 0
-        
-        stack = [start_maze]
-        directions = [(0, 2), (2, 0), (0, -2), (-2, 0)]
-        
-        while stack:
-            current = stack[-1]
-            neighbors = []
-            
-            for dy, dx in directions:
-                ny, nx = current[0] + dy, current[1] + dx
-                
-                if 0 <= ny < rows and 0 <= nx < cols and grid[ny, nx] == 1:
-                    neighbors.append((ny, nx))
-            
-            if neighbors:
-                next_cell = random.choice(neighbors)
-                # Carve path
-                wall_y = (current[0] + next_cell[0]) // 2
-                wall_x = (current[1] + next_cell[1]) // 2
-                grid[wall_y, wall_x] = 0
-                grid[next_cell] = 0
-                stack.append(next_cell)
-            else:
-                stack.pop()
-    
-    # Ensure start and end are accessible
-    grid[start_pos] = 0
-    grid[end_pos] = 0
-    
-    return grid
\ No newline at end of file
+        for top, band, carve in carve_bands(rows, cols, seed, with_order):
+            grid[top:top + len(band)] = band
+            chunks.append(carve)
+
+    # Ensure start and end are open and reachable
+    opened = open_endpoint(grid, start, cols) + open_endpoint(grid, end, cols)
+    if not with_order:
+        return grid, None
+    chunks.append(np.array(opened, dtype=np.int64))
+    return grid, np.concatenate(chunks)
+
+def generate_maze_with_order(rows: int, cols: int, start: int, end: int, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate a maze and the order its cells were carved in
+    Returns: (maze grid as numpy array, carve order as grid indexes)
+    """
+    return build_maze(rows, cols, start, end, seed, with_order=True)
+
+def generate_maze(rows: int, cols: int, start: int, end: int, seed: Optional[int] = None) -> np.ndarray:
+    """
+    Generate a maze using the Sidewinder algorithm
+    Returns: maze grid as numpy array
+    """
+    grid, _ = build_maze(rows, cols, start, end, seed, with_order=False)
+    return grid
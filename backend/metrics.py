@@ -0,0 +1,185 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CELL_BUCKETS = tuple(4 ** k for k in range(4, 13))  # 256 .. 16M cells
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return self.header() + [
+                f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                for key, value in sorted(self._values.items())
+            ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in progress"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total[0])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    """
+    Holds metrics and renders them in the Prometheus text exposition format.
+    Collectors are callables run at scrape time that return extra
+    (name, help, kind, value) samples, for counters kept elsewhere.
+    """
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], List[Tuple[str, str, str, float]]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for name, help, kind, value in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+class StageTimer:
+    """
+    Wall time of each stage of one request, reported as a Server-Timing
+    header and recorded into a per-stage latency histogram
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - began)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items())
+
+    def record(self, histogram: Histogram, **labels):
+        for name, seconds in self.stages.items():
+            histogram.observe(seconds, stage=name, **labels)
+
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    "pathviz_stage_duration_seconds",
+    "Time spent in each stage of a solve request",
+    ["algorithm", "stage"],
+))
+request_seconds = registry.register(Histogram(
+    "pathviz_request_duration_seconds",
+    "End-to-end solve request latency",
+    ["algorithm"],
+))
+grid_cells = registry.register(Histogram(
+    "pathviz_grid_cells",
+    "Number of cells in solved grids",
+    ["algorithm"],
+    buckets=CELL_BUCKETS,
+))
+nodes_expanded = registry.register(Counter(
+    "pathviz_nodes_expanded_total",
+    "Cells visited by solvers",
+    ["algorithm"],
+))
+searches_truncated = registry.register(Counter(
+    "pathviz_searches_truncated_total",
+    "Searches stopped by a node budget, deadline or cancellation",
+    ["algorithm", "reason"],
+))
+requests_total = registry.register(Counter(
+    "pathviz_requests_total",
+    "Solve requests by outcome",
+    ["algorithm", "status"],
+))
+in_flight = registry.register(Gauge(
+    "pathviz_requests_in_flight",
+    "Solve requests currently being handled",
+    ["algorithm"],
+))
@@ -0,0 +1,116 @@
+import cProfile
+import io
+import marshal
+import pstats
+import secrets
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+# Rows of the cumulative-time report and allocation sites kept per capture
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 20
+
+# tracemalloc is process-wide, so profiled runs in one process take turns
+_lock = threading.Lock()
+
+def profile_call(fn: Callable, *args, **kwargs) -> Tuple[Any, dict]:
+    """
+    Run fn under cProfile and tracemalloc. Both slow it down, tracemalloc
+    by several times, so seconds is only comparable between profiled runs.
+    Returns: (fn's result, {"seconds", "peak_bytes", "functions" report,
+              "allocations" by line, "pstats" marshalled for pstats.Stats})
+    """
+    profiler = cProfile.Profile()
+    with _lock:
+        tracemalloc.start()
+        try:
+            began = time.perf_counter()
+            profiler.enable()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+            seconds = time.perf_counter() - began
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    allocations = [
+        {"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    ]
+    profiler.create_stats()
+    return result, {
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "functions": report.getvalue(),
+        "allocations": allocations,
+        "pstats": marshal.dumps(profiler.stats),
+    }
+
+class ProfileStore:
+    """
+    The most recent profile captures, each with the request that produced
+    it, bounded by count and by total size. The oldest are dropped first.
+    """
+
+    def __init__(self, max_captures: int, max_bytes: int):
+        self.max_captures = max_captures
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.captured = 0
+        self.evictions = 0
+        self._captures: "OrderedDict[str, Tuple[dict, bytes, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, capture: dict, request: bytes) -> str:
+        """
+        Store a capture from profile_call with the binary request it ran
+        Returns: its id
+        """
+        cid = secrets.token_urlsafe(9)
+        size = len(request) + len(capture["pstats"]) + len(capture["functions"])
+        with self._lock:
+            self._captures[cid] = (capture, request, size)
+            self.bytes += size
+            self.captured += 1
+            while len(self._captures) > self.max_captures or (self.bytes > self.max_bytes and len(self._captures) > 1):
+                _, (_, _, dropped) = self._captures.popitem(last=False)
+                self.bytes -= dropped
+                self.evictions += 1
+        return cid
+
+    def get(self, cid: str) -> Tuple[dict, bytes]:
+        """
+        Look up a capture
+        Returns: (capture, request body); raises KeyError if unknown or dropped
+        """
+        with self._lock:
+            capture, request, _ = self._captures[cid]
+            return capture, request
+
+    def summaries(self) -> List[Dict]:
+        """Every capture without its reports, newest first"""
+        with self._lock:
+            return [
+                {"id": cid, **{k: v for k, v in capture.items() if k not in ("functions", "allocations", "pstats")}}
+                for cid, (capture, _, _) in reversed(self._captures.items())
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "captures": len(self._captures),
+                "max_captures": self.max_captures,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "captured": self.captured,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,144 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+import numpy as np
+
+class SessionStore:
+    """
+    Server-side state kept between requests, bounded by count and dropped
+    after ttl seconds without use. When full, the least recently used
+    session is evicted to make room.
+    """
+
+    def __init__(self, max_sessions: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.clock = clock
+        self.created = 0
+        self.expired = 0
+        self.evictions = 0
+        self._sessions: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        # Oldest first, since every access moves a session to the end
+        while self._sessions:
+            sid, (_, used) = next(iter(self._sessions.items()))
+            if now - used < self.ttl:
+                break
+            del self._sessions[sid]
+            self.expired += 1
+
+    def create(self, value: Any) -> str:
+        """
+        Store a new session
+        Returns: its id
+        """
+        sid = secrets.token_urlsafe(12)
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            self._sessions[sid] = (value, now)
+            self.created += 1
+        return sid
+
+    def get(self, sid: str) -> Any:
+        """
+        Look up a session and mark it used
+        Returns: its value; raises KeyError if unknown or expired
+        """
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            value, _ = self._sessions[sid]
+            self._sessions[sid] = (value, now)
+            self._sessions.move_to_end(sid)
+            return value
+
+    def delete(self, sid: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(sid, None) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(self.clock())
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "created": self.created,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+class VersionConflict(Exception):
+    """Raised when a diff was made against an older version of a grid session"""
+
+class GridSession:
+    """
+    A grid held server-side so clients can send toggled cells instead of
+    the whole grid. Every update bumps version; a client that sends the
+    version it last saw gets a VersionConflict instead of a silently
+    double-applied toggle.
+    """
+
+    def __init__(self, grid: np.ndarray, start: int, end: int):
+        self.grid = np.asarray(grid) == 1
+        self.rows, self.cols = self.grid.shape
+        self.start = start
+        self.end = end
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _check(self, idx: int):
+        if not 0 <= idx < self.rows * self.cols:
+            raise ValueError(f"Cell {idx} is outside the grid")
+
+    def update(self, toggle: List[int], start: Optional[int] = None, end: Optional[int] = None,
+               version: Optional[int] = None) -> dict:
+        """
+        Flip the walls at the toggled indexes and optionally move start and end
+        Returns: the session's new description
+        """
+        for idx in toggle + [i for i in (start, end) if i is not None]:
+            self._check(idx)
+        with self._lock:
+            if version is not None and version != self.version:
+                raise VersionConflict(f"Session is at version {self.version}, not {version}")
+            if toggle:
+                flat = self.grid.reshape(-1)
+                # Toggling a cell twice in one diff leaves it unchanged
+                cells, counts = np.unique(np.asarray(toggle, dtype=np.int64), return_counts=True)
+                flat[cells[counts % 2 == 1]] ^= True
+            if start is not None:
+                self.start = start
+            if end is not None:
+                self.end = end
+            self.version += 1
+            return self._describe()
+
+    def snapshot(self) -> Tuple[np.ndarray, int, int, int, int]:
+        """
+        Copy of the current grid, safe to solve while further diffs arrive
+        Returns: (grid, start, end, rows, cols)
+        """
+        with self._lock:
+            return self.grid.astype(np.uint8), self.start, self.end, self.rows, self.cols
+
+    def _describe(self) -> dict:
+        return {
+            "rows": self.rows,
+            "cols": self.cols,
+            "start": self.start,
+            "end": self.end,
+            "version": self.version,
+        }
+
+    def describe(self) -> dict:
+        with self._lock:
+            return self._describe()
@@ -0,0 +1,36 @@
+import numpy as np
+
+from algorithms import alt
+from algorithms.alt import alt_grid, landmarks_for
+from algorithms.dijkstra import dijkstra_grid
+from algorithms.grid import INF
+from benchmarks.grids import GENERATORS
+
+def test_path_lengths_match_dijkstra():
+    rng = np.random.RandomState(18)
+    for generator in ("empty", "random25", "maze", "rooms"):
+        rows, cols = map(int, rng.randint(40, 90, 2))
+        grid = GENERATORS[generator](rows, cols, 0)
+        open_cells = np.flatnonzero(grid.reshape(-1) != 1)
+        for start, end in rng.choice(open_cells, (8, 2)).tolist():
+            _, expected = dijkstra_grid(grid, start, end, rows, cols)
+            _, path = alt_grid(grid, start, end, rows, cols)
+            assert len(path) == len(expected), (generator, start, end)
+
+def test_fields_are_kept_per_region_and_within_the_byte_cap(monkeypatch):
+    rows, cols = 64, 129
+    grid = np.zeros((rows, cols), dtype=np.int32)
+    grid[:, cols // 2] = 1
+    left, right = 0, cols - 1
+    # Room for one side's landmarks only; the other side falls back to Manhattan distance
+    monkeypatch.setattr(alt, "MAX_FIELD_BYTES", 64 * 64 * 2 * alt.LANDMARKS)
+    landmarks = landmarks_for(grid, rows, cols)
+    g = landmarks.g
+    h = landmarks.heuristic(g.node(left))
+    assert h(g.node(right)) == INF
+    landmarks.heuristic(g.node(right))
+    assert [len(region.nodes) for region in landmarks.regions] == [alt.LANDMARKS, 0]
+    assert landmarks.nbytes <= alt.MAX_FIELD_BYTES
+    for start, end in ((left, 5 * cols + 3), (right, rows * cols - 9)):
+        _, expected = dijkstra_grid(grid, start, end, rows, cols)
+        assert len(alt_grid(grid, start, end, rows, cols)[1]) == len(expected)
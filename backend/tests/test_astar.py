@@ -0,0 +1,62 @@
+import numpy as np
+
+from algorithms.a_star import astar_grid, astar_steps
+from algorithms.dijkstra import dijkstra_grid
+from algorithms.grid import Budget, bounded
+
+def path_cost(weights: np.ndarray, path):
+    return int(weights.reshape(-1)[path[1:]].sum())
+
+def weighted_case(n: int = 64, seed: int = 0):
+    rng = np.random.RandomState(seed)
+    grid = (rng.random_sample((n, n)) < 0.1).astype(np.int32)
+    start, end = (n // 2) * n + 4, (n // 2) * n + n - 5
+    grid.flat[start] = grid.flat[end] = 0
+    # Every cell costs at least 4, so the heuristic can be scaled well past 1
+    weights = rng.randint(4, 7, (n, n)).astype(np.uint8)
+    return grid, start, end, n, weights
+
+def test_weighted_astar_expands_fewer_nodes_than_dijkstra():
+    grid, start, end, n, weights = weighted_case()
+    a_visited, a_path = astar_grid(grid, start, end, n, n, weights)
+    d_visited, d_path = dijkstra_grid(grid, start, end, n, n, weights)
+    assert a_path and path_cost(weights, a_path) == path_cost(weights, d_path)
+    assert len(a_visited) < len(d_visited) / 2
+
+def test_weighted_astar_ignores_weights_under_walls():
+    grid, start, end, n, weights = weighted_case(seed=1)
+    # A cheap weight under a wall must not shrink the heuristic, nor make it inadmissible
+    cheap = weights.copy()
+    cheap[grid == 1] = 1
+    visited, path = astar_grid(grid, start, end, n, n, cheap)
+    expected, _ = astar_grid(grid, start, end, n, n, weights)
+    assert len(visited) == len(expected)
+    assert path_cost(weights, path) == path_cost(weights, dijkstra_grid(grid, start, end, n, n, weights)[1])
+
+def test_weighted_astar_on_a_grid_without_open_cells():
+    grid = np.ones((4, 4), dtype=np.int32)
+    weights = np.full((4, 4), 3, dtype=np.uint8)
+    assert astar_grid(grid, 0, 15, 4, 4, weights)[1] == []
+
+def test_budget_stops_the_search_within_a_cell_of_max_nodes():
+    n = 200
+    grid = np.zeros((n, n), dtype=np.int32)
+    grid[1:, n // 2] = 1
+    steps = astar_steps(grid, n * n - 1, n * (n - 1), n, n)
+    expanded = []
+
+    def counted():
+        room = None
+        while True:
+            try:
+                chunk = steps.send(room)
+            except StopIteration as done:
+                return done.value
+            expanded.extend(chunk)
+            room = yield chunk
+
+    budget = Budget(max_nodes=5000)
+    visited = [node for chunk in bounded(counted(), budget) for node in chunk]
+    assert budget.reason == "nodes"
+    assert len(visited) == 5000
+    assert len(expanded) <= 5001
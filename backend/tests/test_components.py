@@ -0,0 +1,52 @@
+import numpy as np
+
+from algorithms import components
+from algorithms.components import ComponentIndex, index_for, label_components
+
+def same_partition(a: np.ndarray, b: np.ndarray) -> bool:
+    """Whether two labelings group cells the same way, whatever the label numbers"""
+    a, b = a.reshape(-1), b.reshape(-1)
+    if not np.array_equal(a == 0, b == 0):
+        return False
+    pairs = np.unique(np.stack([a, b]), axis=1)
+    return len(np.unique(pairs[0])) == len(np.unique(pairs[1])) == pairs.shape[1]
+
+def test_incremental_labels_match_a_fresh_labeling():
+    rng = np.random.RandomState(7)
+    rows, cols = 48, 64
+    for density in (0.2, 0.4, 0.55):
+        grid = (rng.random_sample((rows, cols)) < density).astype(np.int32)
+        index = ComponentIndex(grid, rows, cols)
+        for _ in range(60):
+            # Few enough cells to be patched in rather than trigger a rebuild
+            cells = rng.randint(0, grid.size, rng.randint(1, 12))
+            grid.flat[cells] = rng.randint(0, 2, len(cells))
+            index.update(grid)
+            fresh, _ = label_components(grid != 1)
+            assert same_partition(index.labels, fresh)
+
+def test_walls_across_a_corridor_split_it():
+    grid = np.ones((3, 9), dtype=np.int32)
+    grid[1] = 0
+    index = ComponentIndex(grid, 3, 9)
+    assert index.connected(9, 17)
+    grid[1, 4] = 1
+    index.update(grid)
+    assert not index.connected(9, 17)
+    grid[1, 4] = 0
+    index.update(grid)
+    assert index.connected(9, 17)
+
+def test_grids_of_the_same_size_stay_cached_side_by_side():
+    rng = np.random.RandomState(4)
+    first = (rng.random_sample((30, 30)) < 0.4).astype(np.int32)
+    second = first.copy()
+    second[10, :] = 1
+    components._cache.clear()
+    with components._lock:
+        a = index_for(first, 30, 30)
+        b = index_for(second, 30, 30)
+        assert a is not b and len(components._cache) == 2
+        assert index_for(first, 30, 30) is a
+    assert same_partition(a.labels, label_components(first != 1)[0])
+    assert same_partition(b.labels, label_components(second != 1)[0])
@@ -0,0 +1,68 @@
+import numpy as np
+
+from algorithms import hpa
+from algorithms.bfs import bfs_grid
+from algorithms.hpa import Abstraction, abstraction_for
+
+def assert_same_abstraction(updated: Abstraction, fresh: Abstraction):
+    assert np.array_equal(updated.passable, fresh.passable)
+    assert updated.entrances == fresh.entrances
+    assert {n: sorted(e) for n, e in updated.inter.items()} == {n: sorted(e) for n, e in fresh.inter.items()}
+    for got, expected in zip(updated.intra, fresh.intra):
+        assert {n: sorted(e) for n, e in got.items()} == {n: sorted(e) for n, e in expected.items()}
+
+def test_in_place_updates_match_a_fresh_build():
+    rng = np.random.RandomState(11)
+    rows, cols = 70, 90
+    grid = (rng.random_sample((rows, cols)) < 0.3).astype(np.int32)
+    hpa._cache.clear()
+    with hpa._lock:
+        abstraction_for(grid, rows, cols)
+    for _ in range(25):
+        previous = grid.copy()
+        cells = rng.randint(0, grid.size, rng.randint(1, 40))
+        grid.flat[cells] = 1 - grid.flat[cells]
+        if np.array_equal(grid, previous):
+            continue
+        with hpa._lock:
+            updated = abstraction_for(grid, rows, cols)
+        assert_same_abstraction(updated, Abstraction(grid, rows, cols))
+        # The abstraction it was copied from still serves the grid before the edits
+        with hpa._lock:
+            kept = abstraction_for(previous, rows, cols)
+        assert kept is not updated
+        assert_same_abstraction(kept, Abstraction(previous, rows, cols))
+
+def test_grids_of_the_same_size_stay_cached_side_by_side():
+    rng = np.random.RandomState(2)
+    rows, cols = 40, 40
+    first = (rng.random_sample((rows, cols)) < 0.3).astype(np.int32)
+    second = (rng.random_sample((rows, cols)) < 0.3).astype(np.int32)
+    hpa._cache.clear()
+    with hpa._lock:
+        a = abstraction_for(first, rows, cols)
+        b = abstraction_for(second, rows, cols)
+        assert len(hpa._cache) == 2
+        assert abstraction_for(first, rows, cols) is a
+        assert abstraction_for(second, rows, cols) is b
+
+def test_paths_after_edits_are_valid():
+    rng = np.random.RandomState(5)
+    rows, cols = 64, 64
+    grid = (rng.random_sample((rows, cols)) < 0.25).astype(np.int32)
+    start, end = 0, grid.size - 1
+    hpa._cache.clear()
+    for _ in range(20):
+        cells = rng.randint(1, grid.size - 1, 30)
+        grid.flat[cells] = rng.randint(0, 2, len(cells))
+        grid.flat[[start, end]] = 0
+        with hpa._lock:
+            _, path = abstraction_for(grid, rows, cols).query(start, end)
+        shortest = bfs_grid(grid, start, end, rows, cols)[1]
+        assert bool(path) == bool(shortest)
+        if path:
+            assert path[0] == start and path[-1] == end
+            assert len(path) >= len(shortest)
+            assert all(grid.flat[i] != 1 for i in path)
+            steps = np.abs(np.diff(np.divmod(np.array(path), cols), axis=1)).sum(axis=0)
+            assert np.all(steps == 1)
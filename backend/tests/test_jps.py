@@ -0,0 +1,37 @@
+import numpy as np
+
+from algorithms.dijkstra import dijkstra_grid
+from algorithms.jps import jps_grid, jps_scanned_grid
+from benchmarks.grids import GENERATORS
+
+def assert_valid_path(grid: np.ndarray, path, start: int, end: int, cols: int):
+    assert path[0] == start and path[-1] == end
+    assert all(grid.flat[i] != 1 for i in path)
+    steps = np.abs(np.diff(np.divmod(np.array(path), cols), axis=1)).sum(axis=0)
+    assert np.all(steps == 1)
+
+def test_path_lengths_match_dijkstra():
+    rng = np.random.RandomState(21)
+    for generator in ("empty", "random10", "random25", "random40", "maze", "rooms"):
+        for seed in range(3):
+            rows, cols = rng.randint(5, 60, 2)
+            grid = GENERATORS[generator](rows, cols, seed)
+            open_cells = np.flatnonzero(grid.reshape(-1) != 1)
+            for start, end in rng.choice(open_cells, (8, 2)).tolist():
+                _, expected = dijkstra_grid(grid, start, end, rows, cols)
+                _, path = jps_grid(grid, start, end, rows, cols)
+                assert len(path) == len(expected), (generator, seed, start, end)
+                if path:
+                    assert_valid_path(grid, path, start, end, cols)
+
+def test_open_grids_expand_few_jump_points():
+    rows = cols = 64
+    grid = np.zeros((rows, cols), dtype=np.int32)
+    start, end = 0, rows * cols - 1
+    visited, path = jps_grid(grid, start, end, rows, cols)
+    scanned, scanned_path = jps_scanned_grid(grid, start, end, rows, cols)
+    dijkstra_visited, expected = dijkstra_grid(grid, start, end, rows, cols)
+    assert len(path) == len(scanned_path) == len(expected)
+    assert len(visited) * 10 < len(dijkstra_visited)
+    # The scanned variant also reports the cells jumped over on the way
+    assert set(visited[1:]) <= set(scanned) and len(scanned) > len(visited)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from algorithms.bfs import bfs_grid
+from algorithms.grid import Budget
+from algorithms.lpa_star import LPAStar
+
+def random_edits(rng, grid: np.ndarray, protected, count: int):
+    cells = [int(c) for c in rng.randint(0, grid.size, count) if c not in protected]
+    walls = [c for c in cells if grid.flat[c] == 0 and rng.rand() < 0.6]
+    cleared = [c for c in cells if grid.flat[c] == 1]
+    grid.flat[walls] = 1
+    grid.flat[cleared] = 0
+    return walls, cleared
+
+def test_replans_match_a_search_from_scratch():
+    rng = np.random.RandomState(3)
+    rows, cols = 60, 60
+    start, end = 0, rows * cols - 1
+    for density in (0.15, 0.3):
+        grid = (rng.random_sample((rows, cols)) < density).astype(np.int32)
+        grid.flat[[start, end]] = 0
+        planner = LPAStar(grid, start, end, rows, cols)
+        planner.plan()
+        for _ in range(40):
+            planner.set_cells(*random_edits(rng, grid, (start, end), 20))
+            _, path = planner.plan()
+            assert len(path) == len(bfs_grid(grid, start, end, rows, cols)[1])
+            assert np.array_equal(planner.walls(), grid)
+
+def test_budgeted_replans_resume_where_they_stopped():
+    rng = np.random.RandomState(9)
+    rows, cols = 60, 60
+    start, end = 0, rows * cols - 1
+    grid = (rng.random_sample((rows, cols)) < 0.2).astype(np.int32)
+    grid.flat[[start, end]] = 0
+    planner = LPAStar(grid, start, end, rows, cols)
+    for _ in range(15):
+        planner.set_cells(*random_edits(rng, grid, (start, end), 20))
+        while True:
+            budget = Budget(max_nodes=50)
+            _, path = planner.plan(budget)
+            if not budget.truncated:
+                break
+            assert path == []
+        assert len(path) == len(bfs_grid(grid, start, end, rows, cols)[1])
+
+def test_rejected_edits_change_nothing():
+    rows = cols = 5
+    grid = np.zeros((rows, cols), dtype=np.int32)
+    planner = LPAStar(grid, 0, rows * cols - 1, rows, cols)
+    planner.plan()
+    # The first wall is fine, the second lands on the start, so neither may be applied
+    with pytest.raises(ValueError):
+        planner.set_cells([5, 0], [])
+    with pytest.raises(ValueError):
+        planner.set_cells([6], [rows * cols])
+    assert np.array_equal(planner.walls(), grid)
+    _, path = planner.plan(Budget(max_nodes=1000))
+    assert len(path) == rows + cols - 1
+
+    planner.set_cells([5, 6], [])
+    grid.flat[[5, 6]] = 1
+    _, path = planner.plan()
+    assert len(path) == len(bfs_grid(grid, 0, rows * cols - 1, rows, cols)[1])
@@ -0,0 +1,356 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import RawArray, resource_tracker
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+from algorithms.components import connected
+from algorithms.grid import Budget
+from algorithms.fields import distance_transform, flow_field
+from codec import dumps, encode_field, encode_path, encode_path_json
+from profiling import profile_call
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the admission queue is full"""
+
+class PoolTimeout(Exception):
+    """Raised when a job runs past the per-request timeout"""
+
+class JobCancelled(Exception):
+    """Raised when a job is called off before it finishes, e.g. because its client left"""
+
+# Cancellation flags of the pool that started this worker process, one per admission slot
+_cancel_flags = None
+
+def _share_flags(flags):
+    global _cancel_flags
+    _cancel_flags = flags
+
+class CancelToken:
+    """
+    Cooperative cancellation flag for one job, checked by the job itself.
+    Flags live in shared memory, so a worker process sees the server set
+    them; only the slot number is pickled, and the worker looks it up in
+    the flags its pool handed over when the process started.
+    """
+
+    def __init__(self, flags, slot: int):
+        self.flags = flags
+        self.slot = slot
+
+    def set(self):
+        self.flags[self.slot] = 1
+
+    def is_set(self) -> bool:
+        return bool(self.flags[self.slot])
+
+    def __reduce__(self):
+        return _worker_token, (self.slot,)
+
+def _worker_token(slot: int) -> CancelToken:
+    return CancelToken(_cancel_flags, slot)
+
+class SolverPool:
+    """
+    Runs CPU-bound work off the event loop on a fixed number of workers.
+
+    At most workers + queue_size jobs are admitted at once; anything beyond
+    that is rejected immediately instead of piling up. A job's slot is only
+    released when its worker actually finishes, so a timed-out job that is
+    still running keeps counting against the limit; jobs started with
+    run_cancellable are told to stop, so they give theirs back sooner.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float, kind: str = "process"):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.kind = kind
+        self.max_pending = workers + queue_size
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self._executor: Optional[Executor] = None
+        self._stepper: Optional[Executor] = None
+        self._lock = threading.Lock()
+        # Admission caps running jobs at max_pending, so there is always a free flag
+        self._flags = RawArray("b", self.max_pending)
+        self._free_slots = list(range(self.max_pending))
+
+    @classmethod
+    def from_env(cls) -> "SolverPool":
+        workers = int(os.environ.get("SOLVER_WORKERS", 0)) or os.cpu_count() or 1
+        return cls(
+            workers=workers,
+            queue_size=int(os.environ.get("SOLVER_QUEUE", 2 * workers)),
+            timeout=float(os.environ.get("SOLVER_TIMEOUT", 30)),
+            kind=os.environ.get("SOLVER_EXECUTOR", "process"),
+        )
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Start the resource tracker before forking so workers share it; otherwise
+                # each worker that attaches a shared memory segment reports it as leaked
+                resource_tracker.ensure_running()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_share_flags, initargs=(self._flags,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @property
+    def stepper(self) -> Executor:
+        """
+        Where streamed searches are stepped a chunk at a time. A generator
+        can't move between processes, so a process pool steps them on
+        threads of its own, one per worker; a thread pool uses its workers.
+        """
+        if self.kind == "thread":
+            return self.executor
+        if self._stepper is None:
+            self._stepper = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stepper")
+        return self._stepper
+
+    def admit(self) -> bool:
+        """Take a slot if one is free"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                return False
+            self.pending += 1
+            return True
+
+    def release(self, token: Optional[CancelToken] = None):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            if token is not None:
+                self._free_slots.append(token.slot)
+
+    async def run(self, fn: Callable, *args):
+        """
+        Run fn(*args) on a worker
+        Returns: fn's result
+        """
+        return await self._run(fn, args, cancellable=False)
+
+    async def run_cancellable(self, fn: Callable, *args, until: Optional[asyncio.Event] = None):
+        """
+        Run fn(*args, cancel=token) on a worker, where token is a CancelToken
+        fn checks as it goes. The token is set when the job times out, when
+        the caller is cancelled, and once until is set, which raises
+        JobCancelled.
+        Returns: fn's result
+        """
+        return await self._run(fn, args, cancellable=True, until=until)
+
+    async def run_local(self, fn: Callable, *args, until: Optional[asyncio.Event] = None):
+        """
+        Run fn(*args, cancel=token) like run_cancellable, but on the
+        stepper's threads, for work on state that lives in this process
+        and can't be sent to a worker process
+        Returns: fn's result
+        """
+        return await self._run(fn, args, cancellable=True, until=until, executor=self.stepper)
+
+    async def run_all(self, fn: Callable, calls: List[tuple], until: Optional[asyncio.Event] = None) -> list:
+        """
+        Run fn(*args, cancel=token) for every args in calls, each as
+        run_cancellable would. Slots are reserved up front, as many as are
+        free and calls can use, and the calls take turns on them, so a
+        group fails fast or not at all and never holds more than the pool
+        has. Once one call fails the rest are called off through their
+        tokens before this returns.
+        Returns: fn's results, in the order of calls
+        """
+        with self._lock:
+            lanes = min(self.max_pending - self.pending, len(calls))
+            if lanes < 1:
+                self.rejected += 1
+                raise PoolSaturated()
+            self.pending += lanes
+            tokens = [CancelToken(self._flags, self._free_slots.pop()) for _ in range(lanes)]
+
+        results = [None] * len(calls)
+        queue = iter(range(len(calls)))
+
+        async def lane(token: CancelToken):
+            future = None
+            try:
+                for i in queue:
+                    if future is not None:
+                        with self._lock:
+                            self.completed += 1
+                    self._flags[token.slot] = 0
+                    future = self.executor.submit(fn, *calls[i], cancel=token)
+                    results[i] = await self._wait(future, token, until)
+            finally:
+                # Like every slot, this one is only given back once its last job has really stopped
+                if future is None:
+                    self.release(token)
+                else:
+                    future.add_done_callback(lambda _: self.release(token))
+
+        tasks = [asyncio.ensure_future(lane(token)) for token in tokens]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return results
+
+    async def _run(self, fn: Callable, args: tuple, cancellable: bool, until: Optional[asyncio.Event] = None,
+                   executor: Optional[Executor] = None):
+        if not self.admit():
+            raise PoolSaturated()
+
+        token = None
+        try:
+            executor = executor or self.executor
+            if cancellable:
+                with self._lock:
+                    token = CancelToken(self._flags, self._free_slots.pop())
+                self._flags[token.slot] = 0
+                future = executor.submit(fn, *args, cancel=token)
+            else:
+                future = executor.submit(fn, *args)
+        except BaseException:
+            self.release(token)
+            raise
+        future.add_done_callback(lambda _: self.release(token))
+        return await self._wait(future, token, until)
+
+    async def _wait(self, future: Future, token: Optional[CancelToken], until: Optional[asyncio.Event]):
+        result = asyncio.wrap_future(future)
+        watcher = asyncio.ensure_future(until.wait()) if until is not None else None
+        try:
+            waiting = {result} if watcher is None else {result, watcher}
+            await asyncio.wait(waiting, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+            if result.done():
+                return result.result()
+            # Cancelling only drops a job that hasn't started; a running one has to notice the token
+            self._abandon(result, token)
+            called_off = watcher is not None and watcher.done()
+            with self._lock:
+                if called_off:
+                    self.cancelled += 1
+                else:
+                    self.timeouts += 1
+            raise JobCancelled() if called_off else PoolTimeout()
+        except asyncio.CancelledError:
+            self._abandon(result, token)
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    def _abandon(self, result: asyncio.Future, token: Optional[CancelToken]):
+        if token is not None:
+            token.set()
+        result.cancel()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "timeout": self.timeout,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+            }
+
+    def shutdown(self):
+        for executor in (self._executor, self._stepper):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._stepper = None
+
+def solve_job(solver: Callable, grid: np.ndarray, start: int, end: int, rows: int, cols: int, binary: bool,
+              weights: Optional[np.ndarray] = None, flood: bool = False, echo_grid: bool = False,
+              max_nodes: Optional[int] = None, deadline: Optional[float] = None, profile: bool = False,
+              cancel: Optional[CancelToken] = None) -> Tuple[bytes, dict]:
+    """
+    Worker entry point for one solve: search, then encode, so only the
+    response bytes travel back to the server process. Unless flood is set,
+    a query whose ends lie in different components answers "no path"
+    straight from the component index instead of searching. The search
+    stops early once it expands max_nodes cells, passes deadline (a
+    time.monotonic() value) or is cancelled, and what it visited so far
+    is sent back marked as truncated. With profile, the search runs under
+    cProfile and tracemalloc and the capture comes back too.
+    Returns: (encoded response body, {"search", "encode" seconds, "visited" count,
+              "truncated" reason or None, "profile" capture if asked for})
+    """
+    began = time.perf_counter()
+    budget = Budget(max_nodes, deadline, cancel)
+
+    def search() -> Tuple[List[int], List[int]]:
+        if not flood and not connected(grid, start, end, rows, cols):
+            return [], []
+        if weights is None:
+            return solver(grid, start, end, rows, cols, budget=budget)
+        return solver(grid, start, end, rows, cols, weights, budget=budget)
+
+    capture = None
+    if profile:
+        (visited_order, path_indexes), capture = profile_call(search)
+    else:
+        visited_order, path_indexes = search()
+    searched = time.perf_counter()
+    if binary:
+        body = encode_path(visited_order, path_indexes)
+    else:
+        body = encode_path_json(visited_order, path_indexes, grid if echo_grid else None, budget.truncated)
+    return body, {
+        "search": searched - began,
+        "encode": time.perf_counter() - searched,
+        "visited": len(visited_order),
+        "truncated": budget.reason,
+        "profile": capture,
+    }
+
+def field_job(grid: np.ndarray, rows: int, cols: int, sources: List[int], weights: Optional[np.ndarray],
+              flow: bool, binary: bool, max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+              cancel: Optional[CancelToken] = None) -> Tuple[bytes, dict]:
+    """
+    Worker entry point for a distance field, encoded like solve_job's
+    results. Like a solve, it stops early once it reaches max_nodes cells,
+    passes deadline or is cancelled, and the cells it got to are sent back
+    marked as truncated.
+    Returns: (encoded response body, {"search", "encode" seconds, "truncated" reason or None})
+    """
+    began = time.perf_counter()
+    budget = Budget(max_nodes, deadline, cancel)
+    distances = distance_transform(grid, rows, cols, sources, weights, budget)
+    directions = flow_field(distances) if flow else None
+    searched = time.perf_counter()
+    if binary:
+        body = encode_field(distances, directions)
+    else:
+        result = {"rows": rows, "cols": cols, "distances": distances.reshape(-1)}
+        if directions is not None:
+            result["flow"] = directions.reshape(-1)
+        if budget.truncated:
+            result["truncated"] = True
+        body = dumps(result)
+    return body, {
+        "search": searched - began,
+        "encode": time.perf_counter() - searched,
+        "truncated": budget.reason,
+    }
@@ -1,7 +1,7 @@
 ﻿import styled from "styled-components";
 import Constants from "./constants.js";
 import { getTwoUniqueRandomNumbers } from "../HelperFunctions.js";
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 
 // Import Components
 import Node from "./Node.jsx";
@@ -18,6 +18,8 @@ const Rows = Math.floor(window.innerHeight / Constants.nodeHeight);
 
 export default function PathVisualizer() {
     const [cellState, setCellState] = useState(null);
+    // In-flight search; aborted when superseded or on unmount so the server stops it
+    const searchController = useRef(null);
     const [initialized, setInitialized] = useState(false);
     const [mouseDown, setMouseDown] = useState(false);
     const [AlgoName, setAlgoName] = useState("Dijkstra");
@@ -110,14 +112,47 @@ export default function PathVisualizer() {
     async function mazify() {
         setIsAnimating(true);
         try {
-            const result = await generateMaze(start, end, Rows, Columns);
-            animateMazeGeneration(result.grid);
+            const result = await generateMaze(start, end, Rows, Columns, { includeOrder: true, session: true });
+            if (result.carve_order) {
+                animateCarveOrder(result.grid, result.carve_order);
+            } else {
+                animateMazeGeneration(result.grid);
+            }
         } catch (error) {
             console.error("Maze generation failed:", error);
             setIsAnimating(false);
         }
     }
 
+    function animateCarveOrder(mazeGrid, carveOrder) {
+        const wallGrid = new Uint8Array(cellState.length).fill(1);
+        setCellState(wallGrid);
+
+        // Same number of frames as the row-by-row animation, carving cells in the order the generator did
+        const frames = Math.max(1, Math.floor(cellState.length / Columns));
+        const batch = Math.ceil(carveOrder.length / frames);
+        const animationState = new Uint8Array(wallGrid);
+        const finalMaze = new Uint8Array(mazeGrid);
+
+        for (let frame = 0; frame < frames; frame++) {
+            setTimeout(() => {
+                const last = Math.min(carveOrder.length, (frame + 1) * batch);
+                for (let i = frame * batch; i < last; i++) {
+                    animationState[carveOrder[i]] = 0;
+                }
+                setCellState(new Uint8Array(animationState));
+
+                if (frame === frames - 1) {
+                    setTimeout(() => {
+                        setCellState(finalMaze);
+                        setisPlayed(false);
+                        setIsAnimating(false);
+                    }, Constants.mazeGenerationTimeOut);
+                }
+            }, frame * Constants.mazeGenerationTimeOut);
+        }
+    }
+
     function animateMazeGeneration(mazeGrid) {
         const wallGrid = new Uint8Array(cellState.length).fill(1);
         wallGrid[start] = 0;
@@ -151,7 +186,7 @@ export default function PathVisualizer() {
     const [algo, setAlgo] = useState(0);
 
     useEffect(() => {
-        let algoName = ["Dijkstra", "A Star", "DFS", "BFS", "Greedy BFS", "Bellman Ford", "Bi Swarm"];
+        let algoName = ["Dijkstra", "A Star", "DFS", "BFS", "Greedy BFS", "Bellman Ford", "Bi Swarm", "Jump Point"];
         let index = algo % algoName.length;
         setAlgoName(algoName[index]);
         if (initialized) {
@@ -161,7 +196,7 @@ export default function PathVisualizer() {
     }, [algo]);
 
     function GetComplexity() {
-        let complexity = ["O((V+E)logV)", "O(E)", "O(V+E)", "O(V+E)", "O(E)", "O(VE)", "O(VlogV)"];
+        let complexity = ["O((V+E)logV)", "O(E)", "O(V+E)", "O(V+E)", "O(E)", "O(VE)", "O(VlogV)", "O(ElogV)"];
         return complexity[algo % complexity.length];
     }
 
@@ -177,7 +212,9 @@ export default function PathVisualizer() {
             algorithmEndpoints.bfs,
             algorithmEndpoints.greedyBfs,
             algorithmEndpoints.bellmanFord,
-            algorithmEndpoints.biSwarm
+            algorithmEndpoints.biSwarm,
+            // Animate every cell jumped over, not just the few jump points
+            `${algorithmEndpoints.jps}?scanned=true`
         ];
 
         if (algo >= 0 && algo < algoEndpoints.length) {
@@ -186,6 +223,9 @@ export default function PathVisualizer() {
     }
 
     async function handlePathfinding(endpoint) {
+        searchController.current?.abort();
+        const controller = new AbortController();
+        searchController.current = controller;
         setIsAnimating(true);
         try {
             const result = await runAlgorithm(
@@ -194,7 +234,8 @@ export default function PathVisualizer() {
                 start,
                 end,
                 Rows,
-                Columns
+                Columns,
+                { binary: true, session: true, signal: controller.signal }
             );
 
             const { visited_order, path_indexes } = result;
@@ -210,6 +251,8 @@ export default function PathVisualizer() {
             const currentCellState = new Uint8Array(cellState);
             animatePath(currentCellState, visited_order, path_indexes);
         } catch (error) {
+            // A newer search took over and manages the animation state
+            if (error.name === "AbortError") return;
             console.error("Pathfinding failed:", error);
             setIsAnimating(false);
         }
@@ -284,6 +327,8 @@ export default function PathVisualizer() {
         }
     }, [initialized, cellState, start, end, mouseDown, dragMode]);
 
+    useEffect(() => () => searchController.current?.abort(), []);
+
     useEffect(() => {
         if (initialized && isPlayed) {
             // Re-run algorithm when start/end changes
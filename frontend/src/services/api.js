@@ -12,12 +12,262 @@ export const algorithmEndpoints = {
   greedyBfs: '/api/greedy-bfs',
   bellmanFord: '/api/bellman-ford',
   biSwarm: '/api/bi-swarm',
+  jps: '/api/jps',
+  hpa: '/api/hpa',
+  alt: '/api/alt',
   maze: '/api/maze',
+  compare: '/api/compare',
+  sessions: '/api/sessions',
 };
 
-export async function runAlgorithm(endpoint, grid, start, end, rows, cols) {
+const BINARY_MEDIA_TYPE = 'application/octet-stream';
+
+// Binary request: rows, cols, start, end as little-endian int32, then one
+// wall bit per cell (row-major, least significant bit first)
+function encodeGrid(grid, start, end, rows, cols) {
+  const cells = rows * cols;
+  const buffer = new ArrayBuffer(16 + Math.ceil(cells / 8));
+  const header = new DataView(buffer);
+  header.setInt32(0, rows, true);
+  header.setInt32(4, cols, true);
+  header.setInt32(8, start, true);
+  header.setInt32(12, end, true);
+
+  const bits = new Uint8Array(buffer, 16);
+  for (let i = 0; i < cells; i++) {
+    if (grid[i] === 1) bits[i >> 3] |= 1 << (i & 7);
+  }
+  return buffer;
+}
+
+// Binary response: visited and path lengths as little-endian uint32, then
+// both arrays as int32. The typed arrays are views over the response buffer.
+function decodePath(buffer) {
+  const header = new DataView(buffer);
+  const visitedLength = header.getUint32(0, true);
+  const pathLength = header.getUint32(4, true);
+  return {
+    visited_order: new Int32Array(buffer, 8, visitedLength),
+    path_indexes: new Int32Array(buffer, 8 + 4 * visitedLength, pathLength),
+  };
+}
+
+// Grid session shared by every runAlgorithm call made with { session: true }.
+// The server keeps the grid; later runs only send the cells that changed.
+let gridSession = null;
+
+// Past this many toggled cells, uploading the grid again is cheaper than a diff
+const MAX_DIFF_FRACTION = 1 / 16;
+
+function wallSnapshot(grid) {
+  return Uint8Array.from(grid, (cell) => (cell === 1 ? 1 : 0));
+}
+
+async function createSession(grid, start, end, rows, cols) {
+  const response = await fetch(`${API_BASE_URL}${algorithmEndpoints.sessions}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': BINARY_MEDIA_TYPE,
+    },
+    body: encodeGrid(grid, start, end, rows, cols),
+  });
+  if (!response.ok) {
+    throw new Error(`Session creation failed with status ${response.status}`);
+  }
+  const { session_id, version } = await response.json();
+  gridSession = { id: session_id, version, walls: wallSnapshot(grid), start, end, rows, cols };
+  return session_id;
+}
+
+// Brings the server's copy of the grid up to date and returns the session id
+async function syncSession(grid, start, end, rows, cols) {
+  const session = gridSession;
+  if (!session || session.rows !== rows || session.cols !== cols) {
+    return createSession(grid, start, end, rows, cols);
+  }
+
+  const toggle = [];
+  for (let i = 0; i < session.walls.length; i++) {
+    if ((grid[i] === 1 ? 1 : 0) !== session.walls[i]) toggle.push(i);
+  }
+  if (!toggle.length && session.start === start && session.end === end) {
+    return session.id;
+  }
+  if (toggle.length > session.walls.length * MAX_DIFF_FRACTION) {
+    return createSession(grid, start, end, rows, cols);
+  }
+
+  const response = await fetch(`${API_BASE_URL}${algorithmEndpoints.sessions}/${session.id}`, {
+    method: 'PATCH',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ toggle, start, end, version: session.version }),
+  });
+  // Expired, evicted or edited elsewhere: start over from the full grid
+  if (response.status === 404 || response.status === 409) {
+    return createSession(grid, start, end, rows, cols);
+  }
+  if (!response.ok) {
+    throw new Error(`Session update failed with status ${response.status}`);
+  }
+  for (const i of toggle) session.walls[i] ^= 1;
+  session.start = start;
+  session.end = end;
+  session.version = (await response.json()).version;
+  return session.id;
+}
+
+// Last result per endpoint and response format, revalidated with If-None-Match
+// so an unchanged rerun comes back as an empty 304
+const lastResults = new Map();
+
+// Aborting signal drops the request, and the server stops the search when it sees the client leave
+export async function runAlgorithm(endpoint, grid, start, end, rows, cols, { binary = false, session = false, signal } = {}) {
   try {
-    const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+    const cacheKey = `${endpoint}:${binary}`;
+    const previous = lastResults.get(cacheKey);
+
+    const request = session
+      ? {
+          headers: {
+            'Content-Type': 'application/json',
+            ...(binary && { Accept: BINARY_MEDIA_TYPE }),
+          },
+          body: JSON.stringify({
+            session_id: await syncSession(grid, start, end, rows, cols),
+          }),
+        }
+      : binary
+      ? {
+          headers: {
+            'Content-Type': BINARY_MEDIA_TYPE,
+            Accept: BINARY_MEDIA_TYPE,
+          },
+          body: encodeGrid(grid, start, end, rows, cols),
+        }
+      : {
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({
+            grid: Array.from(grid),
+            start,
+            end,
+            rows,
+            cols,
+          }),
+        };
+
+    if (previous) {
+      request.headers['If-None-Match'] = previous.etag;
+    }
+
+    let response = await fetch(`${API_BASE_URL}${endpoint}`, {
+      method: 'POST',
+      ...request,
+      signal,
+    });
+
+    // The session expired between syncing and solving; upload once more
+    if (session && response.status === 404) {
+      request.body = JSON.stringify({
+        session_id: await createSession(grid, start, end, rows, cols),
+      });
+      response = await fetch(`${API_BASE_URL}${endpoint}`, {
+        method: 'POST',
+        ...request,
+        signal,
+      });
+    }
+
+    if (response.status === 304 && previous) {
+      return previous.result;
+    }
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(
+        `HTTP error! status: ${response.status}, message: ${errorData.detail || 'Unknown error'}`
+      );
+    }
+
+    const result = binary
+      ? decodePath(await response.arrayBuffer())
+      : await response.json();
+    // Searches cut short by a budget come back partial, without an ETag
+    result.truncated = response.headers.has('X-Search-Truncated');
+
+    const etag = response.headers.get('ETag');
+    if (etag) {
+      lastResults.set(cacheKey, { etag, result });
+    }
+    return result;
+  } catch (error) {
+    if (error.name !== 'AbortError') console.error('Algorithm execution failed:', error);
+    throw error;
+  }
+}
+
+// Streams a search as newline-delimited JSON. onVisited is called with each
+// chunk of visited indexes as soon as the server produces it; resolves with
+// { path_indexes, visited_count, truncated } once the search finishes.
+export async function streamAlgorithm(endpoint, grid, start, end, rows, cols, onVisited, { signal } = {}) {
+  try {
+    const response = await fetch(`${API_BASE_URL}${endpoint}/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': BINARY_MEDIA_TYPE,
+      },
+      body: encodeGrid(grid, start, end, rows, cols),
+      signal,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(
+        `HTTP error! status: ${response.status}, message: ${errorData.detail || 'Unknown error'}`
+      );
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      buffered += decoder.decode(value, { stream: !done });
+
+      let newline;
+      while ((newline = buffered.indexOf('\n')) !== -1) {
+        const event = JSON.parse(buffered.slice(0, newline));
+        buffered = buffered.slice(newline + 1);
+
+        if (event.error) throw new Error(event.error);
+        if (event.visited) onVisited(event.visited);
+        if (event.path) {
+          return {
+            path_indexes: event.path,
+            visited_count: event.visited_count,
+            truncated: Boolean(event.truncated),
+          };
+        }
+      }
+
+      if (done) throw new Error('Stream ended before the search finished');
+    }
+  } catch (error) {
+    if (error.name !== 'AbortError') console.error('Algorithm stream failed:', error);
+    throw error;
+  }
+}
+
+// Runs several algorithms on one grid in a single request. algorithms uses the
+// endpoint names, e.g. ['dijkstra', 'astar', 'bfs']; resolves with one
+// { algorithm, visited_count, path_length, found, elapsed_ms } per algorithm.
+export async function compareAlgorithms(grid, start, end, rows, cols, algorithms) {
+  try {
+    const response = await fetch(`${API_BASE_URL}${algorithmEndpoints.compare}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -28,6 +278,7 @@ export async function runAlgorithm(endpoint, grid, start, end, rows, cols) {
         end,
         rows,
         cols,
+        algorithms,
       }),
     });
 
@@ -38,14 +289,14 @@ export async function runAlgorithm(endpoint, grid, start, end, rows, cols) {
       );
     }
 
-    return await response.json();
+    return (await response.json()).results;
   } catch (error) {
-    console.error('Algorithm execution failed:', error);
+    console.error('Algorithm comparison failed:', error);
     throw error;
   }
 }
 
-export async function generateMaze(start, end, rows, cols) {
+export async function generateMaze(start, end, rows, cols, { seed = null, includeOrder = false, session = false } = {}) {
   try {
     const response = await fetch(`${API_BASE_URL}${algorithmEndpoints.maze}`, {
       method: 'POST',
@@ -57,6 +308,9 @@ export async function generateMaze(start, end, rows, cols) {
         end,
         rows,
         cols,
+        seed,
+        include_order: includeOrder,
+        create_session: session,
       }),
     });
 
@@ -67,7 +321,20 @@ export async function generateMaze(start, end, rows, cols) {
       );
     }
 
-    return await response.json();
+    const result = await response.json();
+    // The server already holds the maze, so later runs can diff against it
+    if (result.session_id) {
+      gridSession = {
+        id: result.session_id,
+        version: 0,
+        walls: wallSnapshot(result.grid),
+        start,
+        end,
+        rows,
+        cols,
+      };
+    }
+    return result;
   } catch (error) {
     console.error('Maze generation failed:', error);
     throw error;